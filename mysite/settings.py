@@ -300,6 +300,20 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Installed into the beat database on startup, next to the schedules made in the admin
+CELERY_BEAT_SCHEDULE = {
+    'update-tracker-rollups': {
+        'task': 'scraper_app.tasks.update_tracker_rollups',
+        'schedule': 10 * 60,
+    },
+    'enforce-tracker-retention': {
+        'task': 'scraper_app.tasks.enforce_tracker_retention',
+        'schedule': 24 * 60 * 60,
+    },
+}
+
+# Raw ProductTracker rows are kept this many days; older data lives on in the hourly/daily rollups
+TRACKER_RETENTION_DAYS = 30
 
 INSTALLED_APPS += ['crispy_forms', 'crispy_bootstrap5']
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
@@ -314,3 +328,15 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 LOGIN_REDIRECT_URL = '/'         # Redirect here after login
 LOGOUT_REDIRECT_URL = '/login/' # Redirect here after logout
+
+# Scraper timing spans are logged as one JSON object per line
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'scraper.metrics': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
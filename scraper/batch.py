@@ -0,0 +1,175 @@
+"""Batch scrapes over a keyword x pincode list, run concurrently.
+
+    python -m scraper.batch jobs.csv --concurrency 3 --output report.xlsx
+    python -m scraper.batch jobs.yaml --output report.parquet --profile lean
+
+jobs.csv has keyword,pincode columns, one pair per row. jobs.yaml is either
+a list of {keyword, pincode} pairs or a matrix:
+
+    keywords: [milk, curd, paneer]
+    pincodes: ["560034", "110001"]
+
+The output has one row per product variant from every job (plus a Jobs
+sheet with per-job stats in the workbook), and a throughput summary is
+printed at the end.
+"""
+import argparse
+import csv
+import importlib.util
+import itertools
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+from .blinkit_scraper import driver_pool, scrape_blinkit
+from .config import ScrapeConfig
+from .excel import StreamingWorkbook
+from .sinks import CallbackSink
+
+VARIANT_COLUMNS = ["Keyword", "Pincode", "Product Name", "Variant", "In Stock", "URL", "Scraped At"]
+
+
+def load_jobs(path):
+    """(keyword, pincode) pairs from a CSV or YAML file, duplicates dropped"""
+    if path.endswith((".yaml", ".yml")):
+        if not YAML_AVAILABLE:
+            sys.exit("❌ YAML job files need: pip install pyyaml")
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        if isinstance(data, dict):
+            pairs = itertools.product(data.get("keywords", []), data.get("pincodes", []))
+        else:
+            pairs = ((item["keyword"], item["pincode"]) for item in data)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            pairs = [(row["keyword"], row["pincode"]) for row in csv.DictReader(f)]
+
+    jobs = []
+    for keyword, pincode in pairs:
+        job = (str(keyword).strip(), str(pincode).strip())
+        if all(job) and job not in jobs:
+            jobs.append(job)
+    return jobs
+
+
+def variant_rows(keyword, pincode, item):
+    """One output row per variant of a scraped product"""
+    scraped_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    variants = [(v, True) for v in item["available_variants"]]
+    variants += [(v, False) for v in item["out_of_stock_variants"]]
+    return [
+        [keyword, pincode, item["product_name"], variant, in_stock, item["url"], scraped_at]
+        for variant, in_stock in variants
+    ]
+
+
+def run_job(keyword, pincode, config, rows, lock):
+    start = time.monotonic()
+    stats = {"keyword": keyword, "pincode": pincode, "products": 0, "variants": 0,
+             "out_of_stock_variants": 0, "error": ""}
+
+    def collect(item):
+        new = variant_rows(keyword, pincode, item)
+        with lock:
+            rows.extend(new)
+        stats["products"] += 1
+        stats["variants"] += len(new)
+        stats["out_of_stock_variants"] += len(item["out_of_stock_variants"])
+
+    try:
+        scrape_blinkit(keyword, pincode, config, sinks=[CallbackSink(collect)])
+    except Exception as e:
+        print(f"❌ {keyword} @ {pincode} failed: {e}")
+        stats["error"] = str(e)
+    stats["seconds"] = round(time.monotonic() - start, 1)
+    return stats
+
+
+def write_output(path, rows, jobs):
+    if path.endswith(".parquet"):
+        import pandas as pd
+        pd.DataFrame(rows, columns=VARIANT_COLUMNS).to_parquet(path, index=False)
+        return
+
+    workbook = StreamingWorkbook()
+    sheet = workbook.add_sheet("Variants", VARIANT_COLUMNS)
+    for row in rows:
+        sheet.append(row)
+    job_columns = ["keyword", "pincode", "products", "variants", "out_of_stock_variants", "seconds", "error"]
+    sheet = workbook.add_sheet("Jobs", [c.replace("_", " ").title() for c in job_columns])
+    for job in jobs:
+        sheet.append([job[c] for c in job_columns])
+    workbook.save(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scrape a list of keyword/pincode pairs into one report",
+        epilog="Page loads are not rate-limited unless BLINKIT_GOVERNOR_URL is set (e.g. "
+               "sqlite:///path/governor.sqlite3); BLINKIT_RATE_PER_MIN then caps pages/min "
+               "across all jobs and browsers together, so size it for concurrency x workers.",
+    )
+    parser.add_argument("jobs", help="CSV (keyword,pincode columns) or YAML job file")
+    parser.add_argument("--output", default="blinkit_batch.xlsx", help=".xlsx or .parquet")
+    parser.add_argument("--concurrency", type=int, default=2, help="jobs scraped at the same time")
+    parser.add_argument("--workers", type=int, default=1, help="browsers per job")
+    parser.add_argument("--profile", default="lean")
+    parser.add_argument("--mode", default="products", choices=["products", "listing"])
+    parser.add_argument("--max-products", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.output.endswith(".parquet") and not (
+        importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet")
+    ):
+        sys.exit("❌ Parquet output needs: pip install pyarrow")
+
+    jobs = load_jobs(args.jobs)
+    if not jobs:
+        sys.exit(f"❌ No keyword/pincode pairs in {args.jobs}")
+    config = ScrapeConfig(workers=args.workers, profile=args.profile, mode=args.mode,
+                          max_products=args.max_products)
+
+    # Keep a warm browser for every job that runs at the same time
+    pool = driver_pool(config.profile)
+    pool.max_idle = max(pool.max_idle, args.concurrency * args.workers)
+
+    print(f"🛒 {len(jobs)} scrapes, {args.concurrency} at a time")
+    rows = []
+    lock = threading.Lock()
+    results = []
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(run_job, keyword, pincode, config, rows, lock) for keyword, pincode in jobs]
+        for future in as_completed(futures):
+            stats = future.result()
+            results.append(stats)
+            icon = "⚠" if stats["error"] else "✅"
+            print(f"{icon} {stats['keyword']} @ {stats['pincode']}: {stats['products']} products "
+                  f"in {stats['seconds']}s ({len(results)}/{len(jobs)} done)")
+    elapsed = time.monotonic() - start
+
+    write_output(args.output, rows, results)
+    print(f"📄 Saved {len(rows)} variant rows to {args.output}")
+
+    products = sum(r["products"] for r in results)
+    failed = [r for r in results if r["error"]]
+    print(f"\n📊 THROUGHPUT SUMMARY:")
+    print(f"Scrapes: {len(results) - len(failed)} ok, {len(failed)} failed")
+    print(f"Products: {products}  Variants: {len(rows)}  "
+          f"Out of stock variants: {sum(r['out_of_stock_variants'] for r in results)}")
+    print(f"Wall time: {elapsed:.1f}s  Scrape time: {sum(r['seconds'] for r in results):.1f}s")
+    print(f"Throughput: {products / elapsed * 60 if elapsed else 0:.1f} products/min")
+    for r in failed:
+        print(f"• {r['keyword']} @ {r['pincode']}: {r['error']}")
+
+
+if __name__ == "__main__":
+    main()
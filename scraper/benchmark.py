@@ -0,0 +1,146 @@
+"""End-to-end scrape throughput benchmark against the local stand-in site.
+
+Starts scraper.fixture_site, points the real scraper at it and reports
+products per minute, p50/p95 product page latency and how long the scraper
+takes to get back to a good product after a failed one. Caches and the
+request governor are switched off so every run does the same work.
+
+    python -m scraper.benchmark --products 60 --workers 1 --failure-rate 0.05
+    python -m scraper.benchmark --workers 4 --profile lean --json baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from .fixture_site import FixtureSite
+
+PAGE_STAGES = ("product_cycle", "product_page")
+
+
+class EventCollector(logging.Handler):
+    """Keeps the JSON events written to the scraper.metrics logger"""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def emit(self, record):
+        try:
+            self.events.append(json.loads(record.getMessage()))
+        except ValueError:
+            pass
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def recovery_times(events):
+    """Seconds from each failed product to the next good one"""
+    times = []
+    failed_at = None
+    for e in events:
+        if e.get("event") != "product_outcome":
+            continue
+        if not e["ok"] and failed_at is None:
+            failed_at = e["ts"]
+        elif e["ok"] and failed_at is not None:
+            times.append(e["ts"] - failed_at)
+            failed_at = None
+    return times
+
+
+def report(events, products, elapsed, site):
+    pages = [e["duration_s"] for e in events if e.get("event") == "span" and e["stage"] in PAGE_STAGES]
+    recoveries = recovery_times(events)
+    failed = sum(1 for e in events if e.get("event") == "product_outcome" and not e["ok"])
+
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        "products": products,
+        "elapsed_s": round(elapsed, 1),
+        "products_per_minute": round(products / elapsed * 60, 1) if elapsed else 0,
+        "page_latency_p50_s": rounded(percentile(pages, 50)),
+        "page_latency_p95_s": rounded(percentile(pages, 95)),
+        "failed_products": failed,
+        "recovery_p50_s": rounded(percentile(recoveries, 50)),
+        "recovery_max_s": rounded(max(recoveries) if recoveries else None),
+        "site": site.stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Blinkit scraper against a local stand-in site")
+    parser.add_argument("--keyword", default="milk")
+    parser.add_argument("--pincode", default="560034")
+    parser.add_argument("--products", type=int, default=60)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--profile", default="lean")
+    parser.add_argument("--mode", default="products", choices=["products", "listing"])
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    site = FixtureSite(products=args.products, page_size=args.page_size, latency=args.latency,
+                       jitter=args.jitter, failure_rate=args.failure_rate, seed=args.seed)
+    base_url = site.start()
+
+    # Must be set before the scraper module is imported: it reads them at import time
+    os.environ["BLINKIT_BASE_URL"] = base_url
+    os.environ["BLINKIT_GOVERNOR_URL"] = "off"
+    os.environ["BLINKIT_PRODUCT_CACHE"] = "off"
+    os.environ["BLINKIT_LOCATION_CACHE_DIR"] = tempfile.mkdtemp(prefix="blinkit-bench-")
+    if "scraper.blinkit_scraper" in sys.modules:
+        sys.exit("❌ Run the benchmark in a fresh process (python -m scraper.benchmark)")
+    from .blinkit_scraper import iter_blinkit
+
+    collector = EventCollector()
+    metrics_logger = logging.getLogger("scraper.metrics")
+    metrics_logger.addHandler(collector)
+    metrics_logger.setLevel(logging.INFO)
+
+    print(f"🧪 Stand-in site at {base_url}: {args.products} products, "
+          f"{args.latency}s latency, {args.failure_rate:.0%} failures")
+    start = time.monotonic()
+    products = 0
+    try:
+        for _ in iter_blinkit(args.keyword, args.pincode, workers=args.workers,
+                              profile=args.profile, mode=args.mode):
+            products += 1
+    finally:
+        elapsed = time.monotonic() - start
+        site.stop()
+        metrics_logger.removeHandler(collector)
+
+    result = report(collector.events, products, elapsed, site)
+    result["settings"] = vars(args)
+
+    print("\n📊 BENCHMARK")
+    for key, value in result.items():
+        if key != "settings":
+            print(f"{key}: {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"📄 Report written to {args.json}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -4,148 +4,568 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
-    NoSuchElementException,
     TimeoutException,
-    ElementClickInterceptedException
+    ElementClickInterceptedException,
+    WebDriverException,
 )
+import os
+import queue
+import threading
 import time
-import pandas as pd
+from collections import defaultdict
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-def get_product_name(driver):
-    """Extract product name from page title"""
-    title = driver.title or ""
-    if " Price" in title:
-        return title.split(" Price")[0].strip()
+from . import metrics
+from .checkpoint import FileCheckpoint, done_key
+from .config import ScrapeConfig
+from .driver_pool import get_pool
+from .governor import get_governor
+from .location_cache import LocationCache
+from .product_cache import PRODUCT_CACHE_PATH, ProductCache
+from .profiles import TrafficMeter, apply_profile, chrome_options, get_profile
+from .sinks import ExcelSink
+from .parser import (
+    OUT_OF_STOCK_MARKERS,
+    card_fingerprint,
+    parse_card,
+    parse_product_html,
+    parse_product_payload,
+)
+from .waits import (
+    Waiter,
+    listing_settled,
+    location_applied,
+    location_prompt_shown,
+    search_page_ready,
+    variant_rail_rendered,
+    wait_for_listing,
+)
+
+DRIVER_PATH = os.environ.get(
+    "CHROMEDRIVER_PATH",
+    "C:/Users/sivam/Downloads/chromedriver-win64/chromedriver-win64/chromedriver.exe",
+)
+
+# Point at a stand-in site (see scraper/fixture_site.py) for benchmarks and tests
+BASE_URL = os.environ.get("BLINKIT_BASE_URL", "https://www.blinkit.com").rstrip("/")
+SEARCH_URL = BASE_URL + "/s/?q={keyword}"
+CARDS_XPATH = '//div[@role="button" and contains(@class,"tw-relative tw-flex")]'
+LOCATION_INPUT_XPATH = '//input[@placeholder="search delivery location"]'
+
+# Link and text lines of every listing card, in listing order (url is null when a card has none)
+CARDS_JS = """
+var snap = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var out = [];
+for (var i = 0; i < snap.snapshotLength; i++) {
+    var card = snap.snapshotItem(i);
+    var a = card.closest('a[href]') || card.querySelector('a[href]');
+    var lines = card.innerText.split('\\n').map(function(l) { return l.trim(); })
+        .filter(function(l) { return l; });
+    out.push({url: a ? a.href : null, lines: lines});
+}
+return out;
+"""
+
+# Product link of one listing card element
+CARD_URL_JS = """
+var a = arguments[0].closest('a[href]') || arguments[0].querySelector('a[href]');
+return a ? a.href : null;
+"""
+
+# Everything scrape_product_page_data needs from a product page in one round-trip.
+# Only a boolean comes back for the page body, never the body text itself.
+PRODUCT_PAGE_JS = """
+var markers = arguments[0];
+function oos(text) {
+    text = (text || '').toLowerCase();
+    return markers.some(function(m) { return text.indexOf(m) !== -1; });
+}
+var h2 = document.querySelector('h2');
+var rail = document.getElementById('variant_horizontal_rail');
+var buttons = rail ? rail.querySelectorAll('div[role="button"][class*="tw-relative"]') : [];
+var variants = [];
+for (var i = 0; i < buttons.length; i++) {
+    var lines = buttons[i].innerText.split('\\n').map(function(l) { return l.trim(); })
+        .filter(function(l) { return l; });
+    variants.push({lines: lines, oos: oos(lines.join(' '))});
+}
+return {
+    title: document.title,
+    h2: h2 ? h2.innerText.trim() : null,
+    variants: variants,
+    main_oos: variants.length ? false : oos(document.body.innerText)
+};
+"""
+
+
+class ScrapeInterrupted(Exception):
+    """The scrape stopped early; products yielded so far are valid and a
+    retry with the same checkpoint picks up where it left off."""
+
+
+# Warm browser pool limits (per process / Celery worker)
+POOL_MAX_IDLE = 2
+POOL_MAX_PAGES = 200
+POOL_MAX_RSS_MB = 1500
+
+def scrape_product_page_data(driver, waiter=None):
+    """Scrape all product data from current page
+
+    One injected script returns a compact summary of the page; if it fails
+    the page source is fetched once and parsed in-process instead.
+    """
+    waiter = waiter or Waiter()
     try:
-        return driver.find_element(By.TAG_NAME, "h2").text.strip()
+        waiter.wait(driver, "product_page", EC.title_contains("Price"))
+        waiter.settle(driver, "variants", variant_rail_rendered())
+        with metrics.span("product_parse"):
+            try:
+                payload = driver.execute_script(PRODUCT_PAGE_JS, list(OUT_OF_STOCK_MARKERS))
+                return parse_product_payload(payload, url=driver.current_url)
+            except WebDriverException:
+                return parse_product_html(driver.page_source, url=driver.current_url)
     except:
         return None
 
-def scrape_product_variants(driver):
-    """Scrape available and out of stock variants from product page"""
-    data = {"available_variants": [], "out_of_stock_variants": []}
-    
-    try:
-        rail = driver.find_element(By.ID, "variant_horizontal_rail")
-        buttons = rail.find_elements(
-            By.XPATH, './/div[@role="button" and contains(@class,"tw-relative")]'
-        )
-    except NoSuchElementException:
-        buttons = []
-
-    if not buttons:
-        # No variants found - check main product stock status
-        body = driver.find_element(By.TAG_NAME, "body").text.lower()
-        if "out of stock" in body or "currently unavailable" in body:
-            data["out_of_stock_variants"].append("Main Product")
-        else:
-            data["available_variants"].append("Main Product")
+def create_driver(profile="full"):
+    """Start a new Chrome instance with the named launch profile"""
+    with metrics.span("driver_start", profile=profile):
+        profile = get_profile(profile)
+        # Without a chromedriver at DRIVER_PATH, let Selenium Manager find one
+        service = Service(DRIVER_PATH) if os.path.exists(DRIVER_PATH) else Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options(profile))
+        driver.set_page_load_timeout(60)
+        apply_profile(driver, profile)
+    return driver
+
+
+def driver_pool(profile="full"):
+    return get_pool(
+        lambda: create_driver(profile),
+        name=profile,
+        max_idle=POOL_MAX_IDLE,
+        max_pages=POOL_MAX_PAGES,
+        max_rss_mb=POOL_MAX_RSS_MB,
+    )
+
+
+class ScrapeContext:
+    """Per-call state shared by the scrape helpers"""
+
+    def __init__(self, config, on_progress=None, **fields):
+        self.config = config
+        self.profile = config.profile
+        self.on_progress = on_progress
+        self.fields = fields  # keyword, pincode, mode: added to every span log line
+        self.started = time.monotonic()
+        self.stage_times = defaultdict(list)
+        self._lock = threading.Lock()
+        self.stage = None
+        self.total = None
+        self.scraped = 0
+        self.resume = {"index": 0, "done_urls": set()}
+        self.pool = driver_pool(config.profile)
+        self.waiter = Waiter(config.timeouts)
+        self.locations = LocationCache()
+        self.traffic = TrafficMeter() if get_profile(config.profile)["measure_bytes"] else None
+        self.governor = get_governor()
+        self.products = ProductCache() if PRODUCT_CACHE_PATH != "off" else None
+
+    def navigate(self, driver):
+        """Call before every navigation (get, click, back) made with driver"""
+        if self.governor:
+            self.governor.wait()
+        self.pool.count_page(driver)
+        if self.traffic:
+            self.traffic.record(driver)  # bytes of the page we are leaving
+
+    @contextmanager
+    def span(self, stage):
+        """Time a stage of this scrape (see scraper.metrics)"""
+        start = time.monotonic()
+        try:
+            with metrics.span(stage, **self.fields):
+                yield
+        finally:
+            with self._lock:
+                self.stage_times[stage].append(time.monotonic() - start)
+
+    def stage_summary(self):
+        with self._lock:
+            return {
+                stage: {"count": len(times), "total_s": round(sum(times), 2), "avg_s": round(sum(times) / len(times), 2)}
+                for stage, times in self.stage_times.items()
+            }
+
+    def cached_product(self, url):
+        """Parsed result for url from the cross-keyword product cache, or None"""
+        if not (self.products and url):
+            return None
+        data = self.products.get(url, self.fields.get("pincode"))
+        metrics.inc("blinkit_product_cache_total", result="hit" if data else "miss")
         return data
 
-    # Process each variant button
-    for btn in buttons:
-        lines = btn.text.strip().splitlines()
-        # Find line with quantity/size info
-        name = next(
-            (l for l in lines if any(u in l.lower() for u in ("ml","g","kg","l","piece","pack"))),
-            lines[0] if lines else "Unknown"
-        ).strip()
-        
-        combined = " ".join(lines).lower()
-        if "out of stock" in combined or "currently unavailable" in combined:
-            data["out_of_stock_variants"].append(name)
+    def cache_product(self, url, data):
+        if self.products and url and data:
+            self.products.put(url, self.fields.get("pincode"), data)
+
+    def outcome(self, ok):
+        """Tell the governor whether a product page loaded or timed out/errored"""
+        if not ok:
+            metrics.inc("blinkit_product_failures_total")
+        metrics.event("product_outcome", ok=ok, **self.fields)
+        if self.governor:
+            if ok:
+                self.governor.success()
+            else:
+                self.governor.failure()
+
+    def done(self, driver):
+        if self.traffic:
+            self.traffic.record(driver)
+
+    def progress(self, stage, **info):
+        """Report a progress event to the on_progress callback, if any"""
+        self.stage = stage
+        if "total" in info:
+            self.total = info["total"]
+        if self.on_progress:
+            event = {"stage": stage, "scraped": self.scraped, "total": self.total}
+            event.update(info)
+            try:
+                self.on_progress(event)
+            except Exception as e:
+                print(f"⚠ Progress callback failed: {e}")
+
+
+def set_location(driver, pincode, waiter):
+    """Set delivery location to pincode with retries"""
+    print(f"📍 Setting location to {pincode}...")
+    for _ in range(3):
+        try:
+            inp = WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.XPATH, LOCATION_INPUT_XPATH))
+            )
+            inp.clear()
+            inp.send_keys(pincode)
+            sugg = WebDriverWait(driver, 20).until(
+                EC.element_to_be_clickable((By.CLASS_NAME, 'lcVvPT'))
+            )
+            sugg.click()
+            waiter.settle(driver, "location", location_applied(LOCATION_INPUT_XPATH, CARDS_XPATH))
+            break
+        except (TimeoutException, ElementClickInterceptedException):
+            print("⚠ Retrying location setting...")
+            metrics.inc("blinkit_retries_total", step="location")
+
+
+def export_site_state(driver):
+    """Cookies and localStorage of the current page, so another browser can reuse them"""
+    return {
+        "cookies": driver.get_cookies(),
+        "local_storage": driver.execute_script(
+            "var s = {}; for (var i = 0; i < localStorage.length; i++) {"
+            " var k = localStorage.key(i); s[k] = localStorage.getItem(k); } return s;"
+        ) or {},
+    }
+
+
+def apply_site_state(driver, state):
+    """Load cookies and localStorage captured by export_site_state into driver"""
+    driver.get(BASE_URL)
+    for cookie in state["cookies"]:
+        cookie = {k: v for k, v in cookie.items() if k != "sameSite"}
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            pass  # cookies for other domains are rejected
+    for key, value in state["local_storage"].items():
+        driver.execute_script("localStorage.setItem(arguments[0], arguments[1]);", key, value)
+
+
+def open_search(ctx, driver, keyword, pincode):
+    """Load the search page with the delivery location set.
+
+    A cached location state for the pincode is injected first; the UI flow
+    only runs on a cache miss or when the site asks for the location again.
+    """
+    print(f"🔍 Searching for '{keyword}'...")
+    ctx.progress("search")
+    state = ctx.locations.get(pincode)
+    if state:
+        apply_site_state(driver, state)
+    ctx.navigate(driver)
+    with ctx.span("search_load"):
+        driver.get(SEARCH_URL.format(keyword=keyword))
+
+    if state:
+        ctx.waiter.settle(driver, "location_check", search_page_ready(CARDS_XPATH, LOCATION_INPUT_XPATH))
+        if not location_prompt_shown(driver, LOCATION_INPUT_XPATH):
+            print(f"📍 Reusing cached location for {pincode}")
+            return
+        print("⚠ Cached location is stale, setting it again...")
+        ctx.locations.mark_stale(pincode)
+
+    ctx.progress("location")
+    with ctx.span("location_set"):
+        set_location(driver, pincode, ctx.waiter)
+    ctx.locations.put(pincode, export_site_state(driver))
+
+
+def wait_for_cards(ctx, driver):
+    """Wait for the first listing cards to finish rendering"""
+    with ctx.span("first_cards"):
+        wait_for_listing(ctx.waiter, driver, "cards", CARDS_XPATH)
+
+
+def collect_cards(ctx, driver):
+    """Scroll the listing to exhaustion and return card summaries in listing order"""
+    cards = []
+    seen = set()
+    stale_scrolls = 0
+    # Depth limit: no need to scroll past what the scrape will use
+    enough = None
+    if ctx.config.max_products is not None:
+        enough = ctx.config.max_products + len(ctx.resume["done_urls"])
+
+    while stale_scrolls < ctx.config.max_stale_scrolls:
+        new = 0
+        for card in driver.execute_script(CARDS_JS, CARDS_XPATH) or []:
+            key = card["url"] or "\n".join(card["lines"])
+            if key and key not in seen:
+                seen.add(key)
+                cards.append(card)
+                new += 1
+
+        if new:
+            stale_scrolls = 0
+            print(f"✅ Found {len(cards)} products")
         else:
-            data["available_variants"].append(name)
-    
-    return data
+            stale_scrolls += 1
+        if enough is not None and len(cards) >= enough:
+            break
 
-def scrape_product_page_data(driver):
-    """Scrape all product data from current page"""
-    try:
-        WebDriverWait(driver, 20).until(EC.title_contains("Price"))
-        time.sleep(3)
-        
-        name = get_product_name(driver)
-        if not name:
-            return None
-            
-        variants = scrape_product_variants(driver)
-        
-        return {
-            "product_name": name,
-            "available_variants": variants["available_variants"],
-            "out_of_stock_variants": variants["out_of_stock_variants"],
-            "url": driver.current_url
-        }
-    except:
-        return None
+        with ctx.span("scroll_batch"):
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            ctx.waiter.settle(driver, "scroll", listing_settled(CARDS_XPATH))
 
-def scrape_blinkit(keyword, pincode):
-    """Main scraping function"""
-    
-    # Setup Chrome driver
-    driver_path = "C:/Users/sivam/Downloads/chromedriver-win64/chromedriver-win64/chromedriver.exe"
-    service = Service(driver_path)
-    options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    
-    driver = webdriver.Chrome(service=service, options=options)
-    driver.set_page_load_timeout(60)
+    return cards
 
-    results = []
-    
+
+def collect_product_urls(ctx, driver):
+    """Product URLs of every listing card, in listing order"""
+    return [card["url"] for card in collect_cards(ctx, driver) if card["url"]]
+
+
+def scrape_listing(ctx, keyword, pincode):
+    """Fast availability sweep straight from the search cards, no product pages"""
+    with ctx.pool.driver() as driver:
+        open_search(ctx, driver, keyword, pincode)
+        wait_for_cards(ctx, driver)
+        ctx.progress("listing")
+        cards = collect_cards(ctx, driver)
+        ctx.done(driver)
+
+    ctx.progress("products", total=len(cards))
+    done = ctx.resume["done_urls"]
+    if done:
+        print(f"⏩ Resuming: skipping {len(done)} products already done")
+    for index, card in enumerate(cards):
+        data = parse_card(card)
+        if data:
+            # Cards without a product link keep an empty URL; they are told apart by name
+            data["url"] = data["url"] or ""
+            if done_key(data["url"], data["product_name"]) not in done:
+                yield index, data
+
+
+def iter_product_urls(ctx, urls, state, workers):
+    """Scrape product pages with `workers` pooled browsers.
+
+    Yields (index, result) in URL order as soon as each page (and every page
+    before it) is done; result is None where scraping failed.
+    """
+    finished = queue.Queue()
+    next_index = [0]
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker():
+        with ctx.pool.driver() as driver:
+            apply_site_state(driver, state)
+            while not stop.is_set():
+                with lock:
+                    i = next_index[0]
+                    next_index[0] += 1
+                if i >= len(urls):
+                    break
+                data = ctx.cached_product(urls[i])
+                if data:
+                    print(f"♻ Cached: {data['product_name']}")
+                    finished.put((i, data))
+                    continue
+                try:
+                    with ctx.span("product_page"):
+                        ctx.navigate(driver)
+                        driver.get(urls[i])
+                        data = scrape_product_page_data(driver, ctx.waiter)
+                except Exception as e:
+                    print(f"⚠ Error with product {i+1}: {str(e)}")
+                ctx.outcome(bool(data))
+                ctx.cache_product(urls[i], data)
+                if data:
+                    print(f"Name: {data['product_name']}")
+                else:
+                    print(f"⚠ Failed to scrape product {i+1}")
+                finished.put((i, data))
+            ctx.done(driver)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = [executor.submit(worker) for _ in range(min(workers, len(urls)))]
+    pending = {}
+    next_out = 0
     try:
-        # Load search page
-        print(f"🔍 Searching for '{keyword}'...")
-        driver.get(f"https://www.blinkit.com/s/?q={keyword}")
-        
-        # Set pincode with retries
-        print(f"📍 Setting location to {pincode}...")
-        for _ in range(3):
+        while next_out < len(urls):
+            if next_out in pending:
+                yield next_out, pending.pop(next_out)
+                next_out += 1
+                continue
             try:
-                inp = WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.XPATH, '//input[@placeholder="search delivery location"]'))
-                )
-                inp.clear()
-                inp.send_keys(pincode)
-                sugg = WebDriverWait(driver, 20).until(
-                    EC.element_to_be_clickable((By.CLASS_NAME, 'lcVvPT'))
-                )
-                sugg.click()
-                time.sleep(5)
-                break
-            except (TimeoutException, ElementClickInterceptedException):
-                print("⚠ Retrying location setting...")
-                time.sleep(3)
-
-        # Wait for initial product cards
-        cards_xpath = '//div[@role="button" and contains(@class,"tw-relative tw-flex")]'
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_all_elements_located((By.XPATH, cards_xpath))
-        )
-        # Give a short sleep then start clicking immediately
-        time.sleep(3)
-        # Start clicking products as they appear
-        index = 0
+                i, data = finished.get(timeout=1)
+            except queue.Empty:
+                if all(f.done() for f in futures) and finished.empty():
+                    break  # every worker exited early
+                continue
+            pending[i] = data
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+
+    if next_out < len(urls):
+        for future in futures:
+            future.result()  # re-raise the worker error that cut the run short
+
+
+def scrape_parallel(ctx, keyword, pincode, workers):
+    """Collect product URLs from the listing, then scrape them concurrently"""
+    with ctx.pool.sized(workers):  # keep every worker's browser warm for this scrape only
+        with ctx.pool.driver() as driver:
+            open_search(ctx, driver, keyword, pincode)
+
+            wait_for_cards(ctx, driver)
+            ctx.progress("listing")
+            urls = collect_product_urls(ctx, driver)
+            state = export_site_state(driver)
+            ctx.done(driver)
+
+        if not urls:
+            print("⚠ No product links on listing cards, falling back to click-through")
+            yield from scrape_serial(ctx, keyword, pincode)
+            return
+
+        indexed = [(i, url) for i, url in enumerate(urls) if url not in ctx.resume["done_urls"]]
+        if len(indexed) < len(urls):
+            print(f"⏩ Resuming: {len(urls) - len(indexed)} products already done")
+        limit = ctx.config.remaining(ctx.scraped)
+        if limit is not None:
+            indexed = indexed[:limit]
+
+        print(f"🚀 Scraping {len(indexed)} products with {workers} browsers...")
+        ctx.progress("products", total=len(urls))
+        todo = [url for _, url in indexed]
+        for j, data in iter_product_urls(ctx, todo, state, workers):
+            if data:
+                yield indexed[j][0], data
+
+
+def scrape_incremental(ctx, keyword, pincode, workers, previous, max_age):
+    """Revisit only new, changed or stale cards; carry the rest over from `previous`.
+
+    previous maps product URL -> {"card_hash", "scraped_at" (epoch), "result"}
+    from the last session for this keyword and pincode.
+    """
+    with ctx.pool.driver() as driver:
+        open_search(ctx, driver, keyword, pincode)
+        wait_for_cards(ctx, driver)
+        ctx.progress("listing")
+        cards = [card for card in collect_cards(ctx, driver) if card["url"]]
+        state = export_site_state(driver)
+        ctx.done(driver)
+
+    if not cards:
+        print("⚠ No product links on listing cards, falling back to click-through")
+        yield from scrape_serial(ctx, keyword, pincode)
+        return
+
+    now = time.time()
+    limit = ctx.config.remaining(ctx.scraped)
+    plan = []
+    to_visit = []
+    for index, card in enumerate(cards):
+        if limit is not None and len(plan) >= limit:
+            break
+        if card["url"] in ctx.resume["done_urls"]:
+            continue
+        card_hash = card_fingerprint(card)
+        prev = previous.get(card["url"])
+        if prev and prev["card_hash"] == card_hash and now - prev["scraped_at"] < max_age:
+            carried = dict(prev["result"], card_hash=card_hash, scraped_at=prev["scraped_at"], carried=True)
+            plan.append((index, card_hash, carried))
+        else:
+            plan.append((index, card_hash, None))
+            to_visit.append(card["url"])
+
+    print(f"♻ Carrying {len(plan) - len(to_visit)} unchanged products, visiting {len(to_visit)}")
+    ctx.progress("products", total=len(cards), carried=len(plan) - len(to_visit))
+    fresh = iter_product_urls(ctx, to_visit, state, workers) if to_visit else iter(())
+
+    for index, card_hash, carried in plan:
+        if carried is None:
+            _, data = next(fresh)
+            if data:
+                yield index, dict(data, card_hash=card_hash, scraped_at=now, carried=False)
+        else:
+            yield index, carried
+
+
+def scrape_serial(ctx, keyword, pincode):
+    """Click through listing cards one by one in a single browser"""
+    waiter = ctx.waiter
+
+    with ctx.pool.driver() as driver:
+        # Load search page with the delivery location set
+        open_search(ctx, driver, keyword, pincode)
+
+        # Wait for initial product cards to finish rendering
+        cards_xpath = CARDS_XPATH
+        wait_for_cards(ctx, driver)
+        ctx.progress("products")
+        # Start clicking products as they appear (past any checkpointed ones)
+        index = ctx.resume["index"]
+        if index:
+            print(f"⏩ Resuming from product {index+1}")
         consecutive_failures = 0
+        interrupted = False
         
-        while consecutive_failures < 5:  # Stop after 5 consecutive failures
+        max_failures = ctx.config.max_failures
+        while consecutive_failures < max_failures:  # Stop after too many consecutive failures
             # Find currently available cards
             cards = driver.find_elements(By.XPATH, cards_xpath)
             
             # If we've processed all current cards, scroll to load more
             if index >= len(cards):
                 print(f"🔄 Scrolling to load more products... (currently found {len(cards)})")
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(3)
+                with ctx.span("scroll_batch"):
+                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    waiter.settle(driver, "scroll", listing_settled(cards_xpath))
                 
                 # Check for new cards
                 new_cards = driver.find_elements(By.XPATH, cards_xpath)
                 if len(new_cards) == len(cards):
                     consecutive_failures += 1
-                    print(f"⚠ No new products loaded (attempt {consecutive_failures}/5)")
-                    time.sleep(2)
+                    print(f"⚠ No new products loaded (attempt {consecutive_failures}/{max_failures})")
                     continue
                 else:
                     consecutive_failures = 0
@@ -153,148 +573,209 @@ def scrape_blinkit(keyword, pincode):
                     print(f"✅ Found {len(cards)} total products")
             
             if index < len(cards):
+                data = None
+                current = index
                 try:
                     card = cards[index]
-                    print(f"🖱 Clicking product {index+1}")
-                    
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card)
-                    time.sleep(1.5)
-                    
-                    try:
-                        card.click()
-                    except:
-                        driver.execute_script("arguments[0].click();", card)
-                    
-                    time.sleep(4)
-
-                    # Scrape product data
-                    data = scrape_product_page_data(driver)
+                    url = driver.execute_script(CARD_URL_JS, card)
+                    data = ctx.cached_product(url)
                     if data:
-                        results.append(data)
-                        print(f"Name: {data['product_name']}")
-                        if data['available_variants']:
-                            print(f"Available Variants: {data['available_variants']}")
-                        if data['out_of_stock_variants']:
-                            print(f"Out of Stock Variants: {data['out_of_stock_variants']}")
+                        # Seen under another keyword moments ago: no need to open it
+                        print(f"♻ Cached product {index+1}: {data['product_name']}")
                     else:
-                        print(f"⚠ Failed to scrape product {index+1}")
-                    
-                    print("-" * 50)
+                        with ctx.span("product_cycle"):
+                            print(f"🖱 Clicking product {index+1}")
 
-                    # Go back to product list
-                    driver.back()
-                    try:
-                        WebDriverWait(driver, 30).until(
-                            EC.presence_of_all_elements_located((By.XPATH, cards_xpath))
-                        )
-                    except TimeoutException:
-                        print("⚠ Timeout going back, refreshing page...")
-                        driver.get(f"https://www.blinkit.com/s/?q={keyword}")
-                        WebDriverWait(driver, 30).until(
-                            EC.presence_of_all_elements_located((By.XPATH, cards_xpath))
-                        )
+                            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", card)
+
+                            ctx.navigate(driver)
+                            try:
+                                card.click()
+                            except:
+                                driver.execute_script("arguments[0].click();", card)
+
+
+                            # Scrape product data (waits for the product page itself)
+                            data = scrape_product_page_data(driver, waiter)
+                            ctx.outcome(bool(data))
+                            ctx.cache_product(url, data)
+                            if data:
+                                print(f"Name: {data['product_name']}")
+                                if data['available_variants']:
+                                    print(f"Available Variants: {data['available_variants']}")
+                                if data['out_of_stock_variants']:
+                                    print(f"Out of Stock Variants: {data['out_of_stock_variants']}")
+                            else:
+                                print(f"⚠ Failed to scrape product {index+1}")
+
+                            print("-" * 50)
+
+                            # Go back to product list
+                            ctx.navigate(driver)
+                            driver.back()
+                            try:
+                                wait_for_listing(waiter, driver, "back", cards_xpath)
+                            except TimeoutException:
+                                print("⚠ Timeout going back, refreshing page...")
+                                ctx.outcome(False)
+                                metrics.inc("blinkit_retries_total", step="back")
+                                with ctx.span("recovery"):
+                                    ctx.navigate(driver)
+                                    driver.get(SEARCH_URL.format(keyword=keyword))
+                                    wait_for_listing(waiter, driver, "recover", cards_xpath)
                     
-                    time.sleep(2)
                     index += 1
                     consecutive_failures = 0
 
                 except Exception as e:
                     print(f"⚠ Error with product {index+1}: {str(e)}")
+                    ctx.outcome(False)
                     index += 1
                     consecutive_failures += 1
                     
+                    metrics.inc("blinkit_retries_total", step="recover")
                     try:
-                        driver.get(f"https://www.blinkit.com/s/?q={keyword}")
-                        WebDriverWait(driver, 30).until(
-                            EC.presence_of_all_elements_located((By.XPATH, cards_xpath))
-                        )
-                        time.sleep(2)
+                        with ctx.span("recovery"):
+                            ctx.navigate(driver)
+                            driver.get(SEARCH_URL.format(keyword=keyword))
+                            wait_for_listing(waiter, driver, "recover", cards_xpath)
                     except:
                         print("❌ Failed to recover")
-                        break
+                        interrupted = True
+
+                # Hand the product out once the browser is back on the listing
+                if data:
+                    yield current, data
+                if interrupted:
+                    break
 
-        print(f"🏁 Finished scraping. Found {len(results)} products total.")
+        ctx.done(driver)
 
+    if interrupted:
+        raise ScrapeInterrupted(f"Lost the listing after product {index}; resume from the checkpoint")
+
+
+def iter_blinkit(keyword, pincode, config=None, previous=None, on_progress=None, checkpoint=None, **options):
+    """Yield product dicts one by one as they are scraped.
+
+    config is a ScrapeConfig; keyword options (workers=4, mode="listing", ...)
+    build one when it is not given. on_progress, if given, is called with
+    event dicts like {"stage": "products", "scraped": 12, "total": 40} as the
+    scrape moves through search, location, listing and product pages.
+
+    Passing previous (URL -> {"card_hash", "scraped_at", "result"} from the
+    last session) only opens product pages for new or changed cards, or ones
+    last visited more than config.max_age seconds ago.
+
+    checkpoint (e.g. a FileCheckpoint) records every product as it is yielded.
+    A scrape started with a checkpoint from an earlier, interrupted run skips
+    the listing positions / URLs already done and does not yield them again.
+    """
+    config = config or ScrapeConfig(**options)
+    ctx = ScrapeContext(config, on_progress, keyword=keyword, pincode=pincode, mode=config.mode)
+    if checkpoint:
+        ctx.resume = checkpoint.load()
+        ctx.scraped = len(ctx.resume["done_urls"])
+    if config.mode == "listing":
+        products = scrape_listing(ctx, keyword, pincode)
+    elif previous is not None:
+        products = scrape_incremental(ctx, keyword, pincode, config.workers, previous, config.max_age)
+    elif config.workers > 1:
+        products = scrape_parallel(ctx, keyword, pincode, config.workers)
+    else:
+        products = scrape_serial(ctx, keyword, pincode)
+
+    for index, data in products:
+        if checkpoint:
+            checkpoint.record(index, data)
+        ctx.scraped += 1
+        metrics.inc("blinkit_products_total", mode=config.mode)
+        ctx.progress("products")
+        yield data
+        if config.max_products is not None and ctx.scraped >= config.max_products:
+            print(f"🛑 Reached the limit of {config.max_products} products")
+            products.close()  # hands the browser back to the pool right away
+            break
+
+    elapsed = time.monotonic() - ctx.started
+    per_minute = round(ctx.scraped / elapsed * 60, 1) if elapsed else 0
+    metrics.REGISTRY.set("blinkit_products_per_minute", per_minute, mode=config.mode)
+    metrics.event("scrape_done", products=ctx.scraped, elapsed_s=round(elapsed, 1),
+                  products_per_minute=per_minute, **ctx.fields)
+    ctx.progress("done")
+    print(f"🏁 Finished scraping. Found {ctx.scraped} products total.")
+    print(f"🧹 Browser pool: {ctx.pool.stats()}")
+    print(f"⏱ Wait times: {ctx.waiter.summary()}")
+    print(f"⏱ Stage timings: {ctx.stage_summary()} ({per_minute} products/min)")
+    print(f"📍 Location cache: {ctx.locations.stats()}")
+    if ctx.traffic:
+        print(f"📶 Traffic: {ctx.traffic.summary()}")
+    if ctx.governor:
+        print(f"🚦 Request governor: {ctx.governor.stats()}")
+    if ctx.products:
+        print(f"♻ Product cache: {ctx.products.stats()}")
+
+
+def scrape_blinkit(keyword, pincode, config=None, sinks=None, previous=None, on_progress=None,
+                   checkpoint=None, **options):
+    """Main scraping function
+
+    Runs iter_blinkit (same config / keyword options, see ScrapeConfig) and
+    hands every product to each sink (see sinks.py: ExcelSink, CSVSink,
+    CallbackSink, or the Django app's SessionSink). Without sinks the
+    results go to blinkit_<keyword>.xlsx as before. Sinks are closed even
+    when the scrape fails, so partial results are kept.
+
+    With a checkpoint, results from the interrupted run come first and the
+    checkpoint is cleared once the scrape completes.
+
+    Returns the list of results when no sinks are given. Results handed to
+    sinks are not kept (memory stays flat however long the listing) and
+    None is returned.
+    """
+    keep = sinks is None
+    if sinks is None:
+        sinks = [ExcelSink(f"blinkit_{keyword}.xlsx")]
+
+    results = []
+    total = out_of_stock = 0
+    resumed = checkpoint.load()["results"] if checkpoint else []
+    items = iter_blinkit(keyword, pincode, config, previous=previous, on_progress=on_progress,
+                         checkpoint=checkpoint, **options)
+    try:
+        for item in chain(resumed, items):
+            total += 1
+            if item['out_of_stock_variants']:
+                out_of_stock += 1
+            if keep:
+                results.append(item)
+            for sink in sinks:
+                sink.write(item)
     finally:
-        print("🧹 Closing browser...")
-        driver.quit()
+        for sink in sinks:
+            sink.close()
+    if checkpoint:
+        checkpoint.clear()
 
-    # Save to professionally formatted Excel
-    if results:
-        # Prepare DataFrame with proper structure
-        excel_data = []
-        for item in results:
-            excel_data.append({
-                "Product Name": item["product_name"],
-                "Available Variants": "; ".join(item["available_variants"]) if item["available_variants"] else "",
-                "Out of Stock Variants": "; ".join(item["out_of_stock_variants"]) if item["out_of_stock_variants"] else "",
-                "URL": item["url"]
-            })
-        
-        df = pd.DataFrame(excel_data)
-        
-        # Save to Excel with professional formatting
-        excel_filename = f"blinkit_{keyword}.xlsx"
-        
-        with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Products', index=False)
-            
-            # Get the workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Products']
-            
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                
-                adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # Style the header row
-            from openpyxl.styles import Font, PatternFill, Alignment
-            
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            for cell in worksheet[1]:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-        
-        print(f"📄 Saved {len(results)} products to Excel: {excel_filename}")
-        
-        # Print summary
+    if total:
         print(f"\n📊 SUMMARY:")
-        print(f"Total products scraped: {len(results)}")
-        
+        print(f"Total products scraped: {total}")
+        print(f"Products with out-of-stock variants: {out_of_stock}")
+
         products_with_out_of_stock = [p for p in results if p['out_of_stock_variants']]
-        print(f"Products with out-of-stock variants: {len(products_with_out_of_stock)}")
-        
         if products_with_out_of_stock:
             print(f"\n🚫 OUT OF STOCK ITEMS:")
             for product in products_with_out_of_stock:
                 print(f"• {product['product_name']}: {', '.join(product['out_of_stock_variants'])}")
-                
-        print(f"\n✅ Professional Excel file ready: {excel_filename}")
-        print("📋 The file contains properly formatted columns and can be opened directly in Excel!")
-        
     else:
         print("❌ No products scraped")
 
-    return results
+    return results if keep else None
 
 if __name__ == "__main__":
     print("🛒 Blinkit Product Scraper - Excel Export")
     print("=" * 40)
+    print("Tip: python -m scraper.batch jobs.csv scrapes many keyword/pincode pairs into one report")
     
     # Check if required packages are installed
     try:
@@ -310,7 +791,9 @@ if __name__ == "__main__":
     
     print(f"\n🚀 Starting scrape for '{keyword}' in {pincode}...")
     
-    results = scrape_blinkit(keyword, pincode)
+    # Re-running after a crash continues from where the last run stopped
+    checkpoint = FileCheckpoint(f"blinkit_{keyword}_{pincode}.checkpoint.jsonl")
+    results = scrape_blinkit(keyword, pincode, checkpoint=checkpoint)
     
     print(f"\n✅ Scraping completed!")
     if results:
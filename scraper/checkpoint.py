@@ -0,0 +1,49 @@
+import json
+import os
+
+
+def done_key(url, name):
+    """What a resumed scrape matches finished products by: the product URL,
+    or the name for listing cards without a product link"""
+    return url or f"name:{name}"
+
+
+class FileCheckpoint:
+    """Append-only JSON-lines checkpoint of a scrape, one line per finished product.
+
+    Each line is {"index": listing index, "result": product dict}, flushed and
+    fsynced before the scraper moves on, so a crash loses at most the product
+    in flight. load() returns what a resumed scrape needs to skip done work.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        state = {"index": 0, "done_urls": set(), "results": []}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    state["index"] = max(state["index"], entry["index"] + 1)
+                    result = entry["result"]
+                    state["done_urls"].add(done_key(result["url"], result["product_name"]))
+                    state["results"].append(entry["result"])
+        except OSError:
+            pass
+        return state
+
+    def record(self, index, result):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"index": index, "result": result}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,56 @@
+from .profiles import get_profile
+from .waits import STEP_TIMEOUTS
+
+MODES = ("products", "listing")
+
+# Incremental scrapes still revisit unchanged products older than this (seconds)
+INCREMENTAL_MAX_AGE = 6 * 60 * 60
+
+
+class ScrapeConfig:
+    """Everything that shapes a scrape apart from keyword and pincode.
+
+    workers            browsers scraping product pages concurrently
+    profile            Chrome launch profile ("full" or "lean")
+    mode               "products" opens every product page, "listing" reads the cards only
+    max_products       stop after this many products (None: the whole listing)
+    max_failures       consecutive errors / empty scrolls before the click-through scrape gives up
+    max_stale_scrolls  scrolls without new cards before the listing counts as exhausted
+    timeouts           per-step wait overrides, e.g. {"product_page": 30} (see waits.STEP_TIMEOUTS)
+    max_age            incremental scrapes revisit unchanged products older than this (seconds)
+    """
+
+    def __init__(self, workers=1, profile="full", mode="products", max_products=None, max_failures=5,
+                 max_stale_scrolls=3, timeouts=None, max_age=INCREMENTAL_MAX_AGE):
+        get_profile(profile)  # raises ValueError for unknown profiles
+        if mode not in MODES:
+            raise ValueError(f"Unknown scrape mode '{mode}' (choose from {', '.join(MODES)})")
+        unknown = set(timeouts or {}) - set(STEP_TIMEOUTS)
+        if unknown:
+            raise ValueError(f"Unknown wait steps: {', '.join(sorted(unknown))}")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.workers = workers
+        self.profile = profile
+        self.mode = mode
+        self.max_products = max_products
+        self.max_failures = max_failures
+        self.max_stale_scrolls = max_stale_scrolls
+        self.timeouts = dict(timeouts or {})
+        self.max_age = max_age
+
+    def replace(self, **changes):
+        """Copy of this config with some fields changed"""
+        options = dict(vars(self), **changes)
+        return ScrapeConfig(**options)
+
+    def remaining(self, scraped):
+        """How many more products the depth limit allows (None: no limit)"""
+        if self.max_products is None:
+            return None
+        return max(self.max_products - scraped, 0)
+
+    def __repr__(self):
+        options = ", ".join(f"{k}={v!r}" for k, v in vars(self).items())
+        return f"ScrapeConfig({options})"
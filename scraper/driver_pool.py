@@ -0,0 +1,229 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+def _proc_rss_mb(pid):
+    """RSS of a single process from /proc, in MB (Linux fallback when psutil is missing)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+def _proc_children(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.extend(int(c) for c in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def driver_rss_mb(driver):
+    """Total resident memory of chromedriver plus every Chrome process under it"""
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return 0.0
+
+    if PSUTIL_AVAILABLE:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+    total, stack = 0.0, [pid]
+    while stack:
+        p = stack.pop()
+        total += _proc_rss_mb(p)
+        stack.extend(_proc_children(p))
+    return total
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.jobs = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """Keeps warm WebDriver instances around so scrapes skip browser cold start.
+
+    Drivers are handed out with ``with pool.driver() as driver:``. On the way
+    in a driver is health-checked, on the way out its cookies, storage and
+    extra tabs are cleared. A driver is recycled once it has loaded
+    ``max_pages`` pages or its process tree grows past ``max_rss_mb``.
+    """
+
+    def __init__(self, factory, max_idle=2, max_pages=200, max_rss_mb=1500):
+        self.factory = factory
+        self.max_idle = max_idle
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._idle = []
+        self._leased = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "recycled": 0, "unhealthy": 0, "created": 0}
+
+    @contextmanager
+    def driver(self):
+        entry = self._acquire()
+        try:
+            yield entry.driver
+        finally:
+            self._release(entry)
+
+    @contextmanager
+    def sized(self, max_idle):
+        """Keep up to max_idle drivers warm inside the block (e.g. one per parallel worker), then shrink back"""
+        with self._lock:
+            previous, self.max_idle = self.max_idle, max(self.max_idle, max_idle)
+        try:
+            yield self
+        finally:
+            extra = []
+            with self._lock:
+                self.max_idle = previous
+                while len(self._idle) > self.max_idle:
+                    extra.append(self._idle.pop(0))
+            for entry in extra:
+                self._quit(entry)
+
+    def count_page(self, driver, n=1):
+        """Record page loads against a leased driver (used for recycling)"""
+        entry = self._leased.get(id(driver))
+        if entry:
+            entry.pages += n
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["leased"] = len(self._leased)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups * 100, 2) if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._quit(entry)
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                break
+            if self._is_healthy(entry):
+                with self._lock:
+                    self._stats["hits"] += 1
+                    self._leased[id(entry.driver)] = entry
+                return entry
+            with self._lock:
+                self._stats["unhealthy"] += 1
+            self._quit(entry)
+
+        entry = _PooledDriver(self.factory())
+        with self._lock:
+            self._stats["misses"] += 1
+            self._stats["created"] += 1
+            self._leased[id(entry.driver)] = entry
+        return entry
+
+    def _release(self, entry):
+        with self._lock:
+            self._leased.pop(id(entry.driver), None)
+        entry.jobs += 1
+
+        if not self._is_healthy(entry) or not self._reset(entry):
+            with self._lock:
+                self._stats["unhealthy"] += 1
+            self._quit(entry)
+            return
+
+        if entry.pages >= self.max_pages or driver_rss_mb(entry.driver) >= self.max_rss_mb:
+            with self._lock:
+                self._stats["recycled"] += 1
+            print(f"♻ Recycling browser after {entry.pages} pages / {entry.jobs} jobs")
+            self._quit(entry)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(entry)
+                return
+        self._quit(entry)
+
+    def _is_healthy(self, entry):
+        try:
+            return bool(entry.driver.window_handles)
+        except Exception:
+            return False
+
+    def _reset(self, entry):
+        """Leave the driver as a blank single-tab browser with no site state"""
+        driver = entry.driver
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                pass  # about:blank and error pages have no storage
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(factory, name="default", **kwargs):
+    """Process-wide pool per name; forked Celery workers each get their own"""
+    key = (os.getpid(), name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = DriverPool(factory, **kwargs)
+            _pools[key] = pool
+    return pool
+
+
+@atexit.register
+def _close_pools():
+    for (pid, _), pool in list(_pools.items()):
+        if pid == os.getpid():
+            pool.close()
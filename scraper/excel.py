@@ -0,0 +1,86 @@
+"""Streaming .xlsx writer shared by the scraper sinks, the batch CLI and the
+Django exports.
+
+Built on openpyxl's write-only mode: rows go straight to a temp file per
+sheet, so memory stays flat however many rows are written. Column widths
+have to be known before the first row is written, so each sheet buffers
+its first WIDTH_SAMPLE_ROWS rows, sizes the columns from them and then
+streams everything else.
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+WIDTH_SAMPLE_ROWS = 200
+MAX_COLUMN_WIDTH = 50  # characters
+
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+
+
+def _width(value):
+    return len(str(value)) if value is not None else 0
+
+
+class StreamingSheet:
+    """One worksheet of a StreamingWorkbook; append() rows in column order"""
+
+    def __init__(self, worksheet, columns):
+        self.worksheet = worksheet
+        self.columns = list(columns)
+        self.widths = [_width(c) for c in self.columns]
+        self.rows = 0
+        self._sample = []
+
+    def append(self, row):
+        row = list(row)
+        self.rows += 1
+        if self._sample is None:
+            self.worksheet.append(row)
+            return
+        for i, value in enumerate(row[:len(self.widths)]):
+            self.widths[i] = max(self.widths[i], _width(value))
+        self._sample.append(row)
+        if len(self._sample) >= WIDTH_SAMPLE_ROWS:
+            self.flush()
+
+    def flush(self):
+        """Fix column widths from the rows seen so far and write the buffered rows"""
+        if self._sample is None:
+            return
+        for i, width in enumerate(self.widths):
+            self.worksheet.column_dimensions[get_column_letter(i + 1)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+        header = []
+        for name in self.columns:
+            cell = WriteOnlyCell(self.worksheet, value=name)
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+            cell.alignment = HEADER_ALIGNMENT
+            header.append(cell)
+        self.worksheet.append(header)
+
+        for row in self._sample:
+            self.worksheet.append(row)
+        self._sample = None
+
+
+class StreamingWorkbook:
+    """Write-only workbook with a styled header row and auto-sized columns per sheet"""
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        self.sheets = []
+
+    def add_sheet(self, title, columns):
+        sheet = StreamingSheet(self.workbook.create_sheet(title), columns)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self, target):
+        """Write the workbook to a path or binary file object"""
+        for sheet in self.sheets:
+            sheet.flush()
+        self.workbook.save(target)
@@ -0,0 +1,277 @@
+"""Local stand-in for blinkit.com, for benchmarks and regression runs.
+
+Serves Blinkit-shaped pages that the real scraper can drive unchanged:
+
+    /s/?q=<keyword>             search page: location picker with lcVvPT
+                                suggestions, then infinite-scroll cards
+    /api/cards?q=&offset=       next batch of cards (fetched on scroll)
+    /prn/<slug>/prid/<id>       product page with a variant_horizontal_rail
+
+Every response is delayed by latency (+ random jitter) and product pages
+fail with a 500 at failure_rate. Products are generated from the keyword
+and seed, so two runs with the same settings see the same catalogue.
+
+    python -m scraper.fixture_site --products 80 --latency 0.1 --failure-rate 0.05
+"""
+import argparse
+import html
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BRANDS = ["Amul", "Mother Dairy", "Nandini", "Akshayakalpa", "Heritage", "Country Delight", "Milky Mist"]
+SIZES = ["200 ml", "500 ml", "1 l", "100 g", "200 g", "400 g", "1 kg", "6 x 200 ml"]
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><head><title>Buy %(keyword)s online | Blinkit</title>
+<style>
+  .card { height: 220px; margin: 8px; border: 1px solid #ddd; }
+  #location-modal { position: fixed; top: 0; left: 0; right: 0; padding: 20px; background: #fff; z-index: 10; }
+  .lcVvPT { padding: 6px; cursor: pointer; }
+</style></head>
+<body>
+<div id="location-modal" style="display:none">
+  <input placeholder="search delivery location" autocomplete="off">
+  <div id="suggestions"></div>
+</div>
+<div id="cards"></div>
+<script>
+var keyword = %(keyword_json)s, pageSize = %(page_size)d, offset = 0, loading = false, done = false;
+
+function card(c) {
+  var lines = [c.eta, c.name, c.size, c.price, c.oos ? 'Out of Stock' : 'ADD'];
+  return '<a href="' + c.url + '"><div role="button" class="tw-relative tw-flex tw-flex-col card">' +
+    lines.map(function(l) { return '<div>' + l + '</div>'; }).join('') + '</div></a>';
+}
+
+function loadMore() {
+  if (loading || done) return;
+  loading = true;
+  fetch('/api/cards?q=' + encodeURIComponent(keyword) + '&offset=' + offset + '&limit=' + pageSize)
+    .then(function(r) { return r.json(); })
+    .then(function(batch) {
+      document.getElementById('cards').insertAdjacentHTML('beforeend', batch.map(card).join(''));
+      offset += batch.length;
+      done = batch.length < pageSize;
+      loading = false;
+    });
+}
+
+function located() {
+  return document.cookie.indexOf('gr_1_locality=') !== -1 || localStorage.getItem('location');
+}
+
+var modal = document.getElementById('location-modal');
+var input = modal.querySelector('input');
+input.addEventListener('input', function() {
+  var pin = input.value;
+  setTimeout(function() {
+    document.getElementById('suggestions').innerHTML =
+      '<div class="lcVvPT">' + pin + ', Stand-in City</div>';
+    document.querySelector('.lcVvPT').addEventListener('click', function() {
+      localStorage.setItem('location', pin);
+      document.cookie = 'gr_1_locality=' + pin + '; path=/';
+      modal.style.display = 'none';
+      loadMore();
+    });
+  }, 150);
+});
+
+if (located()) {
+  loadMore();
+} else {
+  modal.style.display = 'block';
+}
+
+window.addEventListener('scroll', function() {
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 300) loadMore();
+});
+</script>
+</body></html>
+"""
+
+PRODUCT_PAGE = """<!DOCTYPE html>
+<html><head><title>%(name)s Price - Buy Online at Best Price in India</title></head>
+<body>
+<h2>%(name)s</h2>
+<div id="variant_horizontal_rail">%(variants)s</div>
+</body></html>
+"""
+
+ERROR_PAGE = "<html><head><title>Something went wrong</title></head><body>Oops</body></html>"
+
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+class FixtureSite:
+    """Threaded HTTP server for the stand-in site; start() returns its base URL"""
+
+    def __init__(self, products=60, page_size=20, latency=0.05, jitter=0.05, failure_rate=0.0,
+                 oos_rate=0.2, seed=1, host="127.0.0.1", port=0):
+        self.products = products
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.oos_rate = oos_rate
+        self.seed = seed
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.failures = 0
+        self._catalogues = {}
+        self._by_id = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def catalogue(self, keyword):
+        """Deterministic product list for keyword"""
+        with self._lock:
+            if keyword not in self._catalogues:
+                rng = random.Random(f"{self.seed}:{keyword}")
+                base_id = zlib.crc32(keyword.encode("utf-8")) % 100000 * 1000
+                items = []
+                for i in range(self.products):
+                    name = f"{rng.choice(BRANDS)} {keyword.title()} {i + 1}"
+                    sizes = rng.sample(SIZES, rng.randint(1, 3))
+                    items.append({
+                        "id": base_id + i,
+                        "name": name,
+                        "url": f"/prn/{slugify(name)}/prid/{base_id + i}",
+                        "eta": f"{rng.randint(8, 20)} mins",
+                        "price": f"₹{rng.randint(20, 400)}",
+                        "variants": [
+                            {"size": size, "price": f"₹{rng.randint(20, 400)}", "oos": rng.random() < self.oos_rate}
+                            for size in sizes
+                        ],
+                    })
+                self._catalogues[keyword] = items
+                self._by_id.update((item["id"], item) for item in items)
+            return self._catalogues[keyword]
+
+    def product(self, product_id):
+        with self._lock:
+            return self._by_id.get(product_id)
+
+    def delay(self):
+        with self._lock:
+            self.requests += 1
+            extra = self._rng.uniform(0, self.jitter) if self.jitter else 0
+        time.sleep(self.latency + extra)
+
+    def should_fail(self):
+        with self._lock:
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                self.failures += 1
+                return True
+        return False
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send(self, status, body, content_type="text/html; charset=utf-8"):
+                body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                site.delay()
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+
+                if parts.path in ("/", ""):
+                    return self.send(200, "<html><head><title>Blinkit stand-in</title></head><body></body></html>")
+
+                if parts.path.rstrip("/") == "/s":
+                    keyword = query.get("q", [""])[0]
+                    return self.send(200, SEARCH_PAGE % {
+                        "keyword": html.escape(keyword),
+                        "keyword_json": json.dumps(keyword),
+                        "page_size": site.page_size,
+                    })
+
+                if parts.path == "/api/cards":
+                    keyword = query.get("q", [""])[0]
+                    offset = int(query.get("offset", ["0"])[0])
+                    limit = int(query.get("limit", [str(site.page_size)])[0])
+                    batch = []
+                    for item in site.catalogue(keyword)[offset:offset + limit]:
+                        first = item["variants"][0]
+                        batch.append({
+                            "url": item["url"], "name": item["name"], "eta": item["eta"],
+                            "size": first["size"], "price": first["price"], "oos": first["oos"],
+                        })
+                    return self.send(200, json.dumps(batch), "application/json")
+
+                match = re.match(r"^/prn/[^/]+/prid/(\d+)/?$", parts.path)
+                if match:
+                    item = site.product(int(match.group(1)))
+                    if item is None:
+                        return self.send(404, ERROR_PAGE)
+                    if site.should_fail():
+                        return self.send(500, ERROR_PAGE)
+                    variants = "".join(
+                        '<div role="button" class="tw-relative tw-flex">'
+                        f'<div>{v["size"]}</div><div>{v["price"]}</div>'
+                        + ("<div>Out of Stock</div>" if v["oos"] else "")
+                        + "</div>"
+                        for v in item["variants"]
+                    )
+                    return self.send(200, PRODUCT_PAGE % {"name": html.escape(item["name"]), "variants": variants})
+
+                return self.send(404, ERROR_PAGE)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def stats(self):
+        return {"requests": self.requests, "injected_failures": self.failures}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local Blinkit stand-in site")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--products", type=int, default=60)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of product pages answered with a 500")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    site = FixtureSite(products=args.products, page_size=args.page_size, latency=args.latency,
+                       jitter=args.jitter, failure_rate=args.failure_rate, seed=args.seed, port=args.port)
+    print(f"🧪 Blinkit stand-in running at {site.start()}  (BLINKIT_BASE_URL={site.base_url})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
@@ -0,0 +1,240 @@
+"""Shared request governor for all scraper workers.
+
+A token bucket that every worker consults before a navigation, so the fleet
+as a whole stays under one pages-per-second rate. It is off unless
+BLINKIT_GOVERNOR_URL names a backend that all workers can reach:
+
+    memory://                 one process only (also the fake used in tests)
+    sqlite:///path/to/file    every process on this machine
+    redis://host:6379/0       every machine
+
+BLINKIT_RATE_PER_MIN is the starting rate for the whole fleet, not per
+browser, so size it for all the parallel workers and batch jobs it covers.
+
+The rate adapts AIMD-style: it creeps up while pages keep loading and is
+cut back hard on timeouts and errors, at most once per cooldown so one bad
+burst does not collapse it to the floor.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Off by default: a shared cap would silently throttle parallel and batch scrapes
+GOVERNOR_URL = os.environ.get("BLINKIT_GOVERNOR_URL", "off")
+GOVERNOR_RATE_PER_MIN = float(os.environ.get("BLINKIT_RATE_PER_MIN", 60))
+
+# Rate limits and AIMD tuning, in pages per second
+MIN_RATE = 0.1
+MAX_RATE = 5.0
+BURST = 3
+INCREASE = 0.05         # added after every INCREASE_EVERY good pages, fleet-wide
+INCREASE_EVERY = 10
+DECREASE = 0.5          # rate multiplier on a timeout/error
+DECREASE_COOLDOWN = 30  # seconds between two cuts
+
+
+class MemoryBackend:
+    """Bucket state in a dict; shared by the threads of one process"""
+
+    def __init__(self):
+        self.states = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, fn):
+        """Atomically replace the state for key with fn(state)[0]; returns fn(state)[1]"""
+        with self._lock:
+            state, result = fn(self.states.get(key))
+            self.states[key] = state
+            return result
+
+
+class SQLiteBackend:
+    """Bucket state in a SQLite file; shared by every process on the machine"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, state TEXT NOT NULL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def update(self, key, fn):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")  # takes the write lock before reading
+        try:
+            row = conn.execute("SELECT state FROM buckets WHERE key = ?", (key,)).fetchone()
+            state, result = fn(json.loads(row[0]) if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, state) VALUES (?, ?)", (key, json.dumps(state))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+
+class RedisBackend:
+    """Bucket state in Redis; shared by every machine. Takes a URL or a client
+    (e.g. a fakeredis instance)."""
+
+    def __init__(self, url=None, client=None):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("The redis governor backend needs: pip install redis")
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def update(self, key, fn):
+        key = f"blinkit:governor:{key}"
+        out = {}
+
+        def txn(pipe):
+            raw = pipe.get(key)
+            state, out["result"] = fn(json.loads(raw) if raw else None)
+            pipe.multi()
+            pipe.set(key, json.dumps(state))
+
+        # WATCH/MULTI: re-runs txn if another worker changed the key meanwhile
+        self.client.transaction(txn, key)
+        return out["result"]
+
+
+def backend_from_url(url):
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unknown governor backend '{url}' (use memory://, sqlite:///path or redis://host)")
+
+
+class Governor:
+    """Fleet-wide token bucket with an adaptive rate (pages per second)"""
+
+    def __init__(self, backend, key="blinkit.com", rate=1.0, min_rate=MIN_RATE, max_rate=MAX_RATE,
+                 burst=BURST):
+        self.backend = backend
+        self.key = key
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.waits = 0
+        self.waited = 0.0
+        self.successes = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _state(self, state, now):
+        if state is None:
+            state = {"rate": self.initial_rate, "tokens": self.burst, "updated": now,
+                     "good": 0, "cut_at": 0}
+        # Refill for the time since the last update
+        state["tokens"] = min(self.burst, state["tokens"] + (now - state["updated"]) * state["rate"])
+        state["updated"] = now
+        return state
+
+    def _take(self, state):
+        state = self._state(state, time.time())
+        if state["tokens"] >= 1:
+            state["tokens"] -= 1
+            return state, 0
+        return state, (1 - state["tokens"]) / state["rate"]
+
+    def wait(self):
+        """Block until the fleet may make one more request"""
+        waited = 0.0
+        while True:
+            delay = self.backend.update(self.key, self._take)
+            if not delay:
+                break
+            delay = min(delay, 1.0)  # re-check: the rate may have changed meanwhile
+            time.sleep(delay)
+            waited += delay
+        if waited:
+            with self._lock:
+                self.waits += 1
+                self.waited += waited
+
+    def success(self):
+        """A page loaded fine; every INCREASE_EVERY of these raise the rate a bit"""
+        def fn(state):
+            state = self._state(state, time.time())
+            state["good"] += 1
+            if state["good"] >= INCREASE_EVERY:
+                state["good"] = 0
+                state["rate"] = min(self.max_rate, state["rate"] + INCREASE)
+            return state, None
+
+        with self._lock:
+            self.successes += 1
+        self.backend.update(self.key, fn)
+
+    def failure(self):
+        """A page timed out or errored; cut the rate unless it was cut just now"""
+        def fn(state):
+            now = time.time()
+            state = self._state(state, now)
+            state["good"] = 0
+            if now - state["cut_at"] >= DECREASE_COOLDOWN:
+                state["cut_at"] = now
+                state["rate"] = max(self.min_rate, state["rate"] * DECREASE)
+            return state, None
+
+        with self._lock:
+            self.failures += 1
+        self.backend.update(self.key, fn)
+
+    def current_rate(self):
+        """Pages per second the fleet is currently allowed"""
+        def fn(state):
+            state = self._state(state, time.time())
+            return state, state["rate"]
+
+        return self.backend.update(self.key, fn)
+
+    def stats(self):
+        rate = self.current_rate()
+        with self._lock:
+            return {
+                "rate_per_min": round(rate * 60, 1),
+                "waits": self.waits,
+                "waited_s": round(self.waited, 2),
+                "successes": self.successes,
+                "failures": self.failures,
+            }
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(url=GOVERNOR_URL, rate_per_min=GOVERNOR_RATE_PER_MIN):
+    """Per-process Governor for url (set BLINKIT_GOVERNOR_URL=off to disable)"""
+    if not url or url == "off":
+        return None
+    key = (os.getpid(), url)
+    with _governors_lock:
+        if key not in _governors:
+            _governors[key] = Governor(backend_from_url(url), rate=rate_per_min / 60)
+        return _governors[key]
@@ -0,0 +1,66 @@
+import json
+import os
+import re
+import tempfile
+import time
+
+LOCATION_CACHE_DIR = os.environ.get(
+    "BLINKIT_LOCATION_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".blinkit_scraper", "locations"),
+)
+LOCATION_CACHE_TTL = int(os.environ.get("BLINKIT_LOCATION_CACHE_TTL", 6 * 60 * 60))  # seconds
+
+
+class LocationCache:
+    """Delivery-location cookies/localStorage per pincode, stored as JSON files with a TTL"""
+
+    def __init__(self, directory=LOCATION_CACHE_DIR, ttl=LOCATION_CACHE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def _path(self, pincode):
+        safe = re.sub(r"[^0-9A-Za-z_-]", "_", str(pincode))
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def get(self, pincode):
+        try:
+            with open(self._path(pincode), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if time.time() - entry.get("saved_at", 0) > self.ttl:
+            self.misses += 1
+            self.invalidate(pincode)
+            return None
+
+        self.hits += 1
+        return entry["state"]
+
+    def put(self, pincode, state):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temp file and rename so concurrent workers never read half a file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"pincode": pincode, "saved_at": time.time(), "state": state}, f)
+        os.replace(tmp, self._path(pincode))
+
+    def invalidate(self, pincode):
+        """Drop a cached state, e.g. when the site asked for the location again"""
+        try:
+            os.remove(self._path(pincode))
+        except OSError:
+            pass
+
+    def mark_stale(self, pincode):
+        self.stale += 1
+        self.hits -= 1
+        self.misses += 1
+        self.invalidate(pincode)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale}
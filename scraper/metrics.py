@@ -0,0 +1,168 @@
+"""In-process timing spans, counters and histograms for the scraper.
+
+Every span is observed into a per-stage histogram and written as a JSON line
+to the "scraper.metrics" logger. REGISTRY.render() gives the Prometheus text
+format. Scrapes run in Celery workers, so each worker process saves
+REGISTRY.dump() to the DB after every task and the Django app's /metrics/
+merges those dumps.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger("scraper.metrics")
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, float("inf"))
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _label_text(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms keyed by name + labels; thread-safe"""
+
+    def __init__(self):
+        self.counters = defaultdict(float)
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, n=1, **labels):
+        with self._lock:
+            self.counters[(name, _label_key(labels))] += n
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            key = (name, _label_key(labels))
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def span(self, stage, **fields):
+        """Time a block as one stage; fields only go to the log line, not the labels"""
+        start = time.monotonic()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            duration = time.monotonic() - start
+            self.observe("blinkit_stage_seconds", duration, stage=stage, outcome=outcome)
+            event(
+                "span", stage=stage, outcome=outcome, duration_s=round(duration, 3),
+                thread=threading.current_thread().name, **fields
+            )
+
+    def snapshot(self):
+        """Plain-dict view, e.g. for a JSON endpoint or a test"""
+        with self._lock:
+            return {
+                "counters": {f"{n}{_label_text(k)}": v for (n, k), v in self.counters.items()},
+                "gauges": {f"{n}{_label_text(k)}": v for (n, k), v in self.gauges.items()},
+                "histograms": {
+                    f"{n}{_label_text(k)}": {"count": h.count, "sum_s": round(h.sum, 3)}
+                    for (n, k), h in self.histograms.items()
+                },
+            }
+
+    def dump(self):
+        """Raw state, JSON-serializable, for merge() in another process"""
+        with self._lock:
+            return {
+                "counters": [[n, dict(k), v] for (n, k), v in self.counters.items()],
+                "gauges": [[n, dict(k), v] for (n, k), v in self.gauges.items()],
+                "histograms": [
+                    [n, dict(k), list(h.counts), h.count, h.sum] for (n, k), h in self.histograms.items()
+                ],
+            }
+
+    def merge(self, state):
+        """Add another registry's dump() to this one: counters and histograms add up, gauges are overwritten"""
+        with self._lock:
+            for name, labels, value in state.get("counters", []):
+                self.counters[(name, _label_key(labels))] += value
+            for name, labels, value in state.get("gauges", []):
+                self.gauges[(name, _label_key(labels))] = value
+            for name, labels, counts, count, total in state.get("histograms", []):
+                key = (name, _label_key(labels))
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram()
+                h = self.histograms[key]
+                h.counts = [a + b for a, b in zip(h.counts, counts)]
+                h.count += count
+                h.sum += total
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for (name, key), value in sorted(self.counters.items()):
+                lines.append(f"{name}{_label_text(key)} {value}")
+            for (name, key), value in sorted(self.gauges.items()):
+                lines.append(f"{name}{_label_text(key)} {value}")
+            for (name, key), h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else bound
+                    lines.append(f"{name}_bucket{_label_text(key, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(key)} {h.sum}")
+                lines.append(f"{name}_count{_label_text(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def event(name, **fields):
+    """One structured log line: {"event": name, ...}"""
+    logger.info(json.dumps(dict(event=name, ts=round(time.time(), 3), **fields), default=str))
+
+
+def span(stage, **fields):
+    return REGISTRY.span(stage, **fields)
+
+
+def inc(name, n=1, **labels):
+    REGISTRY.inc(name, n, **labels)
@@ -0,0 +1,167 @@
+"""Browser-free parsing of Blinkit product pages.
+
+Works on a page_source string handed over by Selenium or on saved HTML
+files, and returns the same dict as scrape_product_page_data.
+"""
+import hashlib
+import re
+import sys
+import time
+
+from lxml import etree, html as lxml_html
+
+SIZE_UNITS = ("ml", "g", "kg", "l", "piece", "pack")
+OUT_OF_STOCK_MARKERS = ("out of stock", "currently unavailable")
+
+VARIANT_BUTTONS_XPATH = (
+    '//*[@id="variant_horizontal_rail"]'
+    '//div[@role="button" and contains(@class,"tw-relative")]'
+)
+
+
+def is_out_of_stock(text):
+    text = text.lower()
+    return any(marker in text for marker in OUT_OF_STOCK_MARKERS)
+
+
+def variant_name(lines):
+    """Pick the line carrying quantity/size info, else the first line"""
+    return next(
+        (l for l in lines if any(u in l.lower() for u in SIZE_UNITS)),
+        lines[0] if lines else "Unknown"
+    ).strip()
+
+
+# Card lines that are never the product name or its pack size
+CARD_NOISE_RE = re.compile(
+    r"^(\d+\s*mins?|add|₹.*|\d+%\s*off|out of stock|currently unavailable|notify me)$",
+    re.IGNORECASE,
+)
+CARD_SIZE_RE = re.compile(
+    r"^\d+(\.\d+)?\s*(x\s*\d+(\.\d+)?\s*)?(ml|g|gm|kg|l|ltr|litre|pc|pcs|piece|pieces|pack|units?)\b",
+    re.IGNORECASE,
+)
+
+
+ETA_RE = re.compile(r"^\d+\s*mins?$", re.IGNORECASE)
+
+
+def card_fingerprint(card):
+    """Hash of a listing card's text, ignoring the delivery ETA that changes every visit"""
+    lines = [l for l in card.get("lines") or [] if not ETA_RE.match(l)]
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def parse_card(card):
+    """Product dict from a listing card summary {"url", "lines"}, without opening the product page"""
+    lines = card.get("lines") or []
+    text_lines = [l for l in lines if not CARD_NOISE_RE.match(l)]
+    size = next((l for l in text_lines if CARD_SIZE_RE.match(l)), None)
+    names = [l for l in text_lines if l != size]
+    if not names:
+        return None
+
+    variant = size or "Main Product"
+    oos = is_out_of_stock(" ".join(lines))
+    return {
+        "product_name": max(names, key=len),
+        "available_variants": [] if oos else [variant],
+        "out_of_stock_variants": [variant] if oos else [],
+        "url": card.get("url"),
+    }
+
+
+def name_from_title(title):
+    title = title or ""
+    if " Price" in title:
+        return title.split(" Price")[0].strip()
+    return None
+
+
+def _lines(element):
+    return [t.strip() for t in element.itertext() if t.strip()]
+
+
+def parse_product_payload(payload, url=None):
+    """Build the product dict from the compact page summary.
+
+    payload = {"title", "h2", "variants": [{"lines": [...], "oos": bool}], "main_oos"}
+    as produced by PRODUCT_PAGE_JS in the browser or by product_payload_from_html.
+    """
+    name = name_from_title(payload.get("title")) or (payload.get("h2") or "").strip() or None
+    if not name:
+        return None
+
+    data = {"available_variants": [], "out_of_stock_variants": []}
+    variants = payload.get("variants") or []
+
+    if not variants:
+        key = "out_of_stock_variants" if payload.get("main_oos") else "available_variants"
+        data[key].append("Main Product")
+    else:
+        for variant in variants:
+            key = "out_of_stock_variants" if variant["oos"] else "available_variants"
+            data[key].append(variant_name(variant["lines"]))
+
+    return {
+        "product_name": name,
+        "available_variants": data["available_variants"],
+        "out_of_stock_variants": data["out_of_stock_variants"],
+        "url": url,
+    }
+
+
+def product_payload_from_html(page_source):
+    """Same summary PRODUCT_PAGE_JS returns, computed from raw HTML"""
+    tree = lxml_html.fromstring(page_source)
+    etree.strip_elements(tree, "script", "style", "noscript", with_tail=False)
+
+    h2 = tree.xpath("//h2")
+    variants = []
+    for btn in tree.xpath(VARIANT_BUTTONS_XPATH):
+        lines = _lines(btn)
+        variants.append({"lines": lines, "oos": is_out_of_stock(" ".join(lines))})
+
+    main_oos = False
+    if not variants:
+        body = tree.find(".//body")
+        main_oos = is_out_of_stock(body.text_content() if body is not None else "")
+
+    return {
+        "title": tree.findtext(".//title"),
+        "h2": h2[0].text_content().strip() if h2 else None,
+        "variants": variants,
+        "main_oos": main_oos,
+    }
+
+
+def parse_product_html(page_source, url=None):
+    """Extract name and variant availability from product page HTML"""
+    return parse_product_payload(product_payload_from_html(page_source), url=url)
+
+
+def parse_product_file(path, url=None):
+    with open(path, encoding="utf-8") as f:
+        return parse_product_html(f.read(), url=url or path)
+
+
+if __name__ == "__main__":
+    # Offline parse/benchmark: python -m scraper.parser page1.html page2.html ...
+    paths = sys.argv[1:]
+    if not paths:
+        print("Usage: python -m scraper.parser <saved_product_page.html> ...")
+        sys.exit(1)
+
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append((path, f.read()))
+
+    start = time.perf_counter()
+    parsed = [parse_product_html(source, url=path) for path, source in pages]
+    elapsed = time.perf_counter() - start
+
+    for item in parsed:
+        print(item)
+    rate = len(pages) / elapsed if elapsed else float("inf")
+    print(f"\n⚡ Parsed {len(pages)} pages in {elapsed:.3f}s ({rate:.0f} pages/s)")
@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+PRODUCT_CACHE_PATH = os.environ.get(
+    "BLINKIT_PRODUCT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".blinkit_scraper", "products.sqlite3"),
+)
+PRODUCT_CACHE_TTL = int(os.environ.get("BLINKIT_PRODUCT_CACHE_TTL", 30 * 60))  # seconds
+PRODUCT_CACHE_SIZE = int(os.environ.get("BLINKIT_PRODUCT_CACHE_SIZE", 5000))  # entries
+
+
+def canonical_url(url):
+    """Product URL without scheme/www/query/fragment differences"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"https://{host}{parts.path.rstrip('/')}"
+
+
+class ProductCache:
+    """Parsed product pages per (canonical URL, pincode), shared across keywords and processes.
+
+    Entries expire after ttl seconds; past max_entries the least recently
+    used ones are evicted.
+    """
+
+    def __init__(self, path=PRODUCT_CACHE_PATH, ttl=PRODUCT_CACHE_TTL, max_entries=PRODUCT_CACHE_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            " url TEXT NOT NULL, pincode TEXT NOT NULL, result TEXT NOT NULL,"
+            " saved_at REAL NOT NULL, used_at REAL NOT NULL,"
+            " PRIMARY KEY (url, pincode))"
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS products_used_at ON products (used_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, stat):
+        with self._lock:
+            setattr(self, stat, getattr(self, stat) + 1)
+
+    def get(self, url, pincode):
+        """Cached result dict for url in pincode, or None"""
+        if not url:
+            return None
+        key = (canonical_url(url), str(pincode))
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT result, saved_at FROM products WHERE url = ? AND pincode = ?", key
+        ).fetchone()
+        now = time.time()
+        if row and now - row[1] > self.ttl:
+            conn.execute("DELETE FROM products WHERE url = ? AND pincode = ?", key)
+            self._count("expired")
+            row = None
+        if not row:
+            self._count("misses")
+            return None
+
+        conn.execute("UPDATE products SET used_at = ? WHERE url = ? AND pincode = ?", (now,) + key)
+        self._count("hits")
+        return dict(json.loads(row[0]), url=url)
+
+    def put(self, url, pincode, result):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO products (url, pincode, result, saved_at, used_at) VALUES (?, ?, ?, ?, ?)",
+            (canonical_url(url), str(pincode), json.dumps(result), now, now),
+        )
+        # Evict least recently used entries past the size bound
+        evicted = conn.execute(
+            "DELETE FROM products WHERE rowid IN ("
+            " SELECT rowid FROM products ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        if evicted > 0:
+            with self._lock:
+                self.evicted += evicted
+
+    def clear(self):
+        self._conn().execute("DELETE FROM products")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0.0,  # percent, like DriverPool.stats
+            }
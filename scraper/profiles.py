@@ -0,0 +1,137 @@
+"""Named Chrome launch profiles for the scraper.
+
+"full" is the original maximized, headed browser. "lean" runs headless,
+blocks images/media/fonts and third-party trackers through CDP and
+measures bytes downloaded per page.
+"""
+import json
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+BLOCKED_RESOURCE_PATTERNS = [
+    # images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # media
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8", "*.ts",
+]
+
+BLOCKED_THIRD_PARTY_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*facebook.net*",
+    "*facebook.com/tr*",
+    "*clarity.ms*",
+    "*hotjar.com*",
+    "*branch.io*",
+    "*appsflyer.com*",
+    "*mixpanel.com*",
+    "*segment.io*",
+    "*sentry.io*",
+    "*newrelic.com*",
+    "*nr-data.net*",
+]
+
+PROFILES = {
+    "full": {
+        "arguments": [
+            "--start-maximized",
+            "--disable-blink-features=AutomationControlled",
+        ],
+        "prefs": {},
+        "blocked_urls": [],
+        "measure_bytes": False,
+    },
+    "lean": {
+        "arguments": [
+            "--headless=new",
+            "--window-size=1366,900",
+            "--disable-blink-features=AutomationControlled",
+            "--disable-gpu",
+            "--disable-extensions",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--disable-translate",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-features=Translate,OptimizationHints,MediaRouter,InterestFeedContentSuggestions",
+            "--no-first-run",
+            "--mute-audio",
+            "--blink-settings=imagesEnabled=false",
+        ],
+        "prefs": {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.geolocation": 2,
+        },
+        "blocked_urls": BLOCKED_RESOURCE_PATTERNS + BLOCKED_THIRD_PARTY_PATTERNS,
+        "measure_bytes": True,
+    },
+}
+
+
+def get_profile(name):
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown scrape profile '{name}' (choose from {', '.join(PROFILES)})")
+
+
+def chrome_options(profile):
+    options = webdriver.ChromeOptions()
+    for arg in profile["arguments"]:
+        options.add_argument(arg)
+    if profile["prefs"]:
+        options.add_experimental_option("prefs", profile["prefs"])
+    if profile["measure_bytes"]:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def apply_profile(driver, profile):
+    """Post-launch CDP setup: block requests matching the profile's URL patterns"""
+    if profile["blocked_urls"]:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["blocked_urls"]})
+
+
+class TrafficMeter:
+    """Bytes downloaded per page, read from Chrome's performance log"""
+
+    def __init__(self):
+        self.pages = []
+
+    def record(self, driver):
+        """Drain the log and book everything since the last call as one page"""
+        try:
+            entries = driver.get_log("performance")
+        except WebDriverException:
+            return None
+
+        total = 0
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            if message.get("method") == "Network.loadingFinished":
+                total += message["params"].get("encodedDataLength", 0)
+
+        if entries:
+            self.pages.append(total)
+        return total
+
+    def summary(self):
+        if not self.pages:
+            return {"pages": 0, "total_kb": 0, "avg_kb_per_page": 0}
+        total = sum(self.pages)
+        return {
+            "pages": len(self.pages),
+            "total_kb": round(total / 1024, 1),
+            "avg_kb_per_page": round(total / len(self.pages) / 1024, 1),
+        }
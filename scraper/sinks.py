@@ -0,0 +1,79 @@
+"""Output sinks for scrape_blinkit.
+
+A sink gets every product dict through write() as soon as it is scraped and
+close() once the scrape ends (also when it fails, so partial results land).
+The Django app adds its own database sink (scraper_app.pipeline.SessionSink).
+"""
+import csv
+
+EXPORT_COLUMNS = ["Product Name", "Available Variants", "Out of Stock Variants", "URL"]
+
+
+def export_row(item):
+    """Spreadsheet row for a product dict, in EXPORT_COLUMNS order"""
+    return [
+        item["product_name"],
+        "; ".join(item["available_variants"]) if item["available_variants"] else "",
+        "; ".join(item["out_of_stock_variants"]) if item["out_of_stock_variants"] else "",
+        item["url"],
+    ]
+
+
+class ExcelSink:
+    """Formatted .xlsx workbook, streamed to disk as products arrive"""
+
+    def __init__(self, path):
+        self.path = path
+        self.workbook = None
+        self.sheet = None
+
+    def write(self, item):
+        if self.workbook is None:
+            from .excel import StreamingWorkbook
+            self.workbook = StreamingWorkbook()
+            self.sheet = self.workbook.add_sheet("Products", EXPORT_COLUMNS)
+        self.sheet.append(export_row(item))
+
+    def close(self):
+        if self.workbook is None:
+            return
+        self.workbook.save(self.path)
+        print(f"📄 Saved {self.sheet.rows} products to Excel: {self.path}")
+        self.workbook = self.sheet = None
+
+
+class CSVSink:
+    """CSV file written row by row as products arrive"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, item):
+        if self._writer is None:
+            self._file = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(EXPORT_COLUMNS)
+        self._writer.writerow(export_row(item))
+        self.count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = self._writer = None
+            print(f"📄 Saved {self.count} products to CSV: {self.path}")
+
+
+class CallbackSink:
+    """Calls fn(product) for every product"""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def write(self, item):
+        self.fn(item)
+
+    def close(self):
+        pass
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from . import metrics
+
+# Default timeout (seconds) per wait step; callers can override per call
+STEP_TIMEOUTS = {
+    "location": 15,
+    "location_check": 15,
+    "cards": 30,
+    "scroll": 8,
+    "product_page": 20,
+    "variants": 8,
+    "back": 30,
+    "recover": 30,
+}
+
+# Installs a MutationObserver and fetch/XHR in-flight counter once per document,
+# then reports how long the DOM has been quiet and how many requests are pending.
+PAGE_ACTIVITY_JS = """
+var w = window;
+if (!w.__scrapeActivity) {
+    var act = w.__scrapeActivity = {last: Date.now(), inflight: 0};
+    new MutationObserver(function() { act.last = Date.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+    if (w.fetch) {
+        var origFetch = w.fetch;
+        w.fetch = function() {
+            act.inflight++;
+            return origFetch.apply(this, arguments).finally(function() { act.inflight--; act.last = Date.now(); });
+        };
+    }
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        act.inflight++;
+        this.addEventListener('loadend', function() { act.inflight--; act.last = Date.now(); });
+        return origSend.apply(this, arguments);
+    };
+}
+return {
+    quiet_ms: Date.now() - w.__scrapeActivity.last,
+    inflight: w.__scrapeActivity.inflight,
+    ready: document.readyState
+};
+"""
+
+
+def page_activity(driver):
+    try:
+        return driver.execute_script(PAGE_ACTIVITY_JS)
+    except WebDriverException:
+        return None
+
+
+def dom_quiet(quiet_ms=500):
+    """No DOM mutations for quiet_ms"""
+    def condition(driver):
+        act = page_activity(driver)
+        return bool(act) and act["quiet_ms"] >= quiet_ms
+    return condition
+
+
+def card_count_settled(cards_xpath, quiet_ms=500, until_growth=False):
+    """Listing cards are present and their count has not changed for quiet_ms; returns the count.
+
+    Only the card count is watched, not the network or the whole DOM, which
+    beacons, polling and carousels can keep busy for good. With until_growth
+    the wait also ends as soon as the count goes up (a scroll loaded more).
+    """
+    seen = {}
+
+    def condition(driver):
+        count = len(driver.find_elements(By.XPATH, cards_xpath))
+        now = time.monotonic()
+        if seen.get("count") != count:
+            grew = "count" in seen and count > seen["count"]
+            seen.update(count=count, since=now)
+            return count if until_growth and grew else False
+        return count if count and now - seen["since"] >= quiet_ms / 1000 else False
+    return condition
+
+
+def cards_stable(cards_xpath, quiet_ms=500):
+    """Listing cards are present and have stopped arriving; returns the card count"""
+    return card_count_settled(cards_xpath, quiet_ms)
+
+
+def wait_for_listing(waiter, driver, step, cards_xpath, quiet_ms=500, timeout=None):
+    """Wait for listing cards to finish rendering; returns the card count.
+
+    If cards keep arriving until the timeout (e.g. a carousel that keeps
+    inserting them) the wait falls back to the cards being present and only
+    raises if there are none.
+    """
+    try:
+        return waiter.wait(driver, step, cards_stable(cards_xpath, quiet_ms), timeout)
+    except TimeoutException:
+        count = len(driver.find_elements(By.XPATH, cards_xpath))
+        if not count:
+            raise
+        print(f"⚠ Listing never settled during '{step}', continuing with {count} cards present")
+        metrics.inc("blinkit_wait_fallbacks_total", step=step)
+        return count
+
+
+def listing_settled(cards_xpath, quiet_ms=700):
+    """After a scroll: more cards arrived, or none came for quiet_ms"""
+    return card_count_settled(cards_xpath, quiet_ms, until_growth=True)
+
+
+def location_applied(input_xpath, cards_xpath, quiet_ms=500):
+    """Location picker closed and the page reloaded its listing"""
+    idle = cards_stable(cards_xpath, quiet_ms)
+
+    def condition(driver):
+        for inp in driver.find_elements(By.XPATH, input_xpath):
+            try:
+                if inp.is_displayed():
+                    return False
+            except WebDriverException:
+                pass
+        return idle(driver)
+    return condition
+
+
+def search_page_ready(cards_xpath, input_xpath, quiet_ms=500):
+    """Listing rendered, or the site is asking for a delivery location"""
+    cards = cards_stable(cards_xpath, quiet_ms)
+
+    def condition(driver):
+        return location_prompt_shown(driver, input_xpath) or bool(cards(driver))
+    return condition
+
+
+def location_prompt_shown(driver, input_xpath):
+    for inp in driver.find_elements(By.XPATH, input_xpath):
+        try:
+            if inp.is_displayed():
+                return True
+        except WebDriverException:
+            pass
+    return False
+
+
+def variant_rail_rendered(quiet_ms=300):
+    """Variant buttons rendered, or the page settled without a variant rail"""
+    idle = dom_quiet(quiet_ms)
+
+    def condition(driver):
+        rails = driver.find_elements(By.ID, "variant_horizontal_rail")
+        if rails and rails[0].find_elements(By.XPATH, './/div[@role="button"]'):
+            return True
+        return idle(driver)
+    return condition
+
+
+class Waiter:
+    """Runs wait conditions with per-step timeouts and records how long each wait took"""
+
+    def __init__(self, timeouts=None, poll=0.1):
+        self.timeouts = dict(STEP_TIMEOUTS, **(timeouts or {}))
+        self.poll = poll
+        self.timings = defaultdict(list)
+        self.timeouts_hit = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def wait(self, driver, step, condition, timeout=None):
+        """Wait until condition(driver) is truthy; raises TimeoutException like WebDriverWait"""
+        timeout = self.timeouts.get(step, 10) if timeout is None else timeout
+        start = time.monotonic()
+        try:
+            return WebDriverWait(driver, timeout, poll_frequency=self.poll).until(condition)
+        except TimeoutException:
+            with self._lock:
+                self.timeouts_hit[step] += 1
+            metrics.inc("blinkit_timeouts_total", step=step)
+            raise
+        finally:
+            with self._lock:
+                self.timings[step].append(time.monotonic() - start)
+
+    def settle(self, driver, step, condition, timeout=None):
+        """Like wait(), but a timeout is not an error"""
+        try:
+            return self.wait(driver, step, condition, timeout)
+        except TimeoutException:
+            return None
+
+    def summary(self):
+        with self._lock:
+            return {
+                step: {
+                    "count": len(times),
+                    "total_s": round(sum(times), 2),
+                    "avg_s": round(sum(times) / len(times), 2),
+                    "max_s": round(max(times), 2),
+                    "timeouts": self.timeouts_hit.get(step, 0),
+                }
+                for step, times in self.timings.items()
+            }
@@ -23,7 +23,7 @@
 # admin.site.register(PeriodicTask)
 
 from django.contrib import admin
-from .models import ScrapeSession, Product, Alert
+from .models import ScrapeSession, Product, Alert, ScrapeJob
 
 @admin.register(ScrapeSession)
 class ScrapeSessionAdmin(admin.ModelAdmin):
@@ -36,3 +36,7 @@ class ProductAdmin(admin.ModelAdmin):
 @admin.register(Alert)
 class AlertAdmin(admin.ModelAdmin):
     list_display = ('product_name', 'days_out_of_stock', 'severity', 'timestamp')
+
+@admin.register(ScrapeJob)
+class ScrapeJobAdmin(admin.ModelAdmin):
+    list_display = ('keyword', 'pincode', 'status', 'stage', 'scraped', 'created_at')
@@ -1,14 +1,18 @@
 from django.utils import timezone
-from datetime import datetime, timedelta
-from .models import ProductTracker, StockAlert, DailyStockSummary
+from datetime import timedelta
+from .models import ProductTracker, StockAlert, DailyStockSummary, CatalogVariant
 from .utils import send_consolidated_stock_alert_email
-from django.db.models import Count
+from .catalog import DimensionCache, PLACEHOLDER_VARIANTS, catalog_key, has_real_variants
+from .availability import outage_days
+from .rollups import day_counts, hourly_rows
+from django.db.models import prefetch_related_objects
 
 class SmartAlertEngine:
 
-    def __init__(self):
-        self.today = timezone.now().date()
+    def __init__(self, dimensions=None):
+        self.today = timezone.localdate()
         self.now = timezone.now()
+        self.dimensions = dimensions or DimensionCache()
 
     def process_session_alerts(self, session):
         self._track_products(session)
@@ -29,141 +33,151 @@ class SmartAlertEngine:
         
         self._update_daily_summary()
 
-    def _track_products(self, session):
-        """Only track products that have actual out-of-stock variants"""
-        for product in session.products.all():
-            available = product.available_variants.split(';') if product.available_variants else []
-            out_of_stock = product.out_of_stock_variants.split(';') if product.out_of_stock_variants else []
-            
-            # Clean and filter variants
-            available = [v.strip() for v in available if v.strip()]
-            out_of_stock = [v.strip() for v in out_of_stock if v.strip() and v.strip() not in ['Error', 'No data', 'Scraper Error']]
-            
+    def process_products(self, session, products):
+        """Track and alert on a batch of products while their session is still being scraped.
+
+        Only alerts for the products in this batch are generated and emailed;
+        call finish() once the session is complete.
+        """
+        product_ids = self._track_products(session, products)
+
+        oos_alerts = []
+        oos_alerts.extend(self._generate_daily_alerts(session, product_ids))
+        oos_alerts.extend(self._generate_consecutive_day_alerts(session, product_ids))
+        oos_alerts.extend(self._generate_frequent_outage_alerts(session, product_ids))
+
+        if oos_alerts:
+            try:
+                send_consolidated_stock_alert_email(session, oos_alerts)
+            except Exception as e:
+                print(f"❌ Failed to send consolidated email: {e}")
+        return oos_alerts
+
+    def finish(self):
+        self._update_daily_summary()
+
+    def _track_products(self, session, products=None):
+        """Only track products that have actual out-of-stock variants; returns their catalog product ids"""
+        products = list(session.products.all() if products is None else products)
+        prefetch_related_objects(products, 'variants')
+        products = [p for p in products if has_real_variants(p)]
+        location = self.dimensions.location(session.pincode)
+        catalog = self.dimensions.products((p.url, p.name) for p in products)
+
+        tracked = []
+        for product in products:
+            available = product.variant_names(True)
+            out_of_stock = [v for v in product.variant_names(False) if v not in PLACEHOLDER_VARIANTS]
+
             # Only track if there are genuine out-of-stock variants
             if out_of_stock:
-                # Track available variants
-                for variant in available:
-                    ProductTracker.objects.create(
-                        product_name=product.name,
-                        variant=variant,
-                        keyword=session.keyword,
-                        pincode=session.pincode,
-                        is_available=True,
-                        session=session
-                    )
-                
-                # Track out-of-stock variants
-                for variant in out_of_stock:
-                    ProductTracker.objects.create(
-                        product_name=product.name,
-                        variant=variant,
-                        keyword=session.keyword,
-                        pincode=session.pincode,
-                        is_available=False,
-                        session=session
-                    )
-
-    def _generate_daily_alerts(self, session):
+                catalog_product = catalog[catalog_key(product.url, product.name)]
+                tracked.extend((catalog_product, variant, True) for variant in available)
+                tracked.extend((catalog_product, variant, False) for variant in out_of_stock)
+
+        variants = self.dimensions.variants((p, name) for p, name, _ in tracked)
+        ProductTracker.objects.bulk_create([
+            ProductTracker(
+                product=catalog_product,
+                variant=variants[(catalog_product.id, name[:200])],
+                keyword=session.keyword,
+                location=location,
+                is_available=is_available,
+                session=session
+            )
+            for catalog_product, name, is_available in tracked
+        ])
+        return {p.id for p in catalog.values()}
+
+    def _keyword_products(self, session, location):
+        """Catalog products ever tracked for the session's keyword and pincode"""
+        return ProductTracker.objects.filter(
+            keyword=session.keyword, location=location
+        ).values('product_id')
+
+    def _variants(self, rows):
+        """CatalogVariant (with its product) for each variant_id in rows"""
+        return CatalogVariant.objects.select_related('product').in_bulk({r['variant_id'] for r in rows})
+
+    def _generate_daily_alerts(self, session, product_ids=None):
         """Generate alerts only for genuinely out-of-stock products"""
         alerts = []
-        start = datetime.combine(self.today, datetime.min.time())
-        end = datetime.combine(self.today, datetime.max.time())
-        
-        # Get today's out-of-stock tracks only
-        oos_tracks = ProductTracker.objects.filter(
-            keyword=session.keyword,
-            pincode=session.pincode,
-            checked_at__range=(start, end),
-            is_available=False
-        )
+        location = self.dimensions.location(session.pincode)
         
-        # Group by product+variant and count outages
-        stats = {}
-        for track in oos_tracks:
-            key = (track.product_name, track.variant)
-            if key not in stats:
-                stats[key] = {'total': 0, 'outages': 0, 'product_name': track.product_name, 'variant': track.variant}
-            stats[key]['total'] += 1
-            stats[key]['outages'] += 1
+        # Today's checks/outages per variant (daily rollup + rows not folded yet)
+        counts = day_counts(self.today, session.keyword, location, product_ids)
+        stats = [{'variant_id': v, **c} for v, c in counts.items() if c['outages']]
+        variants = self._variants(stats)
 
         # Generate alerts for out-of-stock products
-        for key, s in stats.items():
+        for s in stats:
             if s['outages'] >= 1:  # Any out-of-stock occurrence
                 alert = self._create_or_update_alert(
-                    product_name=s['product_name'],
-                    variant=s['variant'],
+                    variant=variants[s['variant_id']],
                     keyword=session.keyword,
-                    pincode=session.pincode,
+                    location=location,
                     alert_type='DAILY_OUTAGE',
                     severity='MEDIUM',
                     outage_count=s['outages'],
-                    total_checks=s['total']
+                    total_checks=s['checks']
                 )
                 if alert:
                     alerts.append(alert)
         
         return alerts
 
-    def _generate_consecutive_day_alerts(self, session):
+    def _generate_consecutive_day_alerts(self, session, product_ids=None):
         """Generate alerts for products out of stock for consecutive days"""
         alerts = []
         week_ago = self.today - timedelta(days=7)
-        
-        tracks = ProductTracker.objects.filter(
-            keyword=session.keyword,
-            pincode=session.pincode,
-            checked_at__date__range=(week_ago, self.today),
-            is_available=False
-        ).order_by('product_name', 'variant', 'checked_at')
-
-        days = {}
-        for t in tracks:
-            key = (t.product_name, t.variant)
-            day = t.checked_at.date()
-            if key not in days:
-                days[key] = {}
-            if day not in days[key]:
-                days[key][day] = []
-            days[key][day].append(False)  # All these are out-of-stock
-
-        for (name, variant), d in days.items():
-            consecutive_days = len(d)  # Number of days with outages
-            if consecutive_days >= 2:  # 2+ days of outages
-                severity = 'CRITICAL' if consecutive_days >= 3 else 'HIGH'
-                alert = self._create_or_update_alert(
-                    product_name=name,
-                    variant=variant,
-                    keyword=session.keyword,
-                    pincode=session.pincode,
-                    alert_type='CONSECUTIVE_DAYS',
-                    severity=severity,
-                    consecutive_days=consecutive_days
-                )
-                if alert:
-                    alerts.append(alert)
+        location = self.dimensions.location(session.pincode)
+        if product_ids is None:
+            product_ids = self._keyword_products(session, location)
+
+        # Number of days with outages per variant, from the availability runs
+        days = outage_days(location, week_ago, self.today, product_ids)
+        days = [{'variant_id': v, 'days': n} for v, n in days.items() if n >= 2]  # 2+ days of outages
+        variants = self._variants(days)
+
+        for d in days:
+            consecutive_days = d['days']
+            severity = 'CRITICAL' if consecutive_days >= 3 else 'HIGH'
+            alert = self._create_or_update_alert(
+                variant=variants[d['variant_id']],
+                keyword=session.keyword,
+                location=location,
+                alert_type='CONSECUTIVE_DAYS',
+                severity=severity,
+                consecutive_days=consecutive_days
+            )
+            if alert:
+                alerts.append(alert)
         
         return alerts
 
-    def _generate_frequent_outage_alerts(self, session):
+    def _generate_frequent_outage_alerts(self, session, product_ids=None):
         """Generate alerts for products with frequent outages"""
         alerts = []
-        week_ago = self.now - timedelta(days=7)
-        
-        items = ProductTracker.objects.filter(
-            keyword=session.keyword,
-            pincode=session.pincode,
-            checked_at__gte=week_ago,
-            is_available=False
-        ).values('product_name', 'variant').annotate(
-            cnt=Count('id')
-        ).filter(cnt__gte=3)  # 3+ outages in a week
+        week_ago = timezone.localtime(self.now - timedelta(days=7))
+        location = self.dimensions.location(session.pincode)
+        filters = {'keyword': session.keyword, 'location': location}
+        if product_ids is not None:
+            filters['product_id__in'] = product_ids
+
+        # Out-of-stock observations this week, to the hour (hourly rollup + rows not folded yet)
+        since = week_ago.replace(minute=0, second=0, microsecond=0)
+        counts = {}
+        for row in hourly_rows(week_ago.date(), self.today, group_by=('variant_id',), **filters):
+            if row['hour'] >= since and row['outages']:
+                counts[row['variant_id']] = counts.get(row['variant_id'], 0) + row['outages']
+        items = [{'variant_id': v, 'cnt': n} for v, n in counts.items() if n >= 3]  # 3+ outages in a week
+        variants = self._variants(items)
 
         for item in items:
             alert = self._create_or_update_alert(
-                product_name=item['product_name'],
-                variant=item['variant'],
+                variant=variants[item['variant_id']],
                 keyword=session.keyword,
-                pincode=session.pincode,
+                location=location,
                 alert_type='FREQUENT_OUTAGE',
                 severity='HIGH',
                 weekly_outages=item['cnt']
@@ -173,16 +187,19 @@ class SmartAlertEngine:
         
         return alerts
 
-    def _create_or_update_alert(self, product_name, variant, keyword, pincode, alert_type, severity, **kw):
+    def _create_or_update_alert(self, variant, keyword, location, alert_type, severity, **kw):
         """Create or update alert - return alert object if created/updated"""
         alert, created = StockAlert.objects.get_or_create(
-            product_name=product_name,
+            product=variant.product,
             variant=variant,
             keyword=keyword,
-            pincode=pincode,
+            location=location,
             alert_type=alert_type,
             defaults={'severity': severity, 'is_resolved': False}
         )
+        # Reuse the loaded rows for the messages and the alert email
+        alert.product, alert.variant, alert.location = variant.product, variant, location
+        product_name = variant.product.name
         
         updated = False
 
@@ -219,17 +236,19 @@ class SmartAlertEngine:
         return None
 
     def _update_daily_summary(self):
-        tracks = ProductTracker.objects.filter(checked_at__date=self.today)
-        if not tracks.exists():
+        counts = day_counts(self.today)
+        if not counts:
             return
 
-        total = tracks.count()
-        outages = tracks.filter(is_available=False).count()
+        total = sum(c['checks'] for c in counts.values())
+        outages = sum(c['outages'] for c in counts.values())
         rate = (total - outages) / total * 100 if total else 0
 
-        top = tracks.filter(is_available=False).values('product_name', 'variant') \
-            .annotate(cnt=Count('id')).order_by('-cnt')[:5]
-        worst = [f"{i['product_name']} {i['variant']}: {i['cnt']} outages" for i in top]
+        top = sorted(({'variant_id': v, 'cnt': c['outages']} for v, c in counts.items() if c['outages']),
+                     key=lambda i: -i['cnt'])[:5]
+        variants = self._variants(top)
+        worst = [f"{variants[i['variant_id']].product.name} {variants[i['variant_id']].name}: {i['cnt']} outages"
+                 for i in top]
 
         summary, created = DailyStockSummary.objects.get_or_create(
             date=self.today,
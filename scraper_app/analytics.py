@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 from datetime import timedelta
 from django.utils import timezone
-from django.db.models import Count, Avg, Q
+from django.conf import settings
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LinearRegression
@@ -18,7 +18,17 @@ try:
 except ImportError:
     PROPHET_AVAILABLE = False
 
-from .models import ProductTracker, ScrapeSession, StockAlert
+from .models import ScrapeSession, StockAlert, CatalogProduct
+from .rollups import daily_rows, hourly_rows
+
+
+def _summed(rows, by):
+    """DataFrame of rollup + raw-tail rows (rollups.daily_rows / hourly_rows) with checks and outages summed per `by`"""
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    by = list(by)
+    return df.groupby(by, as_index=False)[['checks', 'outages']].sum().sort_values(by).reset_index(drop=True)
 
 
 class StockAnalytics:
@@ -28,31 +38,23 @@ class StockAnalytics:
         self.days_back = 30  # Analyze last 30 days
 
     def prepare_forecast_data(self, keyword=None, pincode=None):
-        end_date = self.now.date()
+        end_date = timezone.localdate(self.now)
         start_date = end_date - timedelta(days=self.days_back)
 
-        query = ProductTracker.objects.filter(
-            checked_at__date__range=[start_date, end_date]
-        )
+        filters = {}
         if keyword:
-            query = query.filter(keyword=keyword)
+            filters['keyword'] = keyword
         if pincode:
-            query = query.filter(pincode=pincode)
-
-        daily_data = query.extra(
-            select={'date': "DATE(checked_at)"}
-        ).values('date').annotate(
-            total_checks=Count('id'),
-            outages=Count('id', filter=Q(is_available=False)),
-            availability_rate=Avg('is_available')
-        ).order_by('date')
+            filters['location__pincode'] = pincode
 
-        df = pd.DataFrame(daily_data)
+        df = _summed(daily_rows(start_date, end_date, **filters), ['day'])
         if df.empty:
             return df
 
-        df['date'] = pd.to_datetime(df['date'])
+        df = df.rename(columns={'checks': 'total_checks'})
+        df['date'] = pd.to_datetime(df['day'])
         df['outage_rate'] = df['outages'] / df['total_checks']
+        df['availability_rate'] = 1 - df['outage_rate']
         df['ds'] = df['date']
         df['y'] = df['outage_rate']
 
@@ -104,23 +106,24 @@ class StockAnalytics:
             return {"error": f"Forecasting failed: {str(e)}"}
 
     def analyze_pincode_patterns(self):
-        end_date = self.now.date()
+        end_date = timezone.localdate(self.now)
         start_date = end_date - timedelta(days=self.days_back)
 
-        pincode_data = ProductTracker.objects.filter(
-            checked_at__date__range=[start_date, end_date]
-        ).values('pincode').annotate(
-            total_checks=Count('id'),
-            outages=Count('id', filter=Q(is_available=False)),
-            unique_products=Count('product_name', distinct=True),
-            avg_availability=Avg('is_available')
-        ).order_by('-total_checks')
-
-        df = pd.DataFrame(pincode_data)
+        per_product = _summed(daily_rows(start_date, end_date, group_by=('location__pincode', 'product_id')),
+                              ['location__pincode', 'product_id'])
+        if per_product.empty:
+            return {"error": "Insufficient pincode data for analysis"}
+        df = per_product.groupby('location__pincode', as_index=False).agg(
+            total_checks=('checks', 'sum'),
+            outages=('outages', 'sum'),
+            unique_products=('product_id', 'nunique'),
+        ).rename(columns={'location__pincode': 'pincode'}).sort_values('total_checks', ascending=False)
+        df = df.reset_index(drop=True)
         if len(df) < 3:
             return {"error": "Insufficient pincode data for analysis"}
 
         df['outage_rate'] = df['outages'] / df['total_checks']
+        df['avg_availability'] = 1 - df['outage_rate']
         df['checks_per_product'] = df['total_checks'] / df['unique_products']
 
         features = ['outage_rate', 'checks_per_product', 'unique_products']
@@ -159,21 +162,12 @@ class StockAnalytics:
         return f"{stability}, {volume} Region"
 
     def generate_correlation_heatmap(self):
-        end_date = self.now.date()
+        end_date = timezone.localdate(self.now)
         start_date = end_date - timedelta(days=self.days_back)
 
-        # Note double percent signs for strftime inside Django .extra()
-        data = ProductTracker.objects.filter(
-            checked_at__date__range=[start_date, end_date]
-        ).extra(
-            select={
-                'hour': "CAST(strftime('%%H', checked_at) AS INTEGER)",
-                'day_of_week': "CAST(strftime('%%w', checked_at) AS INTEGER)",
-                'day_of_month': "CAST(strftime('%%d', checked_at) AS INTEGER)"
-            }
-        ).values('pincode', 'hour', 'day_of_week', 'day_of_month', 'is_available')
-
-        df = pd.DataFrame(data)
+        # One row per location/variant/keyword and hour
+        group = ('location_id', 'variant_id', 'keyword')
+        df = _summed(hourly_rows(start_date, end_date, group_by=group), ['hour', *group])
         if df.empty:
             return {
                 "error": "No data available for correlation analysis",
@@ -192,11 +186,20 @@ class StockAnalytics:
                 'insights': []
             }
 
-        df['pincode_numeric'] = pd.Categorical(df['pincode']).codes
-        df['availability_numeric'] = df['is_available'].astype(int)
+        local = pd.to_datetime(df['hour'], utc=True).dt.tz_convert(settings.TIME_ZONE)
+        df['hour'] = local.dt.hour
+        df['day_of_week'] = (local.dt.dayofweek + 1) % 7  # Sunday = 0
+        df['day_of_month'] = local.dt.day
+        df['pincode_numeric'] = pd.Categorical(df['location_id']).codes
+        df['availability_numeric'] = 1 - df['outages'] / df['checks']
 
+        # Correlation weighted by the number of checks in each row
         features = ['pincode_numeric', 'hour', 'day_of_week', 'day_of_month', 'availability_numeric']
-        corr_matrix = df[features].corr()
+        cov = np.cov(df[features].to_numpy(dtype=float), rowvar=False, aweights=df['checks'])
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr_matrix = pd.DataFrame(corr, index=features, columns=features)
 
         heatmap_data = {
             'labels': ['Pincode', 'Hour', 'Day of Week', 'Day of Month', 'Availability'],
@@ -204,8 +207,11 @@ class StockAnalytics:
             'text': [[f"{val:.3f}" for val in row] for row in corr_matrix.values]
         }
 
-        hourly_avg = df.groupby('hour')['availability_numeric'].mean()
-        daily_avg = df.groupby('day_of_week')['availability_numeric'].mean()
+        df['available'] = df['checks'] - df['outages']
+        by_hour = df.groupby('hour')[['available', 'checks']].sum()
+        hourly_avg = by_hour['available'] / by_hour['checks']
+        by_day = df.groupby('day_of_week')[['available', 'checks']].sum()
+        daily_avg = by_day['available'] / by_day['checks']
 
         time_patterns = {
             'hourly_availability': {
@@ -243,18 +249,12 @@ class StockAnalytics:
         return insights
 
     def get_advanced_metrics(self):
-        end_date = self.now.date()
+        end_date = timezone.localdate(self.now)
         start_date = end_date - timedelta(days=7)
 
-        weekly_data = ProductTracker.objects.filter(
-            checked_at__date__range=[start_date, end_date]
-        ).extra(
-            select={'date': "DATE(checked_at)"}
-        ).values('date').annotate(
-            availability_rate=Avg('is_available')
-        ).order_by('date')
-
-        df = pd.DataFrame(weekly_data)
+        df = _summed(daily_rows(start_date, end_date), ['day'])
+        if not df.empty:
+            df['availability_rate'] = 1 - df['outages'] / df['checks']
 
         trend, icon = "Insufficient Data", "❓"
         slope = 0
@@ -289,9 +289,7 @@ class StockAnalytics:
             'risk_assessment': {'level': level, 'color': color, 'active_alerts': recent_alerts},
             'data_quality': {
                 'days_analyzed': len(df),
-                'total_data_points': ProductTracker.objects.filter(
-                    checked_at__date__range=[start_date, end_date]
-                ).count()
+                'total_data_points': int(df['checks'].sum()) if not df.empty else 0
             }
         }
         
@@ -302,35 +300,28 @@ class StockAnalytics:
         if not PROPHET_AVAILABLE:
             return []
         
-        today = timezone.now().date()
+        today = timezone.localdate()
         end_date = today
         start_date = end_date - timedelta(days=self.days_back)
         
-        products = ProductTracker.objects.filter(
-            checked_at__date__range=[start_date, end_date]
-        )
-        if pincode:
-            products = products.filter(pincode=pincode)
+        filters = {'location__pincode': pincode} if pincode else {}
         
-        product_names = list(products.values_list('product_name', flat=True).distinct())
+        # Daily checks/outages of every product in one pass
+        history = _summed(daily_rows(start_date, end_date, group_by=('product_id',), **filters), ['product_id', 'day'])
+        if history.empty:
+            return []
+        history = history.rename(columns={'day': 'date', 'checks': 'total_checks'})
+        names = dict(CatalogProduct.objects.filter(
+            id__in=history['product_id'].unique().tolist()).values_list('id', 'name'))
         predictions = []
 
-        for product in product_names:
+        for product_id, df in history.groupby('product_id'):
+            product = names[product_id]
             try:
-                # Get historical data for this product
-                qs = products.filter(product_name=product)
-                daily_data = qs.extra(
-                    select={'date': "DATE(checked_at)"}
-                ).values('date').annotate(
-                    total_checks=Count('id'),
-                    outages=Count('id', filter=Q(is_available=False)),
-                    availability_rate=Avg('is_available')
-                ).order_by('date')
-                
-                df = pd.DataFrame(daily_data)
                 if len(df) < 5:
                     continue
                     
+                df = df.copy()
                 df['date'] = pd.to_datetime(df['date'])
                 df['outage_rate'] = df['outages'] / df['total_checks']
                 df['ds'] = df['date']
@@ -0,0 +1,86 @@
+"""Transition-only availability log (AvailabilityRun).
+
+Every scrape re-reports mostly unchanged variants; instead of one row per
+observation, a run row is opened when a variant's availability at a
+location changes and its last_seen_at is bumped while it stays the same.
+Ingestion feeds it through record_observations(), and outage counts,
+outage-day streaks and restocks are range queries over the runs.
+"""
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+
+from .models import AvailabilityRun
+
+
+def record_observations(location, observations, seen_at=None):
+    """Fold (CatalogVariant, is_available) observations at location into the run log.
+
+    Looks up the current (open) run of every variant in one query, extends
+    the unchanged ones, closes the changed ones and opens their new runs.
+    Returns the number of runs opened.
+    """
+    seen_at = seen_at or timezone.now()
+    state = {variant.id: (variant, available) for variant, available in observations}
+    if not state:
+        return 0
+    current = {
+        run.variant_id: run
+        for run in AvailabilityRun.objects.filter(location=location, variant_id__in=state, ended_at__isnull=True)
+    }
+
+    unchanged, closed, opened = [], [], []
+    for variant_id, (variant, available) in state.items():
+        run = current.get(variant_id)
+        if run is not None and run.is_available == available:
+            unchanged.append(run.id)
+            continue
+        if run is not None:
+            closed.append(run.id)
+        opened.append(AvailabilityRun(product_id=variant.product_id, variant=variant, location=location,
+                                      is_available=available, started_at=seen_at, last_seen_at=seen_at))
+
+    if unchanged:
+        AvailabilityRun.objects.filter(id__in=unchanged).update(last_seen_at=seen_at)
+    if closed:
+        AvailabilityRun.objects.filter(id__in=closed).update(ended_at=seen_at)
+    AvailabilityRun.objects.bulk_create(opened)
+    return len(opened)
+
+
+def _runs(location, is_available, product_ids=None):
+    runs = AvailabilityRun.objects.filter(location=location, is_available=is_available)
+    if product_ids is not None:
+        runs = runs.filter(product_id__in=product_ids)
+    return runs
+
+
+def outage_counts(location, since, product_ids=None):
+    """variant_id -> number of outages that started since `since`"""
+    runs = _runs(location, False, product_ids).filter(started_at__gte=since)
+    return dict(runs.values_list('variant_id').annotate(cnt=Count('id')))
+
+
+def outage_days(location, start_date, end_date, product_ids=None):
+    """variant_id -> number of local days in [start_date, end_date] on which it was seen out of stock"""
+    start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+    end = start + timedelta(days=(end_date - start_date).days + 1)
+    runs = _runs(location, False, product_ids).filter(started_at__lt=end, last_seen_at__gte=start)
+
+    days = {}
+    for variant_id, started_at, last_seen_at in runs.values_list('variant_id', 'started_at', 'last_seen_at'):
+        first = max(timezone.localtime(started_at).date(), start_date)
+        last = min(timezone.localtime(last_seen_at).date(), end_date)
+        covered = days.setdefault(variant_id, set())
+        covered.update(first + timedelta(days=i) for i in range((last - first).days + 1))
+    return {variant_id: len(covered) for variant_id, covered in days.items()}
+
+
+def restocks(location, since, product_ids=None):
+    """In-stock runs started since `since` that ended an outage"""
+    outage_before = AvailabilityRun.objects.filter(
+        variant=OuterRef('variant'), location=OuterRef('location'),
+        is_available=False, ended_at=OuterRef('started_at')
+    )
+    return _runs(location, True, product_ids).filter(started_at__gte=since).filter(Exists(outage_before))
@@ -0,0 +1,114 @@
+"""Catalog dimensions for the time-series tables.
+
+ProductTracker and StockAlert rows point at CatalogProduct (keyed by
+catalog_key), CatalogVariant and Location rows instead of
+repeating product names, variant labels and pincodes. DimensionCache
+resolves those rows during ingestion and alert processing.
+"""
+import re
+from urllib.parse import urlsplit
+
+from scraper.product_cache import canonical_url
+
+from .models import CatalogProduct, CatalogVariant, Location
+
+# Variant names the scraper writes when it could not read a product
+PLACEHOLDER_VARIANTS = {'Error', 'No data', 'Scraper Error'}
+
+# "2 x 200 g", "500 ml", "1.5 L", "6 pcs"
+SIZE_RE = re.compile(
+    r'(?:(\d+)\s*[x\u00d7]\s*)?(\d+(?:\.\d+)?)\s*'
+    r'(ml|ltrs?|litres?|liters?|l|kgs?|gms?|grams?|g|pcs|pieces?|pc|units?)\b',
+    re.IGNORECASE
+)
+SIZE_UNITS = {
+    'ltr': 'l', 'ltrs': 'l', 'litre': 'l', 'litres': 'l', 'liter': 'l', 'liters': 'l',
+    'kgs': 'kg', 'gm': 'g', 'gms': 'g', 'gram': 'g', 'grams': 'g',
+    'pcs': 'pc', 'piece': 'pc', 'pieces': 'pc', 'unit': 'pc', 'units': 'pc',
+}
+
+
+def normalize_size(variant):
+    """Pack size of a variant label in one spelling ("2 x 200 gm" -> "2x200g"), '' if there is none"""
+    match = SIZE_RE.search(variant)
+    if not match:
+        return ''
+    count, amount, unit = match.groups()
+    unit = unit.lower()
+    if '.' in amount:
+        amount = amount.rstrip('0').rstrip('.')
+    size = f"{amount}{SIZE_UNITS.get(unit, unit)}"
+    return f"{count}x{size}" if count else size
+
+
+def catalog_key(url, name):
+    """CatalogProduct.url for a scraped product: its canonical URL, or "name:<name>"
+    when it has no product link (listing cards, older rows that hold the search
+    page URL), like the 0009 backfill does for names without a URL"""
+    url = canonical_url(url) if url else ''
+    if urlsplit(url).path in ('', '/s'):
+        return f"name:{name}"[:1000]
+    return url[:1000]
+
+
+def has_real_variants(product):
+    """False for the placeholder product saved when a scrape failed (only 'Error' style variants)"""
+    return any(v.name not in PLACEHOLDER_VARIANTS for v in product.variants.all())
+
+
+class DimensionCache:
+    """get-or-create for dimension rows, memoized for the life of the cache (one scrape or alert run).
+
+    Lookups take a whole batch: one SELECT, plus one INSERT for new rows, per
+    call, and no queries once every key is cached.
+    """
+
+    def __init__(self):
+        self._locations = {}
+        self._products = {}
+        self._variants = {}
+
+    def location(self, pincode):
+        if pincode not in self._locations:
+            self._locations[pincode], _ = Location.objects.get_or_create(pincode=pincode)
+        return self._locations[pincode]
+
+    def products(self, items):
+        """CatalogProduct for each (url, name) pair, keyed by catalog_key(url, name)"""
+        wanted = {}
+        for url, name in items:
+            wanted.setdefault(catalog_key(url, name), name)
+        missing = [url for url in wanted if url not in self._products]
+        if missing:
+            found = CatalogProduct.objects.in_bulk(missing, field_name='url')
+            new = [CatalogProduct(url=url, name=wanted[url][:500]) for url in missing if url not in found]
+            if new:
+                CatalogProduct.objects.bulk_create(new, ignore_conflicts=True)
+                found.update(CatalogProduct.objects.in_bulk([p.url for p in new], field_name='url'))
+            self._products.update(found)
+        return {url: self._products[url] for url in wanted}
+
+    def variants(self, items):
+        """CatalogVariant for each (CatalogProduct, variant name) pair, keyed by (product id, name)"""
+        wanted = {}
+        for product, name in items:
+            wanted.setdefault((product.id, name[:200]), product)
+        missing = [key for key in wanted if key not in self._variants]
+        if missing:
+            def lookup(keys):
+                rows = CatalogVariant.objects.filter(
+                    product_id__in={k[0] for k in keys}, name__in={k[1] for k in keys}
+                )
+                return {(v.product_id, v.name): v for v in rows if (v.product_id, v.name) in keys}
+
+            keys = set(missing)
+            found = lookup(keys)
+            new = [CatalogVariant(product=wanted[key], name=key[1], size=normalize_size(key[1]))
+                   for key in missing if key not in found]
+            if new:
+                CatalogVariant.objects.bulk_create(new, ignore_conflicts=True)
+                found.update(lookup(keys - set(found)))
+            for v in found.values():
+                v.product = wanted[(v.product_id, v.name)]
+            self._variants.update(found)
+        return {key: self._variants[key] for key in wanted}
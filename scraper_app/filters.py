@@ -1,6 +1,7 @@
 import django_filters
+from django.db.models import Exists, OuterRef
 from .models import ScrapeSession
-from .models import Product
+from .models import Product, ProductVariant
 
 class SessionFilter(django_filters.FilterSet):
     keyword = django_filters.CharFilter(field_name='keyword', lookup_expr='icontains', label='Keyword')
@@ -15,12 +16,17 @@ class SessionFilter(django_filters.FilterSet):
 class ProductFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(field_name='name', lookup_expr='icontains', label='Product Name')
     stock_status = django_filters.ChoiceFilter(
-        field_name='out_of_stock_variants',
-        lookup_expr='exact',
-        choices=[('', 'All'), ('', 'In Stock'), ('__len__gt', 'Has Issues')],
+        choices=[('in_stock', 'In Stock'), ('issues', 'Has Issues')],
+        method='filter_stock_status',
         label='Stock Status'
     )
 
     class Meta:
         model = Product
         fields = ['name']
+
+    def filter_stock_status(self, queryset, name, value):
+        out_of_stock = ProductVariant.objects.filter(product=OuterRef('pk'), is_available=False)
+        if value == 'issues':
+            return queryset.filter(Exists(out_of_stock))
+        return queryset.filter(~Exists(out_of_stock))
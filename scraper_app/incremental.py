@@ -0,0 +1,38 @@
+from datetime import datetime, timezone as dt_timezone
+
+from .models import ScrapeSession
+
+
+def previous_fingerprint(keyword, pincode, exclude=None):
+    """URL -> card hash, last visit time and result from the last session for keyword+pincode"""
+    sessions = ScrapeSession.objects.filter(keyword=keyword, pincode=pincode)
+    if exclude is not None:
+        sessions = sessions.exclude(id=exclude.id)
+    session = sessions.order_by('-timestamp').first()
+    if not session:
+        return {}
+
+    fingerprint = {}
+    products = session.products.exclude(card_hash='').filter(scraped_at__isnull=False).prefetch_related('variants')
+    for p in products:
+        fingerprint[p.url] = {
+            'card_hash': p.card_hash,
+            'scraped_at': p.scraped_at.timestamp(),
+            'result': {
+                'product_name': p.name,
+                'available_variants': p.variant_names(True),
+                'out_of_stock_variants': p.variant_names(False),
+                'url': p.url,
+            },
+        }
+    return fingerprint
+
+
+def incremental_fields(result):
+    """Product model fields for the incremental bookkeeping keys of a scrape result"""
+    scraped_at = result.get('scraped_at')
+    return {
+        'card_hash': result.get('card_hash', ''),
+        'scraped_at': datetime.fromtimestamp(scraped_at, tz=dt_timezone.utc) if scraped_at else None,
+        'carried': result.get('carried', False),
+    }
@@ -0,0 +1,92 @@
+"""Bulk ingestion of scrape results into ScrapeSessions.
+
+Products and their ProductVariant rows are saved with bulk_create and the
+session stats (and checkpoint) are updated in the same transaction, so the
+session never disagrees with the products it holds. Both the dashboard and the scheduled task go through
+run_scrape_pipeline, whose SessionSink buffers results and ingests them
+here in batches.
+"""
+from django.db import transaction
+
+from .availability import record_observations
+from .catalog import DimensionCache, PLACEHOLDER_VARIANTS, catalog_key, normalize_size
+from .incremental import incremental_fields
+from .models import Product, ProductVariant
+
+# Most products saved in one transaction
+INGEST_BATCH_SIZE = 500
+# Longest a scraped product waits in the sink buffer before it is saved (seconds)
+INGEST_MAX_DELAY = 30
+
+
+def build_product(session, r):
+    """Unsaved Product for a scrape result dict"""
+    return Product(
+        session=session,
+        name=r['product_name'],
+        available_variants="; ".join(r['available_variants']),
+        out_of_stock_variants="; ".join(r['out_of_stock_variants']),
+        url=r['url'],
+        **incremental_fields(r)
+    )
+
+
+def build_variants(product, r):
+    """Unsaved ProductVariant rows for a saved product and its scrape result dict"""
+    variants = [(name, True) for name in r['available_variants']]
+    variants += [(name, False) for name in r['out_of_stock_variants']]
+    return [
+        ProductVariant(product=product, session_id=product.session_id, name=name[:200],
+                       size=normalize_size(name), is_available=available)
+        for name, available in variants
+    ]
+
+
+def availability_rate(total, out_of_stock):
+    return round((total - out_of_stock) / total * 100, 2) if total else 0
+
+
+def sync_stats(session):
+    """Recount the session stats from its saved products (e.g. before resuming it)"""
+    session.total_products = session.products.count()
+    session.out_of_stock_count = session.products.filter(variants__is_available=False).distinct().count()
+    session.availability_rate = availability_rate(session.total_products, session.out_of_stock_count)
+    session.save(update_fields=['total_products', 'out_of_stock_count', 'availability_rate'])
+
+
+def ingest_results(session, results, checkpoint_index=None, dimensions=None):
+    """Save a batch of scrape results to session in one transaction; returns the saved products.
+
+    With checkpoint_index the session's checkpoint moves forward in the same
+    transaction, so a resumed scrape never skips a product that is not saved.
+    Catalog rows for new products and variants are created through
+    dimensions (a catalog.DimensionCache, kept for the whole scrape), and
+    the variants' availability is folded into the AvailabilityRun log.
+    """
+    dimensions = dimensions or DimensionCache()
+    products = [build_product(session, r) for r in results]
+    fields = ['total_products', 'out_of_stock_count', 'availability_rate']
+    with transaction.atomic():
+        Product.objects.bulk_create(products, batch_size=INGEST_BATCH_SIZE)
+        variants = []
+        for product, r in zip(products, results):
+            variants.extend(build_variants(product, r))
+        ProductVariant.objects.bulk_create(variants, batch_size=INGEST_BATCH_SIZE)
+        # The placeholder of a failed scrape gets no catalog rows
+        real = [v for v in variants if v.name not in PLACEHOLDER_VARIANTS]
+        catalog = dimensions.products((v.product.url, v.product.name) for v in real)
+        observed = [(catalog[catalog_key(v.product.url, v.product.name)], v) for v in real]
+        catalog_variants = dimensions.variants((p, v.name) for p, v in observed)
+        record_observations(
+            dimensions.location(session.pincode),
+            [(catalog_variants[(p.id, v.name[:200])], v.is_available) for p, v in observed]
+        )
+        session.total_products += len(products)
+        session.out_of_stock_count += len({v.product_id for v in variants if not v.is_available})
+        session.availability_rate = availability_rate(session.total_products, session.out_of_stock_count)
+        if checkpoint_index is not None and checkpoint_index != session.checkpoint_index:
+            session.checkpoint_index = checkpoint_index
+            fields.append('checkpoint_index')
+        session.save(update_fields=fields)
+    return products
+
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from scraper_app.rollups import TRACKER_RETENTION_DAYS, prune_trackers, rebuild_rollups, update_rollups
+
+
+class Command(BaseCommand):
+    help = ("Fold new ProductTracker rows into the hourly/daily rollups and delete raw rows "
+            "older than the retention window")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=TRACKER_RETENTION_DAYS,
+                            help=f"raw rows to keep, in days (default {TRACKER_RETENTION_DAYS})")
+        parser.add_argument('--rebuild', action='store_true',
+                            help="recompute the rollups from the raw rows still kept before pruning")
+        parser.add_argument('--no-prune', action='store_true', help="only update the rollups")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            folded = rebuild_rollups()
+            self.stdout.write(f"📊 Rebuilt rollups from {folded} tracker rows")
+        else:
+            folded = update_rollups()
+            self.stdout.write(f"📊 Folded {folded} new tracker rows into the rollups")
+
+        if not options['no_prune']:
+            deleted = prune_trackers(options['days'])
+            self.stdout.write(self.style.SUCCESS(
+                f"🧹 Deleted {deleted} tracker rows older than {options['days']} days"))
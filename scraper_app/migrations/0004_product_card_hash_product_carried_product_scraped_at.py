@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0003_stockalert_weekly_outages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='card_hash',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='carried',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='scraped_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
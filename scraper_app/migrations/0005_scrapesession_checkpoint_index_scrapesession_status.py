@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0004_product_card_hash_product_carried_product_scraped_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapesession',
+            name='checkpoint_index',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scrapesession',
+            name='status',
+            field=models.CharField(choices=[('RUNNING', 'Running'), ('COMPLETE', 'Complete'), ('FAILED', 'Failed')], default='COMPLETE', max_length=10),
+        ),
+    ]
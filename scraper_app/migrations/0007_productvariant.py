@@ -0,0 +1,74 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:18
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# normalize_size as it was when this migration was written (it has since
+# moved to scraper_app.catalog); frozen so the backfill never changes
+SIZE_RE = re.compile(
+    r'(?:(\d+)\s*[x\u00d7]\s*)?(\d+(?:\.\d+)?)\s*'
+    r'(ml|ltrs?|litres?|liters?|l|kgs?|gms?|grams?|g|pcs|pieces?|pc|units?)\b',
+    re.IGNORECASE
+)
+SIZE_UNITS = {
+    'ltr': 'l', 'ltrs': 'l', 'litre': 'l', 'litres': 'l', 'liter': 'l', 'liters': 'l',
+    'kgs': 'kg', 'gm': 'g', 'gms': 'g', 'gram': 'g', 'grams': 'g',
+    'pcs': 'pc', 'piece': 'pc', 'pieces': 'pc', 'unit': 'pc', 'units': 'pc',
+}
+
+
+def normalize_size(variant):
+    match = SIZE_RE.search(variant)
+    if not match:
+        return ''
+    count, amount, unit = match.groups()
+    unit = unit.lower()
+    if '.' in amount:
+        amount = amount.rstrip('0').rstrip('.')
+    size = f"{amount}{SIZE_UNITS.get(unit, unit)}"
+    return f"{count}x{size}" if count else size
+
+
+def backfill_variants(apps, schema_editor):
+    """ProductVariant rows from the "; "-joined variant strings of existing products"""
+    Product = apps.get_model('scraper_app', 'Product')
+    ProductVariant = apps.get_model('scraper_app', 'ProductVariant')
+    batch = []
+    products = Product.objects.only('id', 'session_id', 'available_variants', 'out_of_stock_variants')
+    for p in products.iterator(chunk_size=2000):
+        for value, available in ((p.available_variants, True), (p.out_of_stock_variants, False)):
+            for name in (v.strip() for v in value.split(';')):
+                if name:
+                    batch.append(ProductVariant(product_id=p.id, session_id=p.session_id, name=name[:200],
+                                                size=normalize_size(name), is_available=available))
+        if len(batch) >= 2000:
+            ProductVariant.objects.bulk_create(batch)
+            batch = []
+    ProductVariant.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0006_scrapejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('size', models.CharField(blank=True, max_length=50)),
+                ('is_available', models.BooleanField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='scraper_app.product')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='scraper_app.scrapesession')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'is_available'], name='scraper_app_session_35ccb8_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_variants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0007_productvariant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pincode', models.CharField(max_length=10, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=1000, unique=True)),
+                ('name', models.CharField(max_length=500)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('size', models.CharField(blank=True, max_length=50)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='scraper_app.catalogproduct')),
+            ],
+            options={
+                'unique_together': {('product', 'name')},
+            },
+        ),
+        migrations.AddField(
+            model_name='producttracker',
+            name='catalog_product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tracks', to='scraper_app.catalogproduct'),
+        ),
+        migrations.AddField(
+            model_name='producttracker',
+            name='catalog_variant',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tracks', to='scraper_app.catalogvariant'),
+        ),
+        migrations.AddField(
+            model_name='producttracker',
+            name='location',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tracks', to='scraper_app.location'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='catalog_product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='scraper_app.catalogproduct'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='catalog_variant',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='scraper_app.catalogvariant'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='location',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='scraper_app.location'),
+        ),
+    ]
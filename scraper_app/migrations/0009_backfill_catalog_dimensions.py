@@ -0,0 +1,111 @@
+import re
+from urllib.parse import urlsplit
+
+from django.db import migrations
+
+# Frozen copies of catalog.normalize_size and product_cache.canonical_url
+# as of this migration
+SIZE_RE = re.compile(
+    r'(?:(\d+)\s*[x\u00d7]\s*)?(\d+(?:\.\d+)?)\s*'
+    r'(ml|ltrs?|litres?|liters?|l|kgs?|gms?|grams?|g|pcs|pieces?|pc|units?)\b',
+    re.IGNORECASE
+)
+SIZE_UNITS = {
+    'ltr': 'l', 'ltrs': 'l', 'litre': 'l', 'litres': 'l', 'liter': 'l', 'liters': 'l',
+    'kgs': 'kg', 'gm': 'g', 'gms': 'g', 'gram': 'g', 'grams': 'g',
+    'pcs': 'pc', 'piece': 'pc', 'pieces': 'pc', 'unit': 'pc', 'units': 'pc',
+}
+
+
+def normalize_size(variant):
+    match = SIZE_RE.search(variant)
+    if not match:
+        return ''
+    count, amount, unit = match.groups()
+    unit = unit.lower()
+    if '.' in amount:
+        amount = amount.rstrip('0').rstrip('.')
+    size = f"{amount}{SIZE_UNITS.get(unit, unit)}"
+    return f"{count}x{size}" if count else size
+
+
+def canonical_url(url):
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"https://{host}{parts.path.rstrip('/')}"
+
+
+def backfill_dimensions(apps, schema_editor):
+    """Point existing tracker and alert rows at catalog / location rows built from their strings.
+
+    Trackers get the product URL from the Product of the same name in their
+    session; names that can't be matched to a URL (older alerts) are keyed
+    by name instead.
+    """
+    Product = apps.get_model('scraper_app', 'Product')
+    ProductTracker = apps.get_model('scraper_app', 'ProductTracker')
+    StockAlert = apps.get_model('scraper_app', 'StockAlert')
+    Location = apps.get_model('scraper_app', 'Location')
+    CatalogProduct = apps.get_model('scraper_app', 'CatalogProduct')
+    CatalogVariant = apps.get_model('scraper_app', 'CatalogVariant')
+
+    locations, products, variants, session_urls = {}, {}, {}, {}
+    by_name = {}
+
+    def location(pincode):
+        if pincode not in locations:
+            locations[pincode], _ = Location.objects.get_or_create(pincode=pincode)
+        return locations[pincode]
+
+    def product(name, url=None):
+        key = canonical_url(url) if url else by_name.get(name, f"name:{name}")
+        if key not in products:
+            products[key], _ = CatalogProduct.objects.get_or_create(url=key[:1000], defaults={'name': name})
+        by_name.setdefault(name, key)
+        return products[key]
+
+    def variant(catalog_product, name):
+        key = (catalog_product.id, name)
+        if key not in variants:
+            variants[key], _ = CatalogVariant.objects.get_or_create(
+                product=catalog_product, name=name, defaults={'size': normalize_size(name)})
+        return variants[key]
+
+    def url_for(session_id, name):
+        if session_id not in session_urls:
+            session_urls[session_id] = dict(
+                Product.objects.filter(session_id=session_id).values_list('name', 'url'))
+        return session_urls[session_id].get(name)
+
+    fields = ['catalog_product', 'catalog_variant', 'location']
+    batch = []
+    for t in ProductTracker.objects.iterator(chunk_size=2000):
+        t.catalog_product = product(t.product_name, url_for(t.session_id, t.product_name))
+        t.catalog_variant = variant(t.catalog_product, t.variant)
+        t.location = location(t.pincode)
+        batch.append(t)
+        if len(batch) >= 2000:
+            ProductTracker.objects.bulk_update(batch, fields)
+            batch = []
+    ProductTracker.objects.bulk_update(batch, fields)
+
+    batch = []
+    for a in StockAlert.objects.iterator(chunk_size=2000):
+        a.catalog_product = product(a.product_name)
+        a.catalog_variant = variant(a.catalog_product, a.variant)
+        a.location = location(a.pincode)
+        batch.append(a)
+    StockAlert.objects.bulk_update(batch, fields, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0008_catalog_dimensions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_dimensions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0009_backfill_catalog_dimensions'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='stockalert',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='producttracker',
+            name='scraper_app_product_5d5d3c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producttracker',
+            name='scraper_app_keyword_b427c8_idx',
+        ),
+        migrations.RemoveField(
+            model_name='producttracker',
+            name='product_name',
+        ),
+        migrations.RemoveField(
+            model_name='producttracker',
+            name='variant',
+        ),
+        migrations.RemoveField(
+            model_name='producttracker',
+            name='pincode',
+        ),
+        migrations.RemoveField(
+            model_name='stockalert',
+            name='product_name',
+        ),
+        migrations.RemoveField(
+            model_name='stockalert',
+            name='variant',
+        ),
+        migrations.RemoveField(
+            model_name='stockalert',
+            name='pincode',
+        ),
+        migrations.RenameField(
+            model_name='producttracker',
+            old_name='catalog_product',
+            new_name='product',
+        ),
+        migrations.RenameField(
+            model_name='producttracker',
+            old_name='catalog_variant',
+            new_name='variant',
+        ),
+        migrations.RenameField(
+            model_name='stockalert',
+            old_name='catalog_product',
+            new_name='product',
+        ),
+        migrations.RenameField(
+            model_name='stockalert',
+            old_name='catalog_variant',
+            new_name='variant',
+        ),
+        migrations.AlterField(
+            model_name='producttracker',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tracks', to='scraper_app.catalogproduct'),
+        ),
+        migrations.AlterField(
+            model_name='producttracker',
+            name='variant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tracks', to='scraper_app.catalogvariant'),
+        ),
+        migrations.AlterField(
+            model_name='producttracker',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tracks', to='scraper_app.location'),
+        ),
+        migrations.AlterField(
+            model_name='stockalert',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='scraper_app.catalogproduct'),
+        ),
+        migrations.AlterField(
+            model_name='stockalert',
+            name='variant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='scraper_app.catalogvariant'),
+        ),
+        migrations.AlterField(
+            model_name='stockalert',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='scraper_app.location'),
+        ),
+        migrations.AddIndex(
+            model_name='producttracker',
+            index=models.Index(fields=['product', 'checked_at'], name='scraper_app_product_6ec1ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producttracker',
+            index=models.Index(fields=['keyword', 'location', 'checked_at'], name='scraper_app_keyword_1abd29_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='stockalert',
+            unique_together={('product', 'variant', 'keyword', 'location', 'alert_type')},
+        ),
+    ]
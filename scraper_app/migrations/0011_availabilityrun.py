@@ -0,0 +1,114 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:24
+
+import re
+from urllib.parse import urlsplit
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The catalog / product_cache helpers the backfill used, copied in so that
+# later edits to them don't change this migration
+PLACEHOLDER_VARIANTS = {'Error', 'No data', 'Scraper Error'}
+SIZE_RE = re.compile(
+    r'(?:(\d+)\s*[x\u00d7]\s*)?(\d+(?:\.\d+)?)\s*'
+    r'(ml|ltrs?|litres?|liters?|l|kgs?|gms?|grams?|g|pcs|pieces?|pc|units?)\b',
+    re.IGNORECASE
+)
+SIZE_UNITS = {
+    'ltr': 'l', 'ltrs': 'l', 'litre': 'l', 'litres': 'l', 'liter': 'l', 'liters': 'l',
+    'kgs': 'kg', 'gm': 'g', 'gms': 'g', 'gram': 'g', 'grams': 'g',
+    'pcs': 'pc', 'piece': 'pc', 'pieces': 'pc', 'unit': 'pc', 'units': 'pc',
+}
+
+
+def normalize_size(variant):
+    match = SIZE_RE.search(variant)
+    if not match:
+        return ''
+    count, amount, unit = match.groups()
+    unit = unit.lower()
+    if '.' in amount:
+        amount = amount.rstrip('0').rstrip('.')
+    size = f"{amount}{SIZE_UNITS.get(unit, unit)}"
+    return f"{count}x{size}" if count else size
+
+
+def canonical_url(url):
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"https://{host}{parts.path.rstrip('/')}"
+
+
+def backfill_runs(apps, schema_editor):
+    """Availability runs replayed from the ProductVariant history of past sessions"""
+    ProductVariant = apps.get_model('scraper_app', 'ProductVariant')
+    AvailabilityRun = apps.get_model('scraper_app', 'AvailabilityRun')
+    Location = apps.get_model('scraper_app', 'Location')
+    CatalogProduct = apps.get_model('scraper_app', 'CatalogProduct')
+    CatalogVariant = apps.get_model('scraper_app', 'CatalogVariant')
+
+    locations, products, variants = {}, {}, {}
+    open_runs, finished = {}, []
+
+    def location_id(pincode):
+        if pincode not in locations:
+            locations[pincode] = Location.objects.get_or_create(pincode=pincode)[0].id
+        return locations[pincode]
+
+    def variant_ids(url, product_name, name):
+        url = canonical_url(url)
+        if url not in products:
+            products[url] = CatalogProduct.objects.get_or_create(url=url, defaults={'name': product_name[:500]})[0].id
+        key = (products[url], name[:200])
+        if key not in variants:
+            variants[key] = CatalogVariant.objects.get_or_create(
+                product_id=key[0], name=key[1], defaults={'size': normalize_size(name)})[0].id
+        return key[0], variants[key]
+
+    rows = ProductVariant.objects.exclude(name__in=PLACEHOLDER_VARIANTS).order_by('session__timestamp', 'id').values_list(
+        'session__timestamp', 'session__pincode', 'product__url', 'product__name', 'name', 'is_available')
+    for seen_at, pincode, url, product_name, name, available in rows.iterator(chunk_size=2000):
+        product_id, variant_id = variant_ids(url, product_name, name)
+        key = (location_id(pincode), variant_id)
+        run = open_runs.get(key)
+        if run is not None and run.is_available == available:
+            run.last_seen_at = seen_at
+            continue
+        if run is not None:
+            run.ended_at = seen_at
+            finished.append(run)
+        open_runs[key] = AvailabilityRun(product_id=product_id, variant_id=variant_id, location_id=key[0],
+                                         is_available=available, started_at=seen_at, last_seen_at=seen_at)
+        if len(finished) >= 2000:
+            AvailabilityRun.objects.bulk_create(finished)
+            finished = []
+    AvailabilityRun.objects.bulk_create(finished + list(open_runs.values()), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0010_remove_tracker_and_alert_strings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_available', models.BooleanField()),
+                ('started_at', models.DateTimeField()),
+                ('last_seen_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='scraper_app.location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='scraper_app.catalogproduct')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='scraper_app.catalogvariant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['location', 'variant', 'ended_at'], name='scraper_app_locatio_e8c7ef_idx'), models.Index(fields=['location', 'is_available', 'started_at'], name='scraper_app_locatio_0475af_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_runs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:30
+
+from datetime import datetime, timedelta
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Max, Min
+from django.utils import timezone
+
+
+def backfill_checked_date(apps, schema_editor):
+    """checked_date of existing trackers, one UPDATE per local day"""
+    ProductTracker = apps.get_model('scraper_app', 'ProductTracker')
+    bounds = ProductTracker.objects.aggregate(first=Min('checked_at'), last=Max('checked_at'))
+    if bounds['first'] is None:
+        return
+    day = timezone.localtime(bounds['first']).date()
+    last_day = timezone.localtime(bounds['last']).date()
+    while day <= last_day:
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        end = timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+        ProductTracker.objects.filter(checked_at__gte=start, checked_at__lt=end).update(checked_date=day)
+        day += timedelta(days=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0012_tracker_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producttracker',
+            name='checked_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(backfill_checked_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='producttracker',
+            name='checked_date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AddIndex(
+            model_name='producttracker',
+            index=models.Index(fields=['keyword', 'location', 'is_available', 'checked_date'], name='scraper_app_keyword_a3cdf6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producttracker',
+            index=models.Index(fields=['checked_date', 'is_available'], name='scraper_app_checked_ec06df_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0013_producttracker_checked_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapesession',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scrapesession',
+            name='lease_owner',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
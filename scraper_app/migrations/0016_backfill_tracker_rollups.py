@@ -0,0 +1,72 @@
+from django.db import migrations
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import TruncHour
+
+
+def backfill_rollups(apps, schema_editor):
+    """Fold the tracker rows above the rollup watermark into HourlyRollup / DailyRollup.
+
+    Same folding as rollups.update_rollups() had when this was written, so
+    analytics have data right after deploy instead of waiting for beat.
+    """
+    ProductTracker = apps.get_model('scraper_app', 'ProductTracker')
+    RollupState = apps.get_model('scraper_app', 'RollupState')
+    grains = [
+        (apps.get_model('scraper_app', 'HourlyRollup'), 'hour', TruncHour('checked_at')),
+        (apps.get_model('scraper_app', 'DailyRollup'), 'day', F('checked_date')),
+    ]
+
+    state, _ = RollupState.objects.get_or_create(name='tracker')
+    rows = ProductTracker.objects.filter(id__gt=state.last_tracker_id)
+    upto = rows.aggregate(upto=Max('id'))['upto']
+    if upto is None:
+        return
+    rows = rows.filter(id__lte=upto)
+
+    for model, field, bucket in grains:
+        groups = rows.annotate(bucket=bucket).values(
+            'product_id', 'variant_id', 'location_id', 'keyword', 'bucket'
+        ).annotate(
+            checks=Count('id'),
+            outages=Count('id', filter=Q(is_available=False)),
+            first_seen=Min('checked_at'),
+            last_seen=Max('checked_at'),
+        ).order_by()
+
+        # Only look for rows to merge into when beat already folded something
+        merge = model.objects.exists()
+        new, changed = [], []
+        for g in groups.iterator(chunk_size=2000):
+            row = merge and model.objects.filter(variant_id=g['variant_id'], location_id=g['location_id'],
+                                                 keyword=g['keyword'], **{field: g['bucket']}).first()
+            if not row:
+                new.append(model(product_id=g['product_id'], variant_id=g['variant_id'],
+                                 location_id=g['location_id'], keyword=g['keyword'],
+                                 checks=g['checks'], outages=g['outages'],
+                                 first_seen=g['first_seen'], last_seen=g['last_seen'],
+                                 **{field: g['bucket']}))
+            else:
+                row.checks += g['checks']
+                row.outages += g['outages']
+                row.first_seen = min(row.first_seen, g['first_seen'])
+                row.last_seen = max(row.last_seen, g['last_seen'])
+                changed.append(row)
+            if len(new) >= 2000:
+                model.objects.bulk_create(new)
+                new = []
+        model.objects.bulk_create(new, batch_size=2000)
+        model.objects.bulk_update(changed, ['checks', 'outages', 'first_seen', 'last_seen'], batch_size=2000)
+
+    state.last_tracker_id = upto
+    state.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0015_metricssnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
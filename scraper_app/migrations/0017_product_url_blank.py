@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0016_backfill_tracker_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='url',
+            field=models.URLField(blank=True, max_length=1000),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper_app', '0017_product_url_blank'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='producttracker',
+            name='checked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='producttracker',
+            name='checked_date',
+            field=models.DateField(editable=False),
+        ),
+    ]
@@ -4,12 +4,26 @@ from datetime import datetime, timedelta
 
 # 1. ScrapeSession must come FIRST (before ProductTracker references it)
 class ScrapeSession(models.Model):
+    STATUS_CHOICES = [
+        ('RUNNING', 'Running'),
+        ('COMPLETE', 'Complete'),
+        ('FAILED', 'Failed'),
+    ]
+
     keyword = models.CharField(max_length=100)
     pincode = models.CharField(max_length=10)
     timestamp = models.DateTimeField(auto_now_add=True)
     total_products = models.IntegerField(default=0)
     out_of_stock_count = models.IntegerField(default=0)
     availability_rate = models.FloatField(default=0.0)
+    # Resumable scrapes: products are saved as they stream in, and
+    # checkpoint_index is the next listing position to scrape
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='COMPLETE')
+    checkpoint_index = models.IntegerField(default=0)
+    # Lease of a RUNNING session by the scrape writing it (pipeline.SessionLease):
+    # another run only resumes the session once lease_expires_at has passed
+    lease_owner = models.CharField(max_length=64, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.keyword} - {self.pincode} ({self.timestamp.strftime('%Y-%m-%d %H:%M')})"
@@ -20,11 +34,38 @@ class Product(models.Model):
     name = models.CharField(max_length=500)
     available_variants = models.TextField(blank=True)
     out_of_stock_variants = models.TextField(blank=True)
-    url = models.URLField(max_length=1000)
+    url = models.URLField(max_length=1000, blank=True)  # empty for listing cards without a product link
+    # Incremental scraping: listing-card hash, when the product page was last
+    # actually visited, and whether this row was carried over unchanged
+    card_hash = models.CharField(max_length=40, blank=True)
+    scraped_at = models.DateTimeField(null=True, blank=True)
+    carried = models.BooleanField(default=False)
+
+    def variant_names(self, available):
+        """Names of the in-stock (available=True) or out-of-stock variants, from ProductVariant"""
+        return [v.name for v in self.variants.all() if v.is_available == available]
 
     def __str__(self):
         return self.name
 
+# 2b. ProductVariant: one row per variant of a scraped product. The
+# "; "-joined Product.available_variants / out_of_stock_variants strings
+# are kept as a derived copy for old templates and code.
+class ProductVariant(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='variants')
+    session = models.ForeignKey(ScrapeSession, on_delete=models.CASCADE, related_name='variants')
+    name = models.CharField(max_length=200)
+    size = models.CharField(max_length=50, blank=True)  # normalized, e.g. "500ml", "1kg", "2x200g"
+    is_available = models.BooleanField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['session', 'is_available']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.name} ({'in stock' if self.is_available else 'out of stock'})"
+
 # 3. Alert model  
 class Alert(models.Model):
     session = models.ForeignKey(ScrapeSession, on_delete=models.CASCADE, related_name='alerts')
@@ -37,25 +78,147 @@ class Alert(models.Model):
     def __str__(self):
         return f"{self.product_name} - {self.severity}"
 
+# 4a. Catalog dimensions: the time-series tables below point at these with
+# small integer keys instead of repeating names and pincodes on every row
+class Location(models.Model):
+    pincode = models.CharField(max_length=10, unique=True)
+
+    def __str__(self):
+        return self.pincode
+
+class CatalogProduct(models.Model):
+    url = models.CharField(max_length=1000, unique=True)  # canonical product URL
+    name = models.CharField(max_length=500)
+
+    def __str__(self):
+        return self.name
+
+class CatalogVariant(models.Model):
+    product = models.ForeignKey(CatalogProduct, on_delete=models.CASCADE, related_name='variants')
+    name = models.CharField(max_length=200, blank=True)
+    size = models.CharField(max_length=50, blank=True)  # normalized, see ingestion.normalize_size
+
+    class Meta:
+        unique_together = ['product', 'name']
+
+    def __str__(self):
+        return self.name
+
 # 4. NEW: ProductTracker (now ScrapeSession is defined above)
+class ProductTrackerQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_checked_date()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class ProductTracker(models.Model):
     """Track individual product availability over time"""
-    product_name = models.CharField(max_length=500)
-    variant = models.CharField(max_length=200, blank=True)
+    product = models.ForeignKey(CatalogProduct, on_delete=models.CASCADE, related_name='tracks')
+    variant = models.ForeignKey(CatalogVariant, on_delete=models.CASCADE, related_name='tracks')
     keyword = models.CharField(max_length=100)
-    pincode = models.CharField(max_length=10)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='tracks')
     is_available = models.BooleanField()
-    checked_at = models.DateTimeField(auto_now_add=True)
+    checked_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Local (TIME_ZONE) date of checked_at, so day-bucketed queries hit an index
+    # instead of converting checked_at row by row. Derived from checked_at by
+    # save() and bulk_create(); a queryset update() of checked_at must set it too
+    checked_date = models.DateField(editable=False)
     session = models.ForeignKey(ScrapeSession, on_delete=models.CASCADE, related_name='product_tracks')
+
+    objects = ProductTrackerQuerySet.as_manager()
     
     class Meta:
         indexes = [
-            models.Index(fields=['product_name', 'checked_at']),
-            models.Index(fields=['keyword', 'pincode', 'checked_at']),
+            models.Index(fields=['product', 'checked_at']),
+            models.Index(fields=['keyword', 'location', 'checked_at']),
+            models.Index(fields=['keyword', 'location', 'is_available', 'checked_date']),
+            models.Index(fields=['checked_date', 'is_available']),
         ]
 
+    def set_checked_date(self):
+        self.checked_date = timezone.localdate(self.checked_at)
+
+    def save(self, *args, **kwargs):
+        self.set_checked_date()
+        super().save(*args, **kwargs)
+
+    @property
+    def product_name(self):
+        return self.product.name
+
+    @property
+    def pincode(self):
+        return self.location.pincode
+
     def __str__(self):
-        return f"{self.product_name} {self.variant} - {self.checked_at.date()}"
+        return f"{self.product_name} {self.variant} - {self.checked_date}"
+
+# 4b. AvailabilityRun: transition-only log next to the raw ProductTracker
+# observations. One row per stretch of unchanged availability of a variant
+# at a location; ended_at is null for the current state.
+class AvailabilityRun(models.Model):
+    product = models.ForeignKey(CatalogProduct, on_delete=models.CASCADE, related_name='runs')
+    variant = models.ForeignKey(CatalogVariant, on_delete=models.CASCADE, related_name='runs')
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='runs')
+    is_available = models.BooleanField()
+    started_at = models.DateTimeField()
+    last_seen_at = models.DateTimeField()  # last observation still in this state
+    ended_at = models.DateTimeField(null=True, blank=True)  # first observation in the next state
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['location', 'variant', 'ended_at']),
+            models.Index(fields=['location', 'is_available', 'started_at']),
+        ]
+
+    def __str__(self):
+        state = 'in stock' if self.is_available else 'out of stock'
+        return f"{self.variant} @ {self.location}: {state} since {self.started_at:%Y-%m-%d %H:%M}"
+
+# 4c. Rollups of ProductTracker at hourly and daily grain, maintained by
+# rollups.update_rollups() so analytics and alerts don't scan raw rows
+class TrackerRollup(models.Model):
+    product = models.ForeignKey(CatalogProduct, on_delete=models.CASCADE, related_name='+')
+    variant = models.ForeignKey(CatalogVariant, on_delete=models.CASCADE, related_name='+')
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='+')
+    keyword = models.CharField(max_length=100)
+    checks = models.IntegerField(default=0)
+    outages = models.IntegerField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        abstract = True
+
+class HourlyRollup(TrackerRollup):
+    hour = models.DateTimeField()  # start of the local hour
+
+    class Meta:
+        unique_together = ['variant', 'location', 'keyword', 'hour']
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+
+class DailyRollup(TrackerRollup):
+    day = models.DateField()  # local date
+
+    class Meta:
+        unique_together = ['variant', 'location', 'keyword', 'day']
+        indexes = [
+            models.Index(fields=['keyword', 'location', 'day']),
+            models.Index(fields=['day']),
+        ]
+
+class RollupState(models.Model):
+    """Highest ProductTracker id already folded into the rollups"""
+    name = models.CharField(max_length=50, unique=True)
+    last_tracker_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_tracker_id}"
 
 # 5. NEW: StockAlert
 class StockAlert(models.Model):
@@ -74,10 +237,10 @@ class StockAlert(models.Model):
         ('CRITICAL', 'Critical Priority'),
     ]
     weekly_outages = models.IntegerField(default=0)  # Add this line
-    product_name = models.CharField(max_length=500)
-    variant = models.CharField(max_length=200, blank=True)
+    product = models.ForeignKey(CatalogProduct, on_delete=models.CASCADE, related_name='stock_alerts')
+    variant = models.ForeignKey(CatalogVariant, on_delete=models.CASCADE, related_name='stock_alerts')
     keyword = models.CharField(max_length=100)
-    pincode = models.CharField(max_length=10)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='stock_alerts')
     alert_type = models.CharField(max_length=20, choices=ALERT_TYPES)
     severity = models.CharField(max_length=10, choices=SEVERITY_LEVELS)
     
@@ -93,7 +256,15 @@ class StockAlert(models.Model):
     resolved_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
-        unique_together = ['product_name', 'variant', 'keyword', 'pincode', 'alert_type']
+        unique_together = ['product', 'variant', 'keyword', 'location', 'alert_type']
+
+    @property
+    def product_name(self):
+        return self.product.name
+
+    @property
+    def pincode(self):
+        return self.location.pincode
 
     def __str__(self):
         return f"{self.product_name} {self.variant} - {self.alert_type}"
@@ -111,5 +282,42 @@ class DailyStockSummary(models.Model):
     def __str__(self):
         return f"Summary for {self.date}"
 
+# 7. NEW: ScrapeJob
+class ScrapeJob(models.Model):
+    """A scrape queued from the web UI and run by a Celery worker"""
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('COMPLETE', 'Complete'),
+        ('FAILED', 'Failed'),
+    ]
+
+    keyword = models.CharField(max_length=100)
+    pincode = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    # Latest progress reported by the scraper (see blinkit_scraper.iter_blinkit)
+    stage = models.CharField(max_length=30, blank=True)
+    scraped = models.IntegerField(default=0)
+    total = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    session = models.ForeignKey(ScrapeSession, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    @property
+    def finished(self):
+        return self.status in ('COMPLETE', 'FAILED')
 
+    def __str__(self):
+        return f"Job {self.id}: {self.keyword} - {self.pincode} ({self.status})"
+
+
+# 8. MetricsSnapshot: scraper metrics (scraper.metrics.REGISTRY.dump()) of one
+# Celery worker process, saved after every task and merged by views.metrics
+class MetricsSnapshot(models.Model):
+    process = models.CharField(max_length=200, unique=True)  # "hostname:pid"
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Metrics of {self.process} ({self.updated_at})"
@@ -0,0 +1,237 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from scraper.blinkit_scraper import scrape_blinkit
+from scraper.checkpoint import done_key
+
+from .alert_engine import SmartAlertEngine
+from .catalog import DimensionCache
+from .ingestion import INGEST_BATCH_SIZE, INGEST_MAX_DELAY, ingest_results, sync_stats
+from .models import ScrapeSession
+
+# A RUNNING session whose scrape has not renewed its lease for this long can be resumed by another run
+SESSION_LEASE = timedelta(minutes=5)
+# Lease renewals are written at most this often (seconds)
+LEASE_HEARTBEAT = 30
+
+
+class LeaseLost(Exception):
+    """Another run took over the session this scrape was writing"""
+
+
+class SessionLease:
+    """Ownership of a RUNNING ScrapeSession by the one scrape that writes it.
+
+    The owner id (a Celery task id, or a random one) and an expiry live on the
+    session. The scrape renews the expiry while it runs and checks it still
+    owns the session before every batch it saves; other runs only resume a
+    session once its lease has expired.
+    """
+
+    def __init__(self, session, owner, resumed=False):
+        self.session = session
+        self.owner = owner
+        self.resumed = resumed
+        self.renewed = time.monotonic()
+
+    @classmethod
+    def create(cls, keyword, pincode, owner=None):
+        """New RUNNING session, leased to owner"""
+        owner = owner or uuid.uuid4().hex
+        session = ScrapeSession.objects.create(keyword=keyword, pincode=pincode, status='RUNNING',
+                                               lease_owner=owner, lease_expires_at=timezone.now() + SESSION_LEASE)
+        return cls(session, owner)
+
+    @classmethod
+    def claim(cls, keyword, pincode, owner, since):
+        """Lease the newest RUNNING session started after since that nobody else holds; None if there is none.
+
+        Sessions already leased to owner (e.g. by an earlier try of the same
+        Celery task) can be claimed again right away.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            session = ScrapeSession.objects.select_for_update().filter(
+                keyword=keyword, pincode=pincode, status='RUNNING', timestamp__gte=since
+            ).filter(
+                Q(lease_owner=owner) | Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now)
+            ).order_by('-timestamp').first()
+            if session is None:
+                return None
+            session.lease_owner = owner
+            session.lease_expires_at = now + SESSION_LEASE
+            session.save(update_fields=['lease_owner', 'lease_expires_at'])
+        return cls(session, owner, resumed=True)
+
+    def _owned(self):
+        return ScrapeSession.objects.filter(pk=self.session.pk, lease_owner=self.owner)
+
+    def renew(self, force=False):
+        """Push the expiry forward (at most every LEASE_HEARTBEAT s unless forced); raises LeaseLost if it was taken"""
+        if not force and time.monotonic() - self.renewed < LEASE_HEARTBEAT:
+            return
+        expires = timezone.now() + SESSION_LEASE
+        if not self._owned().update(lease_expires_at=expires):
+            raise LeaseLost(f"session {self.session.id} is no longer leased to {self.owner}")
+        self.session.lease_expires_at = expires
+        self.renewed = time.monotonic()
+
+    def release(self):
+        """Save the session status and give the session up; raises LeaseLost if it was taken"""
+        if not self._owned().update(status=self.session.status, lease_owner='', lease_expires_at=None):
+            raise LeaseLost(f"session {self.session.id} is no longer leased to {self.owner}")
+        self.session.lease_owner = ''
+        self.session.lease_expires_at = None
+
+
+class SessionCheckpoint:
+    """Scrape checkpoint kept on a ScrapeSession and its saved products.
+
+    The scraper reports each finished product through record(); the index is
+    only written to the session together with the products it covers (see
+    ingestion.ingest_results), so a resumed scrape never skips a product that
+    is not in the DB.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.index = session.checkpoint_index
+
+    def load(self):
+        return {
+            'index': self.session.checkpoint_index,
+            'done_urls': {done_key(url, name) for url, name in self.session.products.values_list('url', 'name')},
+            'results': [],
+        }
+
+    def record(self, index, result):
+        self.index = max(self.index, index + 1)
+
+    def clear(self):
+        pass  # a finished session keeps its checkpoint_index
+
+
+class SessionSink:
+    """scrape_blinkit sink that saves products to a ScrapeSession in bulk.
+
+    Products are buffered and ingested in one transaction once
+    INGEST_BATCH_SIZE have arrived or the oldest has waited INGEST_MAX_DELAY
+    seconds, and on close(). With an alert engine, smart alerts run on every
+    ingested batch. With a SessionLease, the lease is renewed as products
+    arrive and checked before every batch is saved.
+    """
+
+    def __init__(self, session, checkpoint=None, engine=None, lease=None):
+        self.session = session
+        self.checkpoint = checkpoint
+        self.engine = engine
+        self.lease = lease
+        self.pending = []
+        self.pending_since = None
+        # Shared with the alert engine so catalog lookups are only done once per scrape
+        self.dimensions = engine.dimensions if engine else DimensionCache()
+        # A resumed session already holds products from the interrupted run
+        sync_stats(session)
+
+    @property
+    def total(self):
+        return self.session.total_products + len(self.pending)
+
+    def write(self, r):
+        if self.lease:
+            self.lease.renew()
+        if not self.pending:
+            self.pending_since = time.monotonic()
+        self.pending.append(r)
+        if (len(self.pending) >= INGEST_BATCH_SIZE
+                or time.monotonic() - self.pending_since >= INGEST_MAX_DELAY):
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.lease:
+            self.lease.renew(force=True)
+        index = self.checkpoint.index if self.checkpoint else None
+        products = ingest_results(self.session, self.pending, checkpoint_index=index, dimensions=self.dimensions)
+        self.pending = []
+        if self.engine:
+            try:
+                self.engine.process_products(self.session, products)
+            except Exception as e:
+                print(f"⚠️ Alert processing failed: {e}")
+
+    def close(self):
+        self.flush()
+
+
+def run_scrape_pipeline(keyword, pincode, smart_alerts=True, on_progress=None,
+                        lease=None, raise_errors=False, **scrape_options):
+    """Scrape, save and alert incrementally; returns the ScrapeSession.
+
+    The session is created up front and products are bulk-saved in batches
+    while the scraper yields them (a fast listing scrape lands in a single
+    transaction). With smart_alerts, alerts are generated (and emailed) for
+    every saved batch instead of after the whole scrape.
+    scrape_options go to scrape_blinkit: config=ScrapeConfig(...) or its
+    keywords (workers, profile, mode, max_products, ...) and previous.
+
+    The session is written under a SessionLease; passing the lease of an
+    unfinished session (SessionLease.claim) resumes it from its checkpoint.
+    With raise_errors the session is left RUNNING, its lease released and
+    the error re-raised so a retry can pick it up; otherwise the error is
+    logged and the session marked FAILED. LeaseLost is always re-raised
+    without touching the session, which another run now owns.
+    """
+    if lease is None:
+        lease = SessionLease.create(keyword, pincode)
+    elif lease.resumed:
+        print(f"🔁 Resuming session {lease.session.id} from product {lease.session.checkpoint_index}")
+    lease.renew(force=True)
+    session = lease.session
+    checkpoint = SessionCheckpoint(session)
+    engine = SmartAlertEngine() if smart_alerts else None
+    sink = SessionSink(session, checkpoint, engine, lease)
+    session.status = 'COMPLETE'
+
+    def progress(event):
+        if on_progress:
+            on_progress(event)
+        lease.renew()  # keeps the lease while the listing loads, before any product arrives
+
+    try:
+        scrape_blinkit(keyword, pincode, sinks=[sink], on_progress=progress,
+                       checkpoint=checkpoint, **scrape_options)
+    except LeaseLost:
+        raise
+    except Exception as e:
+        print(f"❌ Scraper error: {e}")
+        if raise_errors:
+            session.status = 'RUNNING'
+            lease.release()
+            raise
+        session.status = 'FAILED'
+        if not sink.total:
+            sink.write({
+                'product_name': f'Error scraping {keyword}',
+                'available_variants': [],
+                'out_of_stock_variants': ['Error'],
+                'url': 'https://blinkit.com'
+            })
+            sink.close()
+
+    lease.release()
+
+    if engine:
+        try:
+            engine.finish()
+        except Exception as e:
+            print(f"⚠️ Daily summary update failed: {e}")
+
+    return session
+
@@ -0,0 +1,213 @@
+"""Hourly and daily rollups of ProductTracker, and raw-row retention.
+
+update_rollups() folds tracker rows added since the last run (tracked by a
+RollupState watermark on the tracker id) into HourlyRollup and DailyRollup.
+It runs on a schedule (tasks.update_tracker_rollups); day_counts(),
+daily_rows() and hourly_rows() add the rows not folded in yet, so readers
+stay exact between runs.
+prune_trackers() deletes raw rows past the retention window once they are
+folded in, and rebuild_rollups() recomputes the rollups from the raw rows
+that are still kept.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import DailyRollup, HourlyRollup, ProductTracker, RollupState
+
+# Raw tracker rows older than this many days are deleted by prune_trackers()
+TRACKER_RETENTION_DAYS = getattr(settings, 'TRACKER_RETENTION_DAYS', 30)
+# Rows younger than this are left for the next run, so a transaction still
+# inserting trackers can't commit ids below the watermark
+ROLLUP_SETTLE = timedelta(seconds=5)
+STATE_NAME = 'tracker'
+
+# Rollup table, its bucket field and the tracker expression it buckets on
+GRAINS = [
+    (HourlyRollup, 'hour', TruncHour('checked_at')),
+    (DailyRollup, 'day', F('checked_date')),
+]
+
+
+class RollupConflict(Exception):
+    """Another worker moved the watermark while this one was folding"""
+
+
+def _fold(rows):
+    """Add the checks/outages/first/last seen of tracker rows to both rollup tables"""
+    for model, field, bucket in GRAINS:
+        groups = list(rows.annotate(bucket=bucket).values(
+            'product_id', 'variant_id', 'location_id', 'keyword', 'bucket'
+        ).annotate(
+            checks=Count('id'),
+            outages=Count('id', filter=Q(is_available=False)),
+            first_seen=Min('checked_at'),
+            last_seen=Max('checked_at'),
+        ).order_by())
+        if not groups:
+            continue
+
+        existing = {
+            (r.variant_id, r.location_id, r.keyword, getattr(r, field)): r
+            for r in model.objects.filter(**{
+                f'{field}__in': {g['bucket'] for g in groups},
+                'variant_id__in': {g['variant_id'] for g in groups},
+            })
+        }
+        new, changed = [], []
+        for g in groups:
+            row = existing.get((g['variant_id'], g['location_id'], g['keyword'], g['bucket']))
+            if row is None:
+                new.append(model(product_id=g['product_id'], variant_id=g['variant_id'],
+                                 location_id=g['location_id'], keyword=g['keyword'],
+                                 checks=g['checks'], outages=g['outages'],
+                                 first_seen=g['first_seen'], last_seen=g['last_seen'],
+                                 **{field: g['bucket']}))
+                continue
+            row.checks += g['checks']
+            row.outages += g['outages']
+            row.first_seen = min(row.first_seen, g['first_seen'])
+            row.last_seen = max(row.last_seen, g['last_seen'])
+            changed.append(row)
+        model.objects.bulk_create(new, batch_size=1000)
+        model.objects.bulk_update(changed, ['checks', 'outages', 'first_seen', 'last_seen'], batch_size=1000)
+
+
+def _watermark():
+    return RollupState.objects.filter(name=STATE_NAME).values_list('last_tracker_id', flat=True).first() or 0
+
+
+def day_bounds(day):
+    """Aware [start, end) datetimes of a local day"""
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+
+
+def day_counts(day, keyword=None, location=None, product_ids=None):
+    """variant_id -> {'product_id', 'checks', 'outages'} for a local day.
+
+    Reads the daily rollup plus the raw tracker rows not folded into it yet.
+    """
+    rollups = DailyRollup.objects.filter(day=day)
+    raw = ProductTracker.objects.filter(checked_date=day, id__gt=_watermark())
+    filters = {}
+    if keyword is not None:
+        filters['keyword'] = keyword
+    if location is not None:
+        filters['location'] = location
+    if product_ids is not None:
+        filters['product_id__in'] = product_ids
+    rollups = rollups.filter(**filters).values('variant_id', 'product_id').annotate(
+        n_checks=Sum('checks'), n_outages=Sum('outages')).order_by()
+    raw = raw.filter(**filters).values('variant_id', 'product_id').annotate(
+        n_checks=Count('id'), n_outages=Count('id', filter=Q(is_available=False))).order_by()
+
+    counts = {}
+    for row in list(rollups) + list(raw):
+        c = counts.setdefault(row['variant_id'], {'product_id': row['product_id'], 'checks': 0, 'outages': 0})
+        c['checks'] += row['n_checks']
+        c['outages'] += row['n_outages']
+    return counts
+
+
+def daily_rows(start_date, end_date, group_by=(), **filters):
+    """Checks/outages per local day and group_by fields for [start_date, end_date].
+
+    Rows from DailyRollup and from the raw tracker rows not folded in yet are
+    returned side by side ({'day', *group_by, 'checks', 'outages'}); sum them
+    per group. filters apply to both (e.g. keyword=..., location__pincode=...).
+    """
+    rollups = DailyRollup.objects.filter(day__range=[start_date, end_date], **filters).values(
+        'day', *group_by).annotate(n_checks=Sum('checks'), n_outages=Sum('outages')).order_by()
+    raw = ProductTracker.objects.filter(
+        checked_date__range=[start_date, end_date], id__gt=_watermark(), **filters
+    ).values(*group_by, day=F('checked_date')).annotate(
+        n_checks=Count('id'), n_outages=Count('id', filter=Q(is_available=False))).order_by()
+    return [_counts(row) for row in list(rollups) + list(raw)]
+
+
+def hourly_rows(start_date, end_date, group_by=(), **filters):
+    """Like daily_rows(), per hour ({'hour', *group_by, 'checks', 'outages'}) from HourlyRollup and the raw tail"""
+    start, _ = day_bounds(start_date)
+    _, end = day_bounds(end_date)
+    rollups = HourlyRollup.objects.filter(hour__gte=start, hour__lt=end, **filters).values(
+        'hour', *group_by).annotate(n_checks=Sum('checks'), n_outages=Sum('outages')).order_by()
+    raw = ProductTracker.objects.filter(
+        checked_at__gte=start, checked_at__lt=end, id__gt=_watermark(), **filters
+    ).values(*group_by, hour=TruncHour('checked_at')).annotate(
+        n_checks=Count('id'), n_outages=Count('id', filter=Q(is_available=False))).order_by()
+    return [_counts(row) for row in list(rollups) + list(raw)]
+
+
+def _counts(row):
+    row['checks'] = row.pop('n_checks')
+    row['outages'] = row.pop('n_outages')
+    return row
+
+
+def update_rollups():
+    """Fold tracker rows added since the last run into the rollups; returns the number of rows folded"""
+    state, _ = RollupState.objects.get_or_create(name=STATE_NAME)
+    last = state.last_tracker_id
+    settled = ProductTracker.objects.filter(id__gt=last, checked_at__lt=timezone.now() - ROLLUP_SETTLE)
+    upto = settled.aggregate(upto=Max('id'))['upto']
+    if upto is None:
+        return 0
+
+    rows = ProductTracker.objects.filter(id__gt=last, id__lte=upto)
+    try:
+        with transaction.atomic():
+            folded = rows.count()
+            _fold(rows)
+            # Compare-and-swap: if another worker got here first, undo this fold
+            if not RollupState.objects.filter(pk=state.pk, last_tracker_id=last).update(last_tracker_id=upto):
+                raise RollupConflict()
+    except RollupConflict:
+        return 0
+    return folded
+
+
+def rebuild_rollups():
+    """Recompute the rollups for the period still covered by raw tracker rows; returns rows folded.
+
+    Rollup buckets before the oldest raw row (already pruned periods) are kept.
+    """
+    start_day = ProductTracker.objects.aggregate(oldest=Min('checked_date'))['oldest']
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=STATE_NAME)
+        if start_day is None:
+            return 0
+        start, _ = day_bounds(start_day)
+        HourlyRollup.objects.filter(hour__gte=start).delete()
+        DailyRollup.objects.filter(day__gte=start_day).delete()
+
+        rows = ProductTracker.objects.filter(checked_date__gte=start_day)
+        folded = rows.count()
+        _fold(rows)
+        state.last_tracker_id = rows.aggregate(upto=Max('id'))['upto'] or state.last_tracker_id
+        state.save()
+    return folded
+
+
+def prune_trackers(days=TRACKER_RETENTION_DAYS, batch_size=10000):
+    """Delete raw tracker rows from before the last `days` local days; returns the number deleted.
+
+    Rows are folded into the rollups first and only rows below the rollup
+    watermark are deleted. The cutoff is a local midnight so daily rollups
+    of pruned days stay complete.
+    """
+    update_rollups()
+    watermark = _watermark()
+    cutoff = timezone.localdate() - timedelta(days=days)
+
+    deleted = 0
+    old = ProductTracker.objects.filter(checked_date__lt=cutoff, id__lte=watermark)
+    while True:
+        ids = list(old.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += ProductTracker.objects.filter(id__in=ids).delete()[0]
@@ -1,39 +1,125 @@
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+
 from celery import shared_task
-from .models import ScrapeSession, Product, Alert
-from scraper.blinkit_scraper import scrape_blinkit
+from celery.signals import task_postrun
+from django.utils import timezone
+from scraper import metrics as scraper_metrics
+from .models import Alert, MetricsSnapshot, ScrapeJob, ScrapeSession
 from .utils import send_stock_alert_email
+from .incremental import previous_fingerprint
+from .pipeline import LeaseLost, SessionLease, run_scrape_pipeline
+from .rollups import prune_trackers, update_rollups
 
-@shared_task
-def scheduled_scrape(keyword, pincode):
-    results = scrape_blinkit(keyword, pincode)
-
-    total = len(results)
-    out_of_stock = sum(1 for r in results if r['out_of_stock_variants'])
-    availability = round((total - out_of_stock) / total * 100, 2) if total else 0
-
-    session = ScrapeSession.objects.create(
-        keyword=keyword,
-        pincode=pincode,
-        total_products=total,
-        out_of_stock_count=out_of_stock,
-        availability_rate=availability
-    )
-
-    for r in results:
-        Product.objects.create(
-            session=session,
-            name=r['product_name'],
-            available_variants="; ".join(r['available_variants']),
-            out_of_stock_variants="; ".join(r['out_of_stock_variants']),
-            url=r['url']
+# An unfinished session younger than this is resumed instead of starting over
+RESUME_WINDOW = timedelta(hours=2)
+# Job progress is written to the DB at most this often (seconds), and on every stage change
+JOB_PROGRESS_INTERVAL = 2
+# Metrics snapshots of worker processes not heard from for this long are dropped
+METRICS_SNAPSHOT_MAX_AGE = timedelta(days=7)
+
+
+@task_postrun.connect
+def save_metrics_snapshot(**kwargs):
+    """Save this worker process's scraper metrics for the web /metrics/ endpoint"""
+    try:
+        MetricsSnapshot.objects.update_or_create(
+            process=f"{socket.gethostname()}:{os.getpid()}",
+            defaults={'data': scraper_metrics.REGISTRY.dump()},
         )
+        MetricsSnapshot.objects.filter(updated_at__lt=timezone.now() - METRICS_SNAPSHOT_MAX_AGE).delete()
+    except Exception as e:
+        print(f"⚠️ Could not save metrics snapshot: {e}")
+
+
+def job_progress(job):
+    """on_progress callback that keeps a ScrapeJob's stage and counts up to date"""
+    last_saved = [0.0]
+
+    def update(event):
+        stage_changed = event['stage'] != job.stage
+        job.stage = event['stage']
+        job.scraped = event['scraped']
+        job.total = event['total']
+        if stage_changed or time.monotonic() - last_saved[0] >= JOB_PROGRESS_INTERVAL:
+            job.save(update_fields=['stage', 'scraped', 'total', 'updated_at'])
+            last_saved[0] = time.monotonic()
+
+    return update
+
+
+@shared_task
+def run_scrape_job(job_id):
+    """Run a scrape queued from the web UI (views.run_scrape) and record its progress on the ScrapeJob"""
+    job = ScrapeJob.objects.get(id=job_id)
+    job.status = 'RUNNING'
+    job.save(update_fields=['status', 'updated_at'])
+    try:
+        # Workers have no display: headless "lean" Chrome, like scheduled_scrape
+        session = run_scrape_pipeline(job.keyword, job.pincode, on_progress=job_progress(job), profile="lean")
+    except Exception as e:
+        job.status = 'FAILED'
+        job.error = str(e)
+        job.save()
+        raise
+
+    job.session = session
+    job.status = 'FAILED' if session.status == 'FAILED' else 'COMPLETE'
+    job.scraped = session.total_products
+    job.stage = 'done'
+    job.save()
+
 
-    if out_of_stock:
+@shared_task(bind=True, acks_late=True, max_retries=3, default_retry_delay=60)
+def scheduled_scrape(self, keyword, pincode, workers=1, profile="lean", mode="products", incremental=True):
+    # Retries and tasks redelivered after a worker crash resume the
+    # session they left RUNNING from its checkpoint; a session another
+    # run is still writing (unexpired lease) is left alone
+    owner = self.request.id or uuid.uuid4().hex
+    lease = SessionLease.claim(keyword, pincode, owner, since=timezone.now() - RESUME_WINDOW)
+    previous = None
+    if incremental:
+        previous = previous_fingerprint(keyword, pincode, exclude=lease.session if lease else None)
+    if lease is None:
+        lease = SessionLease.create(keyword, pincode, owner)
+    session = lease.session
+
+    try:
+        session = run_scrape_pipeline(keyword, pincode, smart_alerts=False, lease=lease,
+                                      raise_errors=True, workers=workers, profile=profile,
+                                      mode=mode, previous=previous)
+    except LeaseLost as e:
+        print(f"⚠️ Stopped scraping: {e}")
+        return
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            ScrapeSession.objects.filter(pk=session.pk, status='RUNNING', lease_owner='').update(status='FAILED')
+            raise
+        raise self.retry(exc=e)
+
+    if session.out_of_stock_count:
         alert = Alert.objects.create(
             session=session,
-            product_name=results[0]['product_name'],
+            product_name=session.products.order_by('id').first().name,  # first product saved
             days_out_of_stock=1,
             alert_type='Scheduled Stock Alert',
             severity='MEDIUM'
         )
         send_stock_alert_email(session, alert)
+
+
+@shared_task
+def update_tracker_rollups():
+    folded = update_rollups()
+    print(f"📊 Folded {folded} tracker rows into the rollups")
+    return folded
+
+
+@shared_task
+def enforce_tracker_retention():
+    deleted = prune_trackers()
+    print(f"🧹 Deleted {deleted} tracker rows past the retention window")
+    return deleted
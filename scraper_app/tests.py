@@ -1,3 +1,921 @@
-from django.test import TestCase
+import functools
+import os
+import tempfile
+from contextlib import ExitStack
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from lxml import html as lxml_html
+
+from scraper import blinkit_scraper, governor, product_cache, waits
+from scraper.blinkit_scraper import CARDS_XPATH, iter_blinkit
+from scraper.checkpoint import FileCheckpoint
+from scraper.driver_pool import DriverPool
+from scraper.parser import (
+    card_fingerprint,
+    parse_card,
+    parse_product_file,
+    parse_product_html,
+    parse_product_payload,
+    product_payload_from_html,
+)
+
+from .alert_engine import SmartAlertEngine
+from .availability import outage_counts, record_observations, restocks
+from .catalog import DimensionCache
+from .filters import ProductFilter
+from .ingestion import ingest_results
+from .models import (
+    Alert,
+    AvailabilityRun,
+    CatalogProduct,
+    DailyRollup,
+    HourlyRollup,
+    Product,
+    ProductTracker,
+    ProductVariant,
+    ScrapeJob,
+    ScrapeSession,
+    StockAlert,
+)
+from .pipeline import LeaseLost, SessionLease, run_scrape_pipeline
+from .rollups import daily_rows, day_counts, prune_trackers, rebuild_rollups, update_rollups
+from .tasks import run_scrape_job, scheduled_scrape
+
+# Saved Blinkit pages used by the offline parser tests
+TESTDATA = os.path.join(os.path.dirname(__file__), 'testdata')
+
+
+def testdata(name):
+    return os.path.join(TESTDATA, name)
+
+
+def read_testdata(name):
+    with open(testdata(name), encoding='utf-8') as f:
+        return f.read()
+
+
+def card(name, size='500 ml', url=None, oos=False):
+    """Listing card summary as CARDS_JS returns it"""
+    return {'url': url, 'lines': ['9 mins', name, size, '₹28', 'Out of Stock' if oos else 'ADD']}
+
+
+def fake_listing(test, cards):
+    """Let iter_blinkit run a listing scrape over cards with no browser (pooled FakeDrivers, no caches)"""
+    stack = ExitStack()
+    stack.enter_context(mock.patch.object(blinkit_scraper, 'driver_pool', lambda profile: DriverPool(FakeDriver)))
+    stack.enter_context(mock.patch.object(blinkit_scraper, 'PRODUCT_CACHE_PATH', 'off'))
+    stack.enter_context(mock.patch.object(blinkit_scraper, 'open_search'))
+    stack.enter_context(mock.patch.object(blinkit_scraper, 'wait_for_cards'))
+    stack.enter_context(mock.patch.object(blinkit_scraper, 'collect_cards', return_value=cards))
+    test.addCleanup(stack.close)
+
+
+def saved_cards(name):
+    """Card summaries of a saved listing page, as CARDS_JS returns them in the browser"""
+    tree = lxml_html.parse(testdata(name)).getroot()
+    return [
+        {'url': card.getparent().get('href'), 'lines': [t.strip() for t in card.itertext() if t.strip()]}
+        for card in tree.xpath(CARDS_XPATH)
+    ]
+
+
+class ProductPageParserTests(SimpleTestCase):
+
+    def test_variant_rail_splits_available_and_out_of_stock(self):
+        data = parse_product_file(testdata('product_variants.html'), url='https://blinkit.com/prn/x/prid/1')
+        self.assertEqual(data['product_name'], 'Amul Taaza Toned Milk')
+        self.assertEqual(data['available_variants'], ['500 ml', '2 x 1 l'])
+        self.assertEqual(data['out_of_stock_variants'], ['200 ml'])
+        self.assertEqual(data['url'], 'https://blinkit.com/prn/x/prid/1')
+
+    def test_script_text_is_not_read_as_stock_status(self):
+        # The page state in <script> says "Out of Stock"; only the rendered rail counts
+        data = parse_product_file(testdata('product_variants.html'))
+        self.assertNotIn('500 ml', data['out_of_stock_variants'])
+
+    def test_page_without_rail_is_one_main_product(self):
+        data = parse_product_file(testdata('product_single_oos.html'))
+        self.assertEqual(data['product_name'], 'Nandini Goodlife Slim Milk')
+        self.assertEqual(data['available_variants'], [])
+        self.assertEqual(data['out_of_stock_variants'], ['Main Product'])
+
+    def test_in_stock_page_without_rail(self):
+        source = read_testdata('product_single_oos.html')
+        source = source.replace('Currently Unavailable', 'In stock').replace('Notify Me', 'Add to cart')
+        data = parse_product_html(source)
+        self.assertEqual(data['available_variants'], ['Main Product'])
+        self.assertEqual(data['out_of_stock_variants'], [])
+
+    def test_page_without_name_is_skipped(self):
+        self.assertIsNone(parse_product_html('<html><head><title>Oops</title></head><body></body></html>'))
+
+    def test_html_payload_matches_browser_payload(self):
+        # PRODUCT_PAGE_JS builds the same summary in the browser
+        source = read_testdata('product_variants.html')
+        payload = {
+            'title': 'Amul Taaza Toned Milk Price - Buy Online at Best Price in India',
+            'h2': 'Amul Taaza Toned Milk',
+            'variants': [
+                {'lines': ['200 ml', '₹14', 'Out of Stock'], 'oos': True},
+                {'lines': ['500 ml', '₹28'], 'oos': False},
+                {'lines': ['2 x 1 l', '₹132'], 'oos': False},
+            ],
+            'main_oos': False,
+        }
+        self.assertEqual(product_payload_from_html(source), payload)
+        self.assertEqual(parse_product_payload(payload), parse_product_html(source))
+
+
+class ListingCardParserTests(SimpleTestCase):
+
+    def test_cards_give_name_size_and_stock(self):
+        in_stock, out_of_stock = [parse_card(c) for c in saved_cards('listing_cards.html')]
+        self.assertEqual(in_stock, {
+            'product_name': 'Amul Taaza Toned Milk',
+            'available_variants': ['500 ml'],
+            'out_of_stock_variants': [],
+            'url': 'https://blinkit.com/prn/amul-taaza-toned-milk/prid/19512',
+        })
+        self.assertEqual(out_of_stock['product_name'], 'Mother Dairy Cow Milk')
+        self.assertEqual(out_of_stock['available_variants'], [])
+        self.assertEqual(out_of_stock['out_of_stock_variants'], ['2 x 500 ml'])
+
+    def test_card_without_name_is_skipped(self):
+        self.assertIsNone(parse_card({'url': None, 'lines': ['9 mins', '₹28', 'ADD']}))
+
+    def test_fingerprint_ignores_delivery_eta(self):
+        card = saved_cards('listing_cards.html')[0]
+        later = dict(card, lines=['14 mins'] + card['lines'][1:])
+        self.assertEqual(card_fingerprint(card), card_fingerprint(later))
+        restocked = dict(card, lines=card['lines'][:-1] + ['Out of Stock'])
+        self.assertNotEqual(card_fingerprint(card), card_fingerprint(restocked))
+
+
+class AvailabilityRunTests(TestCase):
+
+    def setUp(self):
+        dims = DimensionCache()
+        self.location = dims.location('560034')
+        product = dims.products([('https://blinkit.com/prn/milk/prid/1', 'Milk')])['https://blinkit.com/prn/milk/prid/1']
+        variants = dims.variants([(product, '500 ml'), (product, '1 l')])
+        self.small, self.large = variants[(product.id, '500 ml')], variants[(product.id, '1 l')]
+        self.start = timezone.now() - timedelta(hours=5)
+
+    def observe(self, hour, small, large=True):
+        return record_observations(self.location, [(self.small, small), (self.large, large)],
+                                   seen_at=self.start + timedelta(hours=hour))
+
+    def test_first_observation_opens_a_run_per_variant(self):
+        self.assertEqual(self.observe(0, True), 2)
+        runs = AvailabilityRun.objects.filter(ended_at__isnull=True)
+        self.assertEqual(runs.count(), 2)
+        self.assertEqual(set(runs.values_list('started_at', flat=True)), {self.start})
+
+    def test_unchanged_observation_extends_the_open_run(self):
+        self.observe(0, True)
+        self.assertEqual(self.observe(1, True), 0)
+        run = AvailabilityRun.objects.get(variant=self.small)
+        self.assertIsNone(run.ended_at)
+        self.assertEqual(run.started_at, self.start)
+        self.assertEqual(run.last_seen_at, self.start + timedelta(hours=1))
+
+    def test_change_closes_the_run_and_opens_a_new_one(self):
+        self.observe(0, True)
+        self.observe(1, True)
+        self.assertEqual(self.observe(2, False), 1)
+        self.observe(3, True)
+
+        runs = list(AvailabilityRun.objects.filter(variant=self.small).order_by('started_at'))
+        self.assertEqual([r.is_available for r in runs], [True, False, True])
+        self.assertEqual(runs[0].ended_at, self.start + timedelta(hours=2))
+        self.assertEqual(runs[1].ended_at, self.start + timedelta(hours=3))
+        self.assertIsNone(runs[2].ended_at)
+        # The variant that never changed still has its one run
+        self.assertEqual(AvailabilityRun.objects.filter(variant=self.large).count(), 1)
+
+    def test_outages_and_restocks_are_read_from_the_runs(self):
+        for hour, small in enumerate([True, False, False, True, False]):
+            self.observe(hour, small)
+        self.assertEqual(outage_counts(self.location, self.start), {self.small.id: 2})
+        self.assertEqual([r.variant_id for r in restocks(self.location, self.start)], [self.small.id])
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        dims = DimensionCache()
+        self.locations = [dims.location('560034'), dims.location('110001')]
+        products = dims.products([(f'https://blinkit.com/prn/p/prid/{i}', f'P{i}') for i in range(3)])
+        self.variants = list(dims.variants([(p, '500 ml') for p in products.values()]).values())
+        self.session = ScrapeSession.objects.create(keyword='milk', pincode='560034')
+        self.now = timezone.now()
+
+    def track(self, days_ago, hour=0):
+        """One tracker row per variant and location, checked days_ago days (and hour hours) back"""
+        at = self.now - timedelta(days=days_ago, hours=hour)
+        ProductTracker.objects.bulk_create([
+            ProductTracker(product_id=v.product_id, variant=v, location=loc, keyword='milk',
+                           is_available=(i + days_ago + hour) % 3 != 0, session=self.session, checked_at=at)
+            for loc in self.locations for i, v in enumerate(self.variants)
+        ])
+
+    def totals(self, model):
+        return model.objects.aggregate(checks=Sum('checks'), outages=Sum('outages'))
+
+    def raw_totals(self):
+        return {'checks': ProductTracker.objects.count(),
+                'outages': ProductTracker.objects.filter(is_available=False).count()}
+
+    def daily(self):
+        return sorted(DailyRollup.objects.values_list('variant_id', 'location_id', 'keyword', 'day', 'checks', 'outages'))
+
+    def test_folding_twice_gives_the_same_totals(self):
+        for day in range(5):
+            self.track(day, hour=1)
+            self.track(day, hour=7)
+        self.assertEqual(update_rollups(), 60)
+        daily, hourly = self.totals(DailyRollup), self.totals(HourlyRollup)
+        self.assertEqual(daily, self.raw_totals())
+        self.assertEqual(hourly, self.raw_totals())
+
+        self.assertEqual(update_rollups(), 0)
+        self.assertEqual(self.totals(DailyRollup), daily)
+        self.assertEqual(self.totals(HourlyRollup), hourly)
+
+    def test_rebuild_matches_incremental_folds(self):
+        for day in range(4, 1, -1):
+            self.track(day, hour=2)
+            update_rollups()
+        self.track(1, hour=3)
+        self.track(1, hour=5)
+        update_rollups()
+        incremental = self.daily()
+
+        rebuild_rollups()
+        self.assertEqual(self.daily(), incremental)
+        self.assertEqual(self.totals(HourlyRollup), self.raw_totals())
+
+    def test_readers_add_rows_not_folded_yet(self):
+        self.track(2, hour=1)
+        update_rollups()
+        self.track(2, hour=3)  # not folded
+        day = timezone.localtime(self.now - timedelta(days=2, hours=3)).date()
+
+        counts = day_counts(day)
+        self.assertEqual(sum(c['checks'] for c in counts.values()),
+                         ProductTracker.objects.filter(checked_date=day).count())
+        rows = daily_rows(day - timedelta(days=1), day + timedelta(days=1))
+        self.assertEqual(sum(r['checks'] for r in rows), ProductTracker.objects.count())
+        self.assertEqual(sum(r['outages'] for r in rows), self.raw_totals()['outages'])
+
+    def test_pruning_keeps_the_rollups(self):
+        for day in (40, 35, 2):
+            self.track(day, hour=1)
+        before = self.raw_totals()
+        self.assertEqual(prune_trackers(days=30), 12)
+        self.assertEqual(ProductTracker.objects.count(), 6)
+        self.assertEqual(self.totals(DailyRollup), before)
+
+
+class FakeDriver:
+    """Just enough of a WebDriver for DriverPool: tabs, cookies and a dead flag"""
+
+    class _SwitchTo:
+        def __init__(self, driver):
+            self.driver = driver
+
+        def window(self, handle):
+            self.driver.current = handle
+
+    def __init__(self):
+        self.handles = ['main']
+        self.current = 'main'
+        self.cookies = [{'name': 'gr_1_lat'}]
+        self.url = 'https://blinkit.com/s/?q=milk'
+        self.alive = True
+        self.quit_called = False
+        self.switch_to = self._SwitchTo(self)
+
+    @property
+    def window_handles(self):
+        if not self.alive:
+            raise ConnectionError('chrome is gone')
+        return list(self.handles)
+
+    def close(self):
+        self.handles.remove(self.current)
+
+    def execute_script(self, script, *args):
+        return None
+
+    def delete_all_cookies(self):
+        self.cookies = []
+
+    def get(self, url):
+        self.url = url
+
+    def get_log(self, kind):
+        return []  # no performance log: the lean profile's traffic meter books nothing
+
+    def quit(self):
+        self.alive = False
+        self.quit_called = True
+
+
+class DriverPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.created = []
+        self.pool = DriverPool(self.factory, max_idle=1, max_pages=3)
+
+    def factory(self):
+        self.created.append(FakeDriver())
+        return self.created[-1]
+
+    def test_returned_driver_is_reused_clean(self):
+        with self.pool.driver() as driver:
+            driver.handles.append('popup')
+        self.assertEqual(driver.handles, ['main'])
+        self.assertEqual(driver.cookies, [])
+        self.assertEqual(driver.url, 'about:blank')
+
+        with self.pool.driver() as again:
+            self.assertIs(again, driver)
+        self.assertEqual(len(self.created), 1)
+        stats = self.pool.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['idle']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 50.0)
+
+    def test_driver_is_recycled_after_max_pages(self):
+        with self.pool.driver() as driver:
+            self.pool.count_page(driver, 3)
+        self.assertTrue(driver.quit_called)
+        self.assertEqual(self.pool.stats()['recycled'], 1)
+
+        with self.pool.driver() as fresh:
+            self.assertIsNot(fresh, driver)
+
+    def test_dead_idle_driver_is_replaced(self):
+        with self.pool.driver() as driver:
+            pass
+        driver.alive = False  # Chrome crashed while idle
+
+        with self.pool.driver() as fresh:
+            self.assertIsNot(fresh, driver)
+        self.assertEqual(self.pool.stats()['unhealthy'], 1)
+        self.assertEqual(len(self.created), 2)
+
+    def test_drivers_past_max_idle_are_quit(self):
+        with self.pool.driver() as first, self.pool.driver() as second:
+            pass
+        self.assertEqual(self.pool.stats()['idle'], 1)
+        self.assertEqual([first.quit_called, second.quit_called], [True, False])
+
+    def test_sized_pool_shrinks_back_afterwards(self):
+        with self.pool.sized(3):
+            with self.pool.driver() as a, self.pool.driver() as b, self.pool.driver() as c:
+                pass
+            self.assertEqual(self.pool.stats()['idle'], 3)
+        self.assertEqual(self.pool.max_idle, 1)
+        self.assertEqual(self.pool.stats()['idle'], 1)
+        self.assertEqual(sum(d.quit_called for d in (a, b, c)), 2)
+
+
+class FakeClock:
+    """Stands in for the time module in scraper.governor; sleep() just moves the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class GovernorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(governor, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.governor = governor.Governor(governor.MemoryBackend(), rate=1.0, burst=3)
+
+    def test_burst_then_one_token_per_interval(self):
+        for _ in range(3):
+            self.governor.wait()
+        self.assertEqual(self.clock.slept, [])
+        self.governor.wait()
+        self.assertEqual(self.clock.slept, [1.0])
+
+        self.clock.now += 2  # two tokens refill, the bucket never holds more than burst
+        self.governor.wait()
+        self.governor.wait()
+        self.assertEqual(self.clock.slept, [1.0])
+        self.assertEqual(self.governor.stats()['waits'], 1)
+
+    def test_failure_halves_the_rate_once_per_cooldown(self):
+        self.governor.failure()
+        self.assertEqual(self.governor.current_rate(), 0.5)
+        self.governor.failure()  # same burst of errors
+        self.assertEqual(self.governor.current_rate(), 0.5)
+
+        self.clock.now += governor.DECREASE_COOLDOWN
+        self.governor.failure()
+        self.assertEqual(self.governor.current_rate(), 0.25)
+
+    def test_rate_never_drops_below_the_floor(self):
+        for _ in range(20):
+            self.governor.failure()
+            self.clock.now += governor.DECREASE_COOLDOWN
+        self.assertEqual(self.governor.current_rate(), governor.MIN_RATE)
+
+    def test_successes_recover_the_rate_up_to_the_cap(self):
+        self.governor.failure()
+        for _ in range(governor.INCREASE_EVERY - 1):
+            self.governor.success()
+        self.assertEqual(self.governor.current_rate(), 0.5)
+        self.governor.success()
+        self.assertAlmostEqual(self.governor.current_rate(), 0.5 + governor.INCREASE)
+
+        for _ in range(governor.INCREASE_EVERY * 200):
+            self.governor.success()
+        self.assertEqual(self.governor.current_rate(), governor.MAX_RATE)
+
+    def test_off_by_default(self):
+        self.assertIsNone(governor.get_governor('off'))
+        self.assertIsInstance(governor.get_governor('memory://').backend, governor.MemoryBackend)
+
+
+class CountingDriver:
+    """find_elements returns as many cards as the test says are on the page"""
+
+    def __init__(self, count):
+        self.count = count
+
+    def find_elements(self, by, xpath):
+        return [object()] * self.count
+
+
+class ListingWaitTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(waits, 'time', mock.Mock(monotonic=self.clock.time))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_scroll_wait_ends_when_more_cards_arrive(self):
+        driver = CountingDriver(20)
+        settled = waits.listing_settled(CARDS_XPATH, quiet_ms=700)
+        self.assertFalse(settled(driver))
+        self.clock.now += 0.1
+        driver.count = 30
+        self.assertEqual(settled(driver), 30)
+
+    def test_scroll_wait_ends_when_nothing_comes(self):
+        driver = CountingDriver(20)
+        settled = waits.listing_settled(CARDS_XPATH, quiet_ms=700)
+        self.assertFalse(settled(driver))
+        self.clock.now += 0.5
+        self.assertFalse(settled(driver))
+        self.clock.now += 0.2
+        self.assertEqual(settled(driver), 20)
+
+    def test_cards_stable_waits_for_the_count_to_hold(self):
+        driver = CountingDriver(0)
+        stable = waits.cards_stable(CARDS_XPATH, quiet_ms=500)
+        self.assertFalse(stable(driver))
+        driver.count = 8
+        self.clock.now += 1
+        self.assertFalse(stable(driver))  # still arriving
+        self.clock.now += 0.5
+        self.assertEqual(stable(driver), 8)
+
+
+class ListingScrapeTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cards = [
+            card('Amul Taaza'),
+            card('Mother Dairy Cow Milk', oos=True),
+            card('Nandini Goodlife'),
+            card('Amul Gold', url='https://blinkit.com/prn/amul-gold/prid/1'),
+        ]
+        fake_listing(self, self.cards)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoint = FileCheckpoint(os.path.join(tmp.name, 'milk.checkpoint.jsonl'))
+
+    def test_cards_without_a_link_keep_an_empty_url(self):
+        items = list(iter_blinkit('milk', '560034', mode='listing'))
+        self.assertEqual([i['url'] for i in items], ['', '', '', 'https://blinkit.com/prn/amul-gold/prid/1'])
+        self.assertEqual(items[1]['out_of_stock_variants'], ['500 ml'])
+
+    def test_resumed_listing_scrape_skips_done_cards(self):
+        first = list(iter_blinkit('milk', '560034', mode='listing', max_products=2, checkpoint=self.checkpoint))
+        self.assertEqual([i['product_name'] for i in first], ['Amul Taaza', 'Mother Dairy Cow Milk'])
+
+        rest = list(iter_blinkit('milk', '560034', mode='listing', checkpoint=self.checkpoint))
+        self.assertEqual([i['product_name'] for i in rest], ['Nandini Goodlife', 'Amul Gold'])
+        self.assertEqual(len(self.checkpoint.load()['results']), 4)
+
+
+class CatalogIngestionTests(TestCase):
+
+    def setUp(self):
+        self.session = ScrapeSession.objects.create(keyword='milk', pincode='560034')
+
+    def result(self, name, url, available=(), out_of_stock=()):
+        return {'product_name': name, 'available_variants': list(available),
+                'out_of_stock_variants': list(out_of_stock), 'url': url}
+
+    def run_state(self, name):
+        return AvailabilityRun.objects.get(product__name=name, variant__name='500 ml').is_available
+
+    def test_products_sharing_one_url_stay_apart(self):
+        # Listing cards without a link: older scrapes saved the search page URL, newer ones none
+        search_url = 'https://www.blinkit.com/s/?q=milk'
+        ingest_results(self.session, [
+            self.result('Amul Taaza', search_url, available=['500 ml']),
+            self.result('Mother Dairy Cow Milk', search_url, out_of_stock=['500 ml']),
+            self.result('Nandini', '', out_of_stock=['500 ml']),
+        ])
+        self.assertEqual(sorted(CatalogProduct.objects.values_list('url', flat=True)),
+                         ['name:Amul Taaza', 'name:Mother Dairy Cow Milk', 'name:Nandini'])
+        self.assertTrue(self.run_state('Amul Taaza'))
+        self.assertFalse(self.run_state('Mother Dairy Cow Milk'))
+        self.assertFalse(self.run_state('Nandini'))
+
+    def test_product_urls_are_keyed_canonically(self):
+        ingest_results(self.session, [
+            self.result('Amul Gold', 'https://www.blinkit.com/prn/amul-gold/prid/1?src=search', available=['1 l']),
+            self.result('Amul Gold', 'https://blinkit.com/prn/amul-gold/prid/1/', available=['1 l']),
+        ])
+        self.assertEqual(list(CatalogProduct.objects.values_list('url', flat=True)),
+                         ['https://blinkit.com/prn/amul-gold/prid/1'])
+
+    def test_failed_scrape_placeholder_gets_no_catalog_or_tracker_rows(self):
+        products = ingest_results(self.session, [
+            self.result('Error scraping milk', 'https://blinkit.com', out_of_stock=['Error']),
+        ])
+        SmartAlertEngine().process_products(self.session, products)
+        self.assertEqual(self.session.products.count(), 1)
+        self.assertFalse(CatalogProduct.objects.exists())
+        self.assertFalse(ProductTracker.objects.exists())
+        self.assertFalse(AvailabilityRun.objects.exists())
+
+
+class SessionLeaseTests(TestCase):
+
+    def setUp(self):
+        self.since = timezone.now() - timedelta(hours=1)
+        self.lease = SessionLease.create('milk', '560034', owner='task-1')
+
+    def claim(self, owner):
+        return SessionLease.claim('milk', '560034', owner, self.since)
+
+    def expire(self):
+        ScrapeSession.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+
+    def test_held_lease_is_not_claimed_by_others(self):
+        self.assertIsNone(self.claim('task-2'))
+        again = self.claim('task-1')  # a retry of the same task
+        self.assertEqual(again.session, self.lease.session)
+        self.assertTrue(again.resumed)
+
+    def test_expired_lease_is_taken_over(self):
+        self.expire()
+        taken = self.claim('task-2')
+        self.assertEqual(taken.session, self.lease.session)
+        self.assertEqual(ScrapeSession.objects.get().lease_owner, 'task-2')
+        with self.assertRaises(LeaseLost):
+            self.lease.renew(force=True)
+        with self.assertRaises(LeaseLost):
+            self.lease.release()
+
+    def test_renew_pushes_the_expiry(self):
+        self.expire()
+        self.lease.renew()  # within the heartbeat: nothing written
+        self.assertLess(ScrapeSession.objects.get().lease_expires_at, timezone.now())
+        self.lease.renew(force=True)
+        self.assertGreater(ScrapeSession.objects.get().lease_expires_at, timezone.now())
+        self.assertIsNone(self.claim('task-2'))
+
+    def test_release_saves_the_status_and_frees_the_session(self):
+        self.lease.session.status = 'RUNNING'  # e.g. left for a retry
+        self.lease.release()
+        session = ScrapeSession.objects.get()
+        self.assertEqual((session.status, session.lease_owner, session.lease_expires_at), ('RUNNING', '', None))
+        self.assertEqual(self.claim('task-2').session, session)
+
+    def test_finished_and_old_sessions_are_not_claimed(self):
+        self.expire()
+        ScrapeSession.objects.update(status='COMPLETE')
+        self.assertIsNone(self.claim('task-2'))
+        ScrapeSession.objects.update(status='RUNNING', timestamp=self.since - timedelta(minutes=1))
+        self.assertIsNone(self.claim('task-2'))
+
+
+class ResumeTests(TestCase):
+
+    def setUp(self):
+        fake_listing(self, [
+            card('Amul Taaza'),
+            card('Mother Dairy Cow Milk', oos=True),
+            card('Nandini Goodlife'),
+            card('Amul Gold', url='https://blinkit.com/prn/amul-gold/prid/1'),
+        ])
+
+    def crash_at(self, name):
+        parse_card = blinkit_scraper.parse_card
+
+        def parse(card):
+            if name in card['lines']:
+                raise RuntimeError('chrome died')
+            return parse_card(card)
+        return mock.patch.object(blinkit_scraper, 'parse_card', parse)
+
+    def test_resumed_listing_scrape_saves_each_product_once(self):
+        with self.crash_at('Nandini Goodlife'), self.assertRaises(RuntimeError):
+            run_scrape_pipeline('milk', '560034', smart_alerts=False, raise_errors=True, mode='listing')
+        session = ScrapeSession.objects.get()
+        self.assertEqual((session.status, session.total_products), ('RUNNING', 2))
+
+        lease = SessionLease.claim('milk', '560034', 'retry', timezone.now() - timedelta(hours=1))
+        session = run_scrape_pipeline('milk', '560034', smart_alerts=False, lease=lease, mode='listing')
+        names = list(session.products.order_by('id').values_list('name', flat=True))
+        self.assertEqual(names, ['Amul Taaza', 'Mother Dairy Cow Milk', 'Nandini Goodlife', 'Amul Gold'])
+        self.assertEqual((session.status, session.total_products, session.out_of_stock_count), ('COMPLETE', 4, 1))
+
+
+class ProductCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.clock = FakeClock()
+        patcher = mock.patch.object(product_cache, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = product_cache.ProductCache(os.path.join(tmp.name, 'products.sqlite3'), ttl=60, max_entries=2)
+        self.milk = {'product_name': 'Amul Taaza', 'available_variants': ['500 ml'], 'out_of_stock_variants': []}
+
+    def test_canonical_url(self):
+        for url in ['https://www.blinkit.com/prn/amul-taaza/prid/1',
+                    'http://blinkit.com/prn/amul-taaza/prid/1/',
+                    'https://Blinkit.com/prn/amul-taaza/prid/1?src=search#top']:
+            self.assertEqual(product_cache.canonical_url(url), 'https://blinkit.com/prn/amul-taaza/prid/1')
+
+    def test_hit_across_url_spellings_and_per_pincode(self):
+        self.cache.put('https://www.blinkit.com/prn/amul-taaza/prid/1?src=milk', '560034', self.milk)
+        url = 'https://blinkit.com/prn/amul-taaza/prid/1/'
+        self.assertEqual(self.cache.get(url, '560034'), dict(self.milk, url=url))
+        self.assertIsNone(self.cache.get(url, '110001'))
+        self.assertEqual(self.cache.stats()['hit_rate'], 50.0)
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.put('https://blinkit.com/prn/a/prid/1', '560034', self.milk)
+        self.clock.now += 61
+        self.assertIsNone(self.cache.get('https://blinkit.com/prn/a/prid/1', '560034'))
+        self.assertEqual(self.cache.stats()['expired'], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for i in (1, 2):
+            self.cache.put(f'https://blinkit.com/prn/p/prid/{i}', '560034', self.milk)
+            self.clock.now += 1
+        self.cache.get('https://blinkit.com/prn/p/prid/1', '560034')  # 2 is now the oldest used
+        self.clock.now += 1
+        self.cache.put('https://blinkit.com/prn/p/prid/3', '560034', self.milk)
+
+        self.assertIsNone(self.cache.get('https://blinkit.com/prn/p/prid/2', '560034'))
+        self.assertIsNotNone(self.cache.get('https://blinkit.com/prn/p/prid/1', '560034'))
+        self.assertEqual(self.cache.stats()['evicted'], 1)
+
+
+class ScrapeJobViewTests(TestCase):
+
+    def post(self):
+        return self.client.post(reverse('run_scrape'), {'keyword': 'milk', 'pincode': '560034'},
+                                HTTP_ACCEPT='application/json')
+
+    @mock.patch('scraper_app.views.run_scrape_job')
+    def test_post_queues_a_job(self, task):
+        response = self.post()
+        job = ScrapeJob.objects.get()
+        task.delay.assert_called_once_with(job.id)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'QUEUED')
+        self.assertEqual(response.json()['status_url'], reverse('scrape_job_status', args=[job.id]))
+
+    @mock.patch('scraper_app.views.run_scrape_job')
+    def test_job_fails_when_the_broker_is_down(self, task):
+        task.delay.side_effect = ConnectionError('redis is down')
+        self.assertEqual(self.post().json()['status'], 'FAILED')
+        self.assertIn('redis is down', ScrapeJob.objects.get().error)
+
+    def test_status_of_a_finished_job_links_its_dashboard(self):
+        session = ScrapeSession.objects.create(keyword='milk', pincode='560034')
+        job = ScrapeJob.objects.create(keyword='milk', pincode='560034', status='COMPLETE', session=session)
+        status = self.client.get(reverse('scrape_job_status', args=[job.id])).json()
+        self.assertTrue(status['finished'])
+        self.assertEqual(status['dashboard_url'], reverse('dashboard', args=[session.id]))
+        self.assertRedirects(self.client.get(reverse('scrape_job', args=[job.id])),
+                             reverse('dashboard', args=[session.id]), fetch_redirect_response=False)
+
+    def test_unknown_job_is_a_404(self):
+        self.assertEqual(self.client.get(reverse('scrape_job_status', args=[404])).status_code, 404)
+
+
+class ScrapeTaskTests(TestCase):
+
+    def setUp(self):
+        fake_listing(self, [
+            card('Amul Taaza'),
+            card('Mother Dairy Cow Milk', oos=True),
+            card('Nandini Goodlife'),
+        ])
+        self.crashes = 0
+        parse_card = blinkit_scraper.parse_card
+
+        def parse(card):
+            if self.crashes and 'Nandini Goodlife' in card['lines']:
+                self.crashes -= 1
+                raise RuntimeError('chrome died')
+            return parse_card(card)
+        patcher = mock.patch.object(blinkit_scraper, 'parse_card', parse)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scheduled(self, task_id='beat-1'):
+        return scheduled_scrape.apply(args=['milk', '560034'], kwargs={'mode': 'listing'}, task_id=task_id)
+
+    def test_run_scrape_job_records_the_session(self):
+        job = ScrapeJob.objects.create(keyword='milk', pincode='560034')
+        listing = functools.partial(run_scrape_pipeline, mode='listing')  # the fake browser only has a listing
+        with mock.patch('scraper_app.tasks.run_scrape_pipeline', listing):
+            run_scrape_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.stage, job.scraped), ('COMPLETE', 'done', 3))
+        self.assertEqual(job.session.products.count(), 3)
+
+    def test_run_scrape_job_marks_a_crashed_job_failed(self):
+        job = ScrapeJob.objects.create(keyword='milk', pincode='560034')
+        with mock.patch('scraper_app.tasks.run_scrape_pipeline', side_effect=RuntimeError('no chrome')):
+            with self.assertRaises(RuntimeError):
+                run_scrape_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('FAILED', 'no chrome'))
+
+    def test_retry_resumes_the_session_it_left_running(self):
+        self.crashes = 1
+        self.scheduled()
+        session = ScrapeSession.objects.get()
+        self.assertEqual(session.status, 'COMPLETE')
+        self.assertEqual(list(session.products.order_by('id').values_list('name', flat=True)),
+                         ['Amul Taaza', 'Mother Dairy Cow Milk', 'Nandini Goodlife'])
+        self.assertEqual(Alert.objects.get().product_name, 'Amul Taaza')
+
+    def test_session_leased_by_another_run_is_left_alone(self):
+        other = SessionLease.create('milk', '560034', owner='beat-0').session
+        self.scheduled()
+        self.assertEqual(ScrapeSession.objects.count(), 2)
+        other.refresh_from_db()
+        self.assertEqual((other.status, other.total_products, other.lease_owner), ('RUNNING', 0, 'beat-0'))
+
+    def test_session_is_failed_once_retries_run_out(self):
+        self.crashes = scheduled_scrape.max_retries + 1
+        result = self.scheduled()
+        self.assertIsInstance(result.result, RuntimeError)
+        session = ScrapeSession.objects.get()
+        self.assertEqual((session.status, session.total_products), ('FAILED', 2))
+
+
+class ProductVariantIngestionTests(TestCase):
+
+    def setUp(self):
+        self.session = ScrapeSession.objects.create(keyword='milk', pincode='560034')
+        ingest_results(self.session, [
+            {'product_name': 'Amul Taaza', 'available_variants': ['500 ml', '2 x 1 L'],
+             'out_of_stock_variants': ['200 ml'], 'url': 'https://blinkit.com/prn/amul-taaza/prid/1'},
+            {'product_name': 'Mother Dairy Cow Milk', 'available_variants': ['1 ltr'],
+             'out_of_stock_variants': [], 'url': 'https://blinkit.com/prn/mother-dairy/prid/2'},
+            {'product_name': 'Nandini', 'available_variants': [],
+             'out_of_stock_variants': ['Main Product'], 'url': 'https://blinkit.com/prn/nandini/prid/3'},
+        ])
+
+    def test_variant_rows_are_written(self):
+        rows = ProductVariant.objects.filter(session=self.session).order_by('id')
+        self.assertEqual(
+            [(v.product.name, v.name, v.size, v.is_available) for v in rows],
+            [('Amul Taaza', '500 ml', '500ml', True),
+             ('Amul Taaza', '2 x 1 L', '2x1l', True),
+             ('Amul Taaza', '200 ml', '200ml', False),
+             ('Mother Dairy Cow Milk', '1 ltr', '1l', True),
+             ('Nandini', 'Main Product', '', False)])
+        self.assertEqual(Product.objects.get(name='Amul Taaza').out_of_stock_variants, '200 ml')
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.total_products, self.session.out_of_stock_count), (3, 2))
+
+    def test_stock_status_filter_matches_the_variant_strings(self):
+        # Before ProductVariant, "has issues" meant a non-empty out_of_stock_variants string
+        products = Product.objects.filter(session=self.session)
+        issues = ProductFilter({'stock_status': 'issues'}, queryset=products).qs
+        in_stock = ProductFilter({'stock_status': 'in_stock'}, queryset=products).qs
+        self.assertEqual(set(issues), set(products.exclude(out_of_stock_variants='')))
+        self.assertEqual(set(in_stock), set(products.filter(out_of_stock_variants='')))
+        self.assertEqual({p.name for p in issues}, {'Amul Taaza', 'Nandini'})
+
+
+class FrequentOutageAlertTests(TestCase):
+
+    def scrape(self, days_ago=0, out_of_stock=True):
+        """One scrape of a single product, its tracker rows moved days_ago back; returns the alerts it raised"""
+        session = ScrapeSession.objects.create(keyword='milk', pincode='560034')
+        products = ingest_results(session, [{
+            'product_name': 'Amul Taaza', 'url': 'https://blinkit.com/prn/amul-taaza/prid/1',
+            'available_variants': ['1 l'] if out_of_stock else ['1 l', '500 ml'],
+            'out_of_stock_variants': ['500 ml'] if out_of_stock else [],
+        }])
+        alerts = SmartAlertEngine().process_products(session, products)
+        at = timezone.now() - timedelta(days=days_ago)
+        ProductTracker.objects.filter(session=session).update(checked_at=at, checked_date=timezone.localdate(at))
+        return alerts
+
+    def frequent(self):
+        return StockAlert.objects.filter(alert_type='FREQUENT_OUTAGE', variant__name='500 ml').first()
+
+    def test_out_of_stock_all_week_counts_every_observation(self):
+        for days_ago in (3, 2):
+            self.scrape(days_ago)
+        update_rollups()  # older observations come from the rollups, newer ones from the raw rows
+        self.scrape(1)
+        self.scrape()
+
+        alert = self.frequent()
+        self.assertEqual(alert.weekly_outages, 4)
+        self.assertIn('had 4 outages this week', alert.message)
+        # One unbroken outage in the availability log all the same
+        self.assertEqual(AvailabilityRun.objects.filter(variant__name='500 ml').count(), 1)
+
+    def test_observations_older_than_a_week_do_not_count(self):
+        for days_ago in (9, 8, 0):
+            self.scrape(days_ago)
+        self.assertIsNone(self.frequent())
+        self.scrape()
+        self.assertIsNone(self.frequent())
+        self.scrape()
+        self.assertEqual(self.frequent().weekly_outages, 3)
+
+
+class TrackerCheckedDateTests(TestCase):
+
+    def setUp(self):
+        dims = DimensionCache()
+        self.location = dims.location('560034')
+        product = dims.products([('https://blinkit.com/prn/milk/prid/1', 'Milk')])['https://blinkit.com/prn/milk/prid/1']
+        self.variant = dims.variants([(product, '500 ml')])[(product.id, '500 ml')]
+        self.session = ScrapeSession.objects.create(keyword='milk', pincode='560034')
+        # 23:59:30 local time, two days ago
+        self.before_midnight = timezone.localtime().replace(hour=23, minute=59, second=30) - timedelta(days=2)
+
+    def tracker(self, **fields):
+        return ProductTracker(product=self.variant.product, variant=self.variant, location=self.location,
+                              keyword='milk', is_available=False, session=self.session, **fields)
+
+    def test_save_takes_the_day_of_checked_at(self):
+        row = self.tracker(checked_at=self.before_midnight)
+        row.save()
+        self.assertEqual(row.checked_date, self.before_midnight.date())
+
+    def test_row_built_before_midnight_and_saved_after_keeps_its_day(self):
+        row = self.tracker()
+        row.checked_at = self.before_midnight  # as if built then and saved a minute later
+        with mock.patch('django.utils.timezone.now', return_value=self.before_midnight + timedelta(minutes=1)):
+            row.save()
+        self.assertEqual(ProductTracker.objects.get().checked_date, self.before_midnight.date())
+
+    def test_bulk_create_takes_the_day_of_each_row(self):
+        after_midnight = self.before_midnight + timedelta(minutes=1)
+        ProductTracker.objects.bulk_create([self.tracker(checked_at=self.before_midnight),
+                                            self.tracker(checked_at=after_midnight)])
+        self.assertEqual(list(ProductTracker.objects.order_by('id').values_list('checked_date', flat=True)),
+                         [self.before_midnight.date(), after_midnight.date()])
+
+    def test_alert_engine_trackers_match_their_checked_at(self):
+        products = ingest_results(self.session, [{
+            'product_name': 'Milk', 'url': 'https://blinkit.com/prn/milk/prid/1',
+            'available_variants': [], 'out_of_stock_variants': ['500 ml'],
+        }])
+        SmartAlertEngine().process_products(self.session, products)
+        row = ProductTracker.objects.get()
+        self.assertEqual(row.checked_date, timezone.localdate(row.checked_at))
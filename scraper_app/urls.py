@@ -64,6 +64,8 @@ urlpatterns = [
 
     path('', views.landing_dashboard, name='home'),  # Landing page
     path('run/', views.run_scrape, name='run_scrape'),
+    path('jobs/<int:job_id>/', views.scrape_job, name='scrape_job'),
+    path('api/jobs/<int:job_id>/', views.scrape_job_status, name='scrape_job_status'),
     path('dashboard/<int:session_id>/', views.dashboard, name='dashboard'),
     path('historical/', views.historical_data, name='historical_data'),
     path('sessions/', views.sessions_list, name='sessions_list'),
@@ -71,6 +73,7 @@ urlpatterns = [
     path('alerts/', views.alerts_dashboard, name='alerts_dashboard'),
     
     path('api/chart-data/', views.chart_data, name='chart_data'),
+    path('metrics/', views.metrics, name='metrics'),
     path('sessions/<int:session_id>/products/', views.products_list, name='products_list'),
     path('export/session/<int:session_id>/excel/', views.export_session_excel, name='export_session_excel'),
     path('export/session/<int:session_id>/csv/', views.export_session_csv, name='export_session_csv'),
@@ -14,19 +14,20 @@ from .models import ScrapeSession, StockAlert
 from django.db.models import Q
 from django.shortcuts import render, redirect, get_object_or_404
 from django.db.models import Avg
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse
 from django.core.paginator import Paginator
+from django.urls import reverse
 from django.utils import timezone
 
 import pandas as pd
-from io import BytesIO
-import openpyxl.styles
+import tempfile
 
-from .models import ScrapeSession, Product, Alert, StockAlert
+from .models import ScrapeSession, Product, Alert, StockAlert, ScrapeJob, MetricsSnapshot
 from .filters import SessionFilter, ProductFilter
 from .utils import send_stock_alert_email
-from .alert_engine import process_session_alerts
-from scraper.blinkit_scraper import scrape_blinkit
+from .tasks import run_scrape_job
+from scraper import metrics as scraper_metrics
+from scraper.excel import StreamingWorkbook
 
 
 def run_scrape(request):
@@ -34,52 +35,55 @@ def run_scrape(request):
         keyword = request.POST['keyword']
         pincode = request.POST['pincode']
 
-        # Run scraper
+        # The scrape runs on a Celery worker; the request returns right away
+        job = ScrapeJob.objects.create(keyword=keyword, pincode=pincode)
         try:
-            results = scrape_blinkit(keyword, pincode) or []
+            run_scrape_job.delay(job.id)
         except Exception as e:
-            print(f"❌ Scraper error: {e}")
-            results = [{
-                'product_name': f'Error scraping {keyword}',
-                'available_variants': [],
-                'out_of_stock_variants': ['Error'],
-                'url': 'https://blinkit.com'
-            }]
-
-        # Session summary
-        total_products = len(results)
-        out_of_stock_count = sum(bool(r['out_of_stock_variants']) for r in results)
-        availability_rate = round((total_products - out_of_stock_count) / total_products * 100, 2) if total_products else 0
-
-        session = ScrapeSession.objects.create(
-            keyword=keyword,
-            pincode=pincode,
-            total_products=total_products,
-            out_of_stock_count=out_of_stock_count,
-            availability_rate=availability_rate
-        )
-
-        # Save products
-        for r in results:
-            Product.objects.create(
-                session=session,
-                name=r['product_name'],
-                available_variants="; ".join(r['available_variants']),
-                out_of_stock_variants="; ".join(r['out_of_stock_variants']),
-                url=r['url']
-            )
-
-        # Smart alerts
-        try:
-            process_session_alerts(session)
-        except Exception as e:
-            print(f"⚠️ Alert processing failed: {e}")
+            print(f"❌ Could not queue scrape job {job.id}: {e}")
+            job.status = 'FAILED'
+            job.error = f"Could not queue the scrape: {e}"
+            job.save(update_fields=['status', 'error', 'updated_at'])
 
-        return redirect('dashboard', session_id=session.id)
+        if 'application/json' in request.headers.get('Accept', ''):
+            return JsonResponse(job_status_data(job), status=202)
+        return redirect('scrape_job', job_id=job.id)
 
     return render(request, 'scraper_app/rs_index.html')
 
 
+def job_status_data(job):
+    data = {
+        'job_id': job.id,
+        'keyword': job.keyword,
+        'pincode': job.pincode,
+        'status': job.status,
+        'stage': job.stage,
+        'scraped': job.scraped,
+        'total': job.total,
+        'error': job.error,
+        'finished': job.finished,
+        'status_url': reverse('scrape_job_status', args=[job.id]),
+        'dashboard_url': None,
+    }
+    if job.session_id:
+        data['dashboard_url'] = reverse('dashboard', args=[job.session_id])
+    return data
+
+
+def scrape_job(request, job_id):
+    """Progress page for a queued scrape; moves on to the dashboard when it finishes"""
+    job = get_object_or_404(ScrapeJob, id=job_id)
+    if job.finished and job.session_id:
+        return redirect('dashboard', session_id=job.session_id)
+    return render(request, 'scraper_app/Js_index.html', {'job': job, 'status': job_status_data(job)})
+
+
+def scrape_job_status(request, job_id):
+    job = get_object_or_404(ScrapeJob, id=job_id)
+    return JsonResponse(job_status_data(job))
+
+
 def dashboard(request, session_id):
     session = get_object_or_404(ScrapeSession, id=session_id)
     products = session.products.all()
@@ -107,6 +111,20 @@ def chart_data(request):
     return JsonResponse(data)
 
 
+def metrics(request):
+    """Scraper stage timings and counters, in Prometheus text format.
+
+    Scrapes run in Celery workers, so this adds up the snapshots the worker
+    processes save after every task (tasks.save_metrics_snapshot) and this
+    process's own registry.
+    """
+    registry = scraper_metrics.MetricsRegistry()
+    for data in MetricsSnapshot.objects.values_list('data', flat=True):
+        registry.merge(data)
+    registry.merge(scraper_metrics.REGISTRY.dump())
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4')
+
+
 def compare_sessions(request):
     sessions = ScrapeSession.objects.all().order_by('-timestamp')[:5]
     avg_availability = sessions.aggregate(Avg('availability_rate'))['availability_rate__avg'] or 0
@@ -118,110 +136,106 @@ def compare_sessions(request):
     })
 
 
-def export_session_excel(request, session_id):
-    session = get_object_or_404(ScrapeSession, id=session_id)
-    products = session.products.all()
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Session summary sheet
-        summary_df = pd.DataFrame({
-            'Metric': ['Session ID', 'Keyword', 'Pincode', 'Date & Time', 'Total Products', 'Out of Stock', 'Availability Rate'],
-            'Value': [
-                session.id, session.keyword, session.pincode,
-                session.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                session.total_products, session.out_of_stock_count, f"{session.availability_rate}%"
-            ]
-        })
-        summary_df.to_excel(writer, sheet_name='Session_Summary', index=False)
-
-        # Products sheet
-        products_df = pd.DataFrame([{
-            'Product Name': p.name,
-            'Available Variants': p.available_variants,
-            'Out of Stock Variants': p.out_of_stock_variants,
-            'Stock Status': 'In Stock' if not p.out_of_stock_variants else 'Has Stock Issues',
-            'URL': p.url
-        } for p in products])
-        products_df.to_excel(writer, sheet_name='Products', index=False)
-
-        # Style headers
-        for sheet in ['Session_Summary', 'Products']:
-            ws = writer.sheets[sheet]
-            for cell in ws[1]:
-                cell.font = openpyxl.styles.Font(bold=True)
-                cell.fill = openpyxl.styles.PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
+
+def xlsx_response(workbook, filename):
+    """Stream a StreamingWorkbook to the client through a temp file"""
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
     output.seek(0)
-    response = HttpResponse(output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename="session_{session.id}.xlsx"'
-    return response
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
 
 
-def export_all_excel(request):
-    sessions = ScrapeSession.objects.all().order_by('-timestamp')
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # All sessions
-        sessions_df = pd.DataFrame([{
-            'Session ID': s.id, 'Keyword': s.keyword, 'Pincode': s.pincode,
-            'Date': s.timestamp.strftime('%Y-%m-%d'), 'Time': s.timestamp.strftime('%H:%M:%S'),
-            'Total Products': s.total_products, 'Out of Stock': s.out_of_stock_count,
-            'In Stock': s.total_products - s.out_of_stock_count, 'Availability Rate': s.availability_rate
-        } for s in sessions])
-        sessions_df.to_excel(writer, sheet_name='All_Sessions', index=False)
-
-        # All products
-        all_products = []
-        for s in sessions:
-            for p in s.products.all():
-                all_products.append({
-                    'Session ID': s.id,
-                    'Session Date': s.timestamp.strftime('%Y-%m-%d'),
-                    'Keyword': s.keyword,
-                    'Pincode': s.pincode,
-                    'Product Name': p.name,
-                    'Available Variants': p.available_variants,
-                    'Out of Stock Variants': p.out_of_stock_variants,
-                    'Stock Status': 'In Stock' if not p.out_of_stock_variants else 'Has Issues',
-                    'URL': p.url
-                })
-        pd.DataFrame(all_products).to_excel(writer, sheet_name='All_Products', index=False)
-
-        # Alerts
-        all_alerts = []
-        for s in sessions:
-            for a in s.alerts.all():
-                all_alerts.append({
-                    'Session ID': s.id,
-                    'Date': s.timestamp.strftime('%Y-%m-%d'),
-                    'Product Name': a.product_name,
-                    'Alert Type': a.alert_type,
-                    'Severity': a.severity,
-                    'Days Out of Stock': a.days_out_of_stock
-                })
-        if all_alerts:
-            pd.DataFrame(all_alerts).to_excel(writer, sheet_name='Alerts', index=False)
+def export_session_excel(request, session_id):
+    session = get_object_or_404(ScrapeSession, id=session_id)
+    workbook = StreamingWorkbook()
+
+    # Session summary sheet
+    summary = workbook.add_sheet('Session_Summary', ['Metric', 'Value'])
+    summary.append(['Session ID', session.id])
+    summary.append(['Keyword', session.keyword])
+    summary.append(['Pincode', session.pincode])
+    summary.append(['Date & Time', session.timestamp.strftime('%Y-%m-%d %H:%M:%S')])
+    summary.append(['Total Products', session.total_products])
+    summary.append(['Out of Stock', session.out_of_stock_count])
+    summary.append(['Availability Rate', f"{session.availability_rate}%"])
+
+    # Products sheet
+    products = workbook.add_sheet('Products', [
+        'Product Name', 'Available Variants', 'Out of Stock Variants', 'Stock Status', 'URL'
+    ])
+    for p in session.products.prefetch_related('variants').iterator(chunk_size=2000):
+        out_of_stock = p.variant_names(False)
+        products.append([
+            p.name,
+            "; ".join(p.variant_names(True)),
+            "; ".join(out_of_stock),
+            'In Stock' if not out_of_stock else 'Has Stock Issues',
+            p.url,
+        ])
+
+    return xlsx_response(workbook, f"session_{session.id}.xlsx")
 
-    output.seek(0)
-    resp = HttpResponse(output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    resp['Content-Disposition'] = f'attachment; filename="all_data.xlsx"'
-    return resp
+
+def export_all_excel(request):
+    workbook = StreamingWorkbook()
+
+    # All sessions
+    sessions = workbook.add_sheet('All_Sessions', [
+        'Session ID', 'Keyword', 'Pincode', 'Date', 'Time',
+        'Total Products', 'Out of Stock', 'In Stock', 'Availability Rate'
+    ])
+    for s in ScrapeSession.objects.order_by('-timestamp').iterator(chunk_size=2000):
+        sessions.append([
+            s.id, s.keyword, s.pincode, s.timestamp.strftime('%Y-%m-%d'), s.timestamp.strftime('%H:%M:%S'),
+            s.total_products, s.out_of_stock_count, s.total_products - s.out_of_stock_count, s.availability_rate
+        ])
+
+    # All products
+    products = workbook.add_sheet('All_Products', [
+        'Session ID', 'Session Date', 'Keyword', 'Pincode', 'Product Name',
+        'Available Variants', 'Out of Stock Variants', 'Stock Status', 'URL'
+    ])
+    all_products = (Product.objects.select_related('session').prefetch_related('variants')
+                    .order_by('-session__timestamp', 'id'))
+    for p in all_products.iterator(chunk_size=2000):
+        s = p.session
+        out_of_stock = p.variant_names(False)
+        products.append([
+            s.id, s.timestamp.strftime('%Y-%m-%d'), s.keyword, s.pincode, p.name,
+            "; ".join(p.variant_names(True)), "; ".join(out_of_stock),
+            'In Stock' if not out_of_stock else 'Has Issues',
+            p.url,
+        ])
+
+    # Alerts
+    all_alerts = Alert.objects.select_related('session').order_by('-session__timestamp', 'id')
+    if all_alerts.exists():
+        alerts = workbook.add_sheet('Alerts', [
+            'Session ID', 'Date', 'Product Name', 'Alert Type', 'Severity', 'Days Out of Stock'
+        ])
+        for a in all_alerts.iterator(chunk_size=2000):
+            alerts.append([
+                a.session.id, a.session.timestamp.strftime('%Y-%m-%d'), a.product_name,
+                a.alert_type, a.severity, a.days_out_of_stock
+            ])
+
+    return xlsx_response(workbook, "all_data.xlsx")
 
 
 def export_session_csv(request, session_id):
     session = get_object_or_404(ScrapeSession, id=session_id)
-    products = session.products.all()
+    products = session.products.prefetch_related('variants')
     df = pd.DataFrame([{
         'Session_ID': session.id,
         'Keyword': session.keyword,
         'Pincode': session.pincode,
         'Date': session.timestamp.strftime('%Y-%m-%d'),
         'Product_Name': p.name,
-        'Available_Variants': p.available_variants,
-        'Out_of_Stock_Variants': p.out_of_stock_variants,
-        'Stock_Status': 'In_Stock' if not p.out_of_stock_variants else 'Has_Issues',
+        'Available_Variants': "; ".join(p.variant_names(True)),
+        'Out_of_Stock_Variants': "; ".join(p.variant_names(False)),
+        'Stock_Status': 'In_Stock' if not p.variant_names(False) else 'Has_Issues',
         'URL': p.url
     } for p in products])
     resp = HttpResponse(content_type='text/csv')
@@ -288,7 +302,7 @@ def dashboard(request, session_id):
 
     alerts = StockAlert.objects.filter(
         keyword=session.keyword,
-        pincode=session.pincode,
+        location__pincode=session.pincode,
         is_resolved=False
     ).filter(
         Q(